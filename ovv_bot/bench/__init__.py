@@ -0,0 +1,7 @@
+# bench/
+# ------------------------------------------------------------
+# オフライン計測スクリプト群（本番コードからは import しない）
+#
+# 実行は ovv_bot/ をカレントにして:
+#   python -m bench.<script> [options]
+# ------------------------------------------------------------
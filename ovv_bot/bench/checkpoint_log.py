@@ -0,0 +1,145 @@
+# bench/checkpoint_log.py
+# ============================================================
+# Checkpoint Log Benchmark
+#
+# ROLE:
+#   - 1 メッセージ分の checkpoint（既定 12 件）を
+#       sync  : 従来の _log_event（json.dumps + print を呼び出し元で実行）
+#       async : ovv.observability.checkpoint_log.log_event（キューに積むだけ）
+#     で出したときの
+#       - 呼び出し側の所要時間（event loop を塞ぐ時間）
+#       - writer を含むプロセス全体の CPU 時間
+#     を比較する。出力は /dev/null に捨てる。
+#   - async の出力行が sync と同じ件数・同じ内容（timestamp 以外）でなければ exit 1。
+#
+# USAGE:
+#   python -m bench.checkpoint_log --messages 20000
+# ============================================================
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+from ovv.observability import checkpoint_log
+
+
+_CHECKPOINTS = [
+    ("BG", "BG_ENTRY"), ("BG", "BG_VALIDATE_INPUT"), ("BG", "BG_BUILD_PACKET"),
+    ("IF", "IF_ENTRY"), ("IF", "IF_DISPATCH_CORE"), ("CORE", "CORE_RECEIVE_PACKET"),
+    ("CORE", "CORE_INFERENCE_DONE"), ("CORE", "CORE_RETURN_RESULT"), ("IF", "IF_CORE_OK"),
+    ("ST", "ST_RECEIVE_RESULT"), ("ST", "ST_SEND_DISCORD"), ("IF", "IF_STABILIZE"),
+]
+
+
+def _sync_log_event(*, trace_id, checkpoint, layer, level, summary, error=None) -> None:
+    # 置き換え前の各レイヤの _log_event と同じ処理
+    payload: Dict[str, Any] = {
+        "trace_id": trace_id,
+        "checkpoint": checkpoint,
+        "layer": layer,
+        "level": level,
+        "summary": summary,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    if error is not None:
+        payload["error"] = error
+    print(json.dumps(payload, ensure_ascii=False))
+
+
+def _emit(fn, messages: int, per_message: int) -> None:
+    cps = (_CHECKPOINTS * (per_message // len(_CHECKPOINTS) + 1))[:per_message]
+    for i in range(messages):
+        tid = f"trace-{i:08d}"
+        for layer, cp in cps:
+            fn(trace_id=tid, checkpoint=cp, layer=layer, level="DEBUG", summary=f"{cp} ok")
+
+
+def _run(fn, messages: int, per_message: int, drain: bool) -> Dict[str, float]:
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    _emit(fn, messages, per_message)
+    caller = time.perf_counter() - t0
+    if drain:
+        checkpoint_log.flush_logs(timeout=60.0)
+    total = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    n = messages
+    return {
+        "caller_us_per_msg": round(caller / n * 1e6, 2),
+        "total_us_per_msg": round(total / n * 1e6, 2),
+        "cpu_us_per_msg": round(cpu / n * 1e6, 2),
+    }
+
+
+def _strip_ts(lines: List[str]) -> List[Dict[str, Any]]:
+    out = []
+    for line in lines:
+        d = json.loads(line)
+        d.pop("timestamp", None)
+        out.append(d)
+    return out
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    real_stdout = sys.stdout
+
+    # --- 出力一致の確認（少量を StringIO に出す） ---
+    buf_sync, buf_async = io.StringIO(), io.StringIO()
+    sys.stdout = buf_sync
+    _emit(_sync_log_event, 5, args.per_message)
+    sys.stdout = buf_async
+    _emit(checkpoint_log.log_event, 5, args.per_message)
+    checkpoint_log.flush_logs(timeout=10.0)
+    sys.stdout = real_stdout
+    same = _strip_ts(buf_sync.getvalue().splitlines()) == _strip_ts(buf_async.getvalue().splitlines())
+
+    # --- 計測（/dev/null に捨てる） ---
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        sys.stdout = devnull
+        try:
+            sync = _run(_sync_log_event, args.messages, args.per_message, drain=False)
+            async_ = _run(checkpoint_log.log_event, args.messages, args.per_message, drain=True)
+        finally:
+            sys.stdout = real_stdout
+
+    stats = checkpoint_log.log_stats()
+    return {
+        "bench": "checkpoint_log",
+        "messages": args.messages,
+        "checkpoints_per_message": args.per_message,
+        "sync": sync,
+        "async": async_,
+        "caller_speedup": round(sync["caller_us_per_msg"] / async_["caller_us_per_msg"], 2)
+        if async_["caller_us_per_msg"] else None,
+        "cpu_ratio": round(async_["cpu_us_per_msg"] / sync["cpu_us_per_msg"], 3)
+        if sync["cpu_us_per_msg"] else None,
+        "writer": {k: stats[k] for k in ("written", "batches", "dropped", "queue_max")},
+        "output_equal": same,
+        "ok": same and stats["dropped"] == 0,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Checkpoint log benchmark")
+    ap.add_argument("--messages", type=int, default=20000)
+    ap.add_argument("--per-message", type=int, default=12)
+    args = ap.parse_args()
+
+    # 計測中にキュー上限で落ちないようにする
+    checkpoint_log.LOG_QUEUE_MAX = max(checkpoint_log.LOG_QUEUE_MAX, args.messages * args.per_message)
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# bench/classifier_suite.py
+# ============================================================
+# Classifier Regression Suite (accuracy / latency)
+#
+# ROLE:
+#   - ラベル付きコーパス（bench/fixtures/classifier_corpus_v<N>.json）に対して
+#     context_splitter / memory_kind / constraint_classifier を実行し、
+#       - ラベルとの一致率（accuracy）
+#       - ベースライン予測との一致率（agreement）と変化した項目
+#       - スループット（lines/sec）と 1 件あたり p99 レイテンシ
+#     を出す。
+#   - ベースライン（bench/baselines/classifier_suite.json）と比べて
+#     しきい値を超える劣化があれば exit 1。
+#
+# NOTE:
+#   - 計測中は classify_cache（memo）を無効化する（分類そのもののコストを測るため）。
+#   - 時間系のベースラインはマシン依存。比較する環境で --update-baseline し直すこと。
+#     結果の比較だけなら --no-perf-check。
+#
+# USAGE:
+#   python -m bench.classifier_suite
+#   python -m bench.classifier_suite --no-perf-check
+#   python -m bench.classifier_suite --update-baseline
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from ovv.bis.memory_kind import classify_memory_kind
+from ovv.bis.utils import classify_cache
+from ovv.bis.utils.context_splitter import strip_llm_instructions_from_text
+from ovv.brain.constraint_classifier import classify_constraint_text
+
+
+_HERE = os.path.dirname(__file__)
+CORPUS_PATH = os.path.join(_HERE, "fixtures", "classifier_corpus_v1.json")
+BASELINE_PATH = os.path.join(_HERE, "baselines", "classifier_suite.json")
+
+
+def _context_splitter(text: str) -> str:
+    # 1 行入力が丸ごと除去されたら control
+    return "domain" if strip_llm_instructions_from_text(text) else "control"
+
+
+def _memory_kind(text: str) -> str:
+    return classify_memory_kind("user", text)
+
+
+# 名前 → (対象 kind, 分類関数)
+CLASSIFIERS: Dict[str, Tuple[str, Callable[[str], str]]] = {
+    "context_splitter": ("line", _context_splitter),
+    "memory_kind": ("line", _memory_kind),
+    "constraint_classifier": ("constraint", classify_constraint_text),
+}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+# ------------------------------------------------------------
+# Measure
+# ------------------------------------------------------------
+
+def _evaluate(name: str, items: List[Dict[str, Any]], rounds: int) -> Dict[str, Any]:
+    kind, fn = CLASSIFIERS[name]
+    targets = [it for it in items if it["kind"] == kind]
+
+    predictions = {it["id"]: fn(it["text"]) for it in targets}
+    correct = sum(1 for it in targets if predictions[it["id"]] == it["label"])
+
+    per_item: List[List[int]] = [[] for _ in targets]
+    total_ns = 0
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for i, it in enumerate(targets):
+            text = it["text"]
+            t0 = clock()
+            fn(text)
+            dt = clock() - t0
+            per_item[i].append(dt)
+            total_ns += dt
+
+    medians_us = sorted(statistics.median(v) / 1000.0 for v in per_item)
+    calls = len(targets) * rounds
+
+    return {
+        "items": len(targets),
+        "accuracy": round(correct / len(targets), 4) if targets else 0.0,
+        "lines_per_sec": round(calls / (total_ns / 1e9), 1) if total_ns else 0.0,
+        "p50_us": round(_percentile(medians_us, 0.50), 2),
+        "p99_us": round(_percentile(medians_us, 0.99), 2),
+        "mismatched_labels": sorted(
+            it["id"] for it in targets if predictions[it["id"]] != it["label"]
+        ),
+        "predictions": predictions,
+    }
+
+
+# ------------------------------------------------------------
+# Compare
+# ------------------------------------------------------------
+
+def _compare(
+    name: str,
+    cur: Dict[str, Any],
+    base: Dict[str, Any],
+    args: argparse.Namespace,
+) -> Tuple[Dict[str, Any], List[str]]:
+    failures: List[str] = []
+
+    base_pred = base.get("predictions", {})
+    shared = [k for k in cur["predictions"] if k in base_pred]
+    changed = sorted(k for k in shared if cur["predictions"][k] != base_pred[k])
+    agreement = (1.0 - len(changed) / len(shared)) if shared else 1.0
+
+    accuracy_drop = base.get("accuracy", 0.0) - cur["accuracy"]
+    if accuracy_drop > args.max_accuracy_drop:
+        failures.append(f"{name}: accuracy dropped {accuracy_drop:.2%} (> {args.max_accuracy_drop:.2%})")
+    if agreement < args.min_agreement:
+        failures.append(f"{name}: agreement with baseline {agreement:.2%} (< {args.min_agreement:.2%})")
+
+    if not args.no_perf_check:
+        base_tp = base.get("lines_per_sec") or 0.0
+        if base_tp and cur["lines_per_sec"] < base_tp * (1.0 - args.max_throughput_drop):
+            failures.append(
+                f"{name}: throughput {cur['lines_per_sec']:.0f}/s vs baseline {base_tp:.0f}/s "
+                f"(> {args.max_throughput_drop:.0%} drop)"
+            )
+        base_p99 = base.get("p99_us") or 0.0
+        if base_p99 and cur["p99_us"] > base_p99 * (1.0 + args.max_p99_increase):
+            failures.append(
+                f"{name}: p99 {cur['p99_us']}us vs baseline {base_p99}us "
+                f"(> {args.max_p99_increase:.0%} increase)"
+            )
+
+    return {
+        "agreement": round(agreement, 4),
+        "changed_vs_baseline": changed,
+        "accuracy_delta": round(-accuracy_drop, 4),
+        "throughput_ratio": round(cur["lines_per_sec"] / base["lines_per_sec"], 3)
+        if base.get("lines_per_sec") else None,
+        "p99_ratio": round(cur["p99_us"] / base["p99_us"], 3) if base.get("p99_us") else None,
+    }, failures
+
+
+# ------------------------------------------------------------
+# Run
+# ------------------------------------------------------------
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    items = corpus["items"]
+
+    # memo を無効化して分類そのものを測る
+    classify_cache.CLASSIFY_CACHE_MAX_ITEMS = 0
+
+    current = {name: _evaluate(name, items, args.rounds) for name in CLASSIFIERS}
+
+    report: Dict[str, Any] = {
+        "bench": "classifier_suite",
+        "corpus_version": corpus.get("version"),
+        "rounds": args.rounds,
+        "classifiers": {
+            name: {k: v for k, v in r.items() if k != "predictions"}
+            for name, r in current.items()
+        },
+    }
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {"corpus_version": corpus.get("version"), "classifiers": current},
+                f, ensure_ascii=False, indent=1, sort_keys=True,
+            )
+            f.write("\n")
+        report["baseline_updated"] = args.baseline
+        report["ok"] = True
+        return report
+
+    failures: List[str] = []
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except OSError as e:
+        baseline = None
+        failures.append(f"baseline not found: {e} (run with --update-baseline)")
+
+    if baseline is not None:
+        if baseline.get("corpus_version") != corpus.get("version"):
+            failures.append(
+                f"corpus version {corpus.get('version')} != baseline {baseline.get('corpus_version')} "
+                "(run with --update-baseline)"
+            )
+        else:
+            for name, cur in current.items():
+                base = baseline.get("classifiers", {}).get(name)
+                if base is None:
+                    failures.append(f"{name}: missing from baseline")
+                    continue
+                comparison, errs = _compare(name, cur, base, args)
+                report["classifiers"][name]["vs_baseline"] = comparison
+                failures.extend(errs)
+
+    report["failures"] = failures
+    report["ok"] = not failures
+    return report
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Classifier accuracy/latency regression suite")
+    ap.add_argument("--corpus", default=CORPUS_PATH)
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--rounds", type=int, default=30, help="timing rounds per item")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--no-perf-check", action="store_true", help="compare results only")
+    ap.add_argument("--max-accuracy-drop", type=float, default=0.0)
+    ap.add_argument("--min-agreement", type=float, default=1.0)
+    ap.add_argument("--max-throughput-drop", type=float, default=0.30)
+    ap.add_argument("--max-p99-increase", type=float, default=0.50)
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
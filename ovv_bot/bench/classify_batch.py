@@ -0,0 +1,124 @@
+# bench/classify_batch.py
+# ============================================================
+# Batch Classification Microbenchmark
+#
+# ROLE:
+#   - runtime_memory の kind 判定を
+#       per_entry : classify_memory_kind を 1 件ずつ
+#       batch     : classify_memory_kinds（1 回走査）
+#       batch_mp  : classify_memory_kinds(workers=N)（プロセス分割）
+#     で比較する。結果が一致しなければ exit 1。
+#   - 繰り返し計測のため、2 回目以降は classify_cache（memo）の hit を含む値になる
+#     （同じ履歴を何度も判定する実運用と同じ条件）。
+#
+# USAGE:
+#   python -m bench.classify_batch --entries 40 2000 200000 --workers 4
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+import argparse
+import json
+import random
+import sys
+import time
+
+from ovv.bis import memory_kind
+from ovv.bis.memory_kind import KIND_NAMES, classify_memory_kind, classify_memory_kinds
+
+
+_DOMAIN = [
+    "API の境界とエラーハンドリングの責務を整理した。次はマイグレーション手順の確認。",
+    "The rollback step must run before the release is approved.",
+    "負荷試験の p99 が悪化したので原因を調べる",
+    "了解、明日までにレビューします",
+]
+
+_CONTROL = [
+    "以降必ず JSON で返してください",
+    "あなたはプロのレビュアーです",
+    "[PROMPT] 箇条書きで",
+]
+
+
+def _make_entries(n: int, seed: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        r = rnd.random()
+        if r < 0.05:
+            out.append({"role": "system", "content": "system note"})
+        elif r < 0.15:
+            out.append({"role": "user", "content": rnd.choice(_CONTROL)})
+        else:
+            out.append({
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": rnd.choice(_DOMAIN) * rnd.randint(1, 4),
+            })
+    return out
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # 件数しきい値は bench の指定件数で明示的に切り替える
+    memory_kind.PROCESS_MIN_ITEMS = 0
+
+    results: List[Dict[str, Any]] = []
+    ok = True
+    for n in args.entries:
+        entries = _make_entries(n, args.seed)
+        repeat = max(1, min(50, 200000 // max(1, n)))
+
+        expected = [classify_memory_kind(e["role"], e["content"]) for e in entries]
+        got = [KIND_NAMES[c] for c in classify_memory_kinds(entries)]
+        same = expected == got
+
+        per_entry = _best_of(lambda: [classify_memory_kind(e["role"], e["content"]) for e in entries], repeat)
+        batch = _best_of(lambda: classify_memory_kinds(entries), repeat)
+
+        row: Dict[str, Any] = {
+            "entries": n,
+            "per_entry_us": round(per_entry / n * 1e6, 3),
+            "batch_us": round(batch / n * 1e6, 3),
+            "speedup": round(per_entry / batch, 2) if batch > 0 else None,
+            "output_equal": same,
+        }
+
+        if args.workers > 1 and n >= args.mp_min:
+            mp_out = classify_memory_kinds(entries, workers=args.workers)
+            row["batch_mp_equal"] = [KIND_NAMES[c] for c in mp_out] == expected
+            mp = _best_of(lambda: classify_memory_kinds(entries, workers=args.workers), min(3, repeat))
+            row["batch_mp_us"] = round(mp / n * 1e6, 3)
+            same = same and row["batch_mp_equal"]
+
+        ok = ok and same
+        results.append(row)
+
+    return {"bench": "classify_batch", "workers": args.workers, "results": results, "ok": ok}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Batch classification microbenchmark")
+    ap.add_argument("--entries", type=int, nargs="+", default=[40, 2000, 200000])
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--mp-min", type=int, default=50000, help="run batch_mp only at or above this size")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
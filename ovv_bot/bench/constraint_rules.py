@@ -0,0 +1,106 @@
+# bench/constraint_rules.py
+# ============================================================
+# Constraint Rule Table Conformance + Microbenchmark
+#
+# ROLE:
+#   - bench/fixtures/constraint_conformance.json（規則表化する前の実装の出力を記録したもの）
+#     と、現在の規則表（constraint_rules.json）の判定が全 profile で一致するか確認する。
+#     不一致があれば内容を出力して exit 1。
+#   - 1 件あたりの分類コスト（µs/item）を profile ごとに測る。
+#     --pad で各テキストを長くした場合（長文の制約メモ）も測れる。
+#
+# USAGE:
+#   python -m bench.constraint_rules
+#   python -m bench.constraint_rules --rules path/to/rules.json --pad 20
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import sys
+import time
+
+from ovv.brain.constraint_rules import RULES_PATH, load_rules
+
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "constraint_conformance.json")
+
+_PAD = "今日の議題はデプロイ手順の見直しとレビュー観点の共有。"
+
+
+def _load_cases(path: str) -> List[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["cases"]
+
+
+def _time_per_item(classify, texts: List[str], profile: str, *, min_sec: float) -> float:
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        for t in texts:
+            classify(t, profile)
+        n += len(texts)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_sec:
+            return elapsed / n
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rules = load_rules(args.rules)
+    cases = _load_cases(args.fixture)
+
+    mismatches: List[Dict[str, Any]] = []
+    for case in cases:
+        for profile in rules.profiles:
+            if profile not in case:
+                continue
+            got, rule_id = rules.explain(case["text"], profile)
+            if got != case[profile]:
+                mismatches.append({
+                    "text": case["text"],
+                    "profile": profile,
+                    "expected": case[profile],
+                    "got": got,
+                    "rule": rule_id,
+                })
+
+    texts = [c["text"] for c in cases]
+    if args.pad:
+        texts = [(_PAD * args.pad) + t for t in texts]
+
+    timings = {}
+    for profile in rules.profiles:
+        per_item = _time_per_item(rules.classify, texts, profile, min_sec=args.min_sec)
+        timings[profile] = {"us_per_item": round(per_item * 1e6, 2)}
+
+    return {
+        "bench": "constraint_rules",
+        "rules": args.rules,
+        "rule_count": rules.rule_count,
+        "cases": len(cases),
+        "avg_chars": round(sum(len(t) for t in texts) / max(1, len(texts)), 1),
+        "timings": timings,
+        "mismatches": mismatches,
+        "ok": not mismatches,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Constraint rule conformance + microbenchmark")
+    ap.add_argument("--rules", default=RULES_PATH)
+    ap.add_argument("--fixture", default=FIXTURE_PATH)
+    ap.add_argument("--pad", type=int, default=0, help="prepend N filler sentences to each text")
+    ap.add_argument("--min-sec", type=float, default=0.5, help="minimum timing window per profile")
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
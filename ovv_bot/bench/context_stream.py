@@ -0,0 +1,91 @@
+# bench/context_stream.py
+# ============================================================
+# Streaming Context Filter Benchmark
+#
+# ROLE:
+#   - 大きな貼り付けテキストに対する指示文除去を
+#       full   : 全行リストを作る一括処理（_strip_normalized）
+#       stream : iter_strip_llm_instructions（ブロック単位の逐次処理）
+#     で比較し、処理時間と tracemalloc のピークメモリを出す。
+#   - 出力が一致しなければ exit 1。
+#
+# USAGE:
+#   python -m bench.context_stream --mb 1 8 32
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from ovv.bis.utils import context_splitter
+from bench.pattern_matcher import _make_text
+
+
+def _measure(fn: Callable[[], str]) -> Tuple[str, float, int]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    ok = True
+
+    for mb in args.mb:
+        # 1 行 ≒ 100 文字で目的のサイズに合わせる
+        text = _make_text(max(1, int(mb * 1e6 / 100)), args.control_ratio, args.seed).strip()
+
+        full_out, full_s, full_peak = _measure(lambda: context_splitter._strip_normalized(text))
+        stream_out, stream_s, stream_peak = _measure(
+            lambda: "\n".join(context_splitter.iter_strip_llm_instructions(text)).strip()
+        )
+        # 出力を持たない消費（行を数えるだけ）: 逐次処理そのもののピーク
+        _, drain_s, drain_peak = _measure(
+            lambda: str(sum(1 for _ in context_splitter.iter_strip_llm_instructions(text)))
+        )
+
+        same = full_out == stream_out
+        ok = ok and same
+        results.append({
+            "input_chars": len(text),
+            "full_ms": round(full_s * 1000.0, 1),
+            "stream_ms": round(stream_s * 1000.0, 1),
+            "full_peak_mb": round(full_peak / 1e6, 2),
+            "stream_peak_mb": round(stream_peak / 1e6, 2),
+            "stream_drain_peak_mb": round(drain_peak / 1e6, 2),
+            "stream_drain_ms": round(drain_s * 1000.0, 1),
+            "output_equal": same,
+        })
+
+    return {
+        "bench": "context_stream",
+        "block_chars": context_splitter.STREAM_BLOCK_CHARS,
+        "results": results,
+        "ok": ok,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Streaming context filter benchmark")
+    ap.add_argument("--mb", type=float, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--control-ratio", type=float, default=0.02)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
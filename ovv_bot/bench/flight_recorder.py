@@ -0,0 +1,118 @@
+# bench/flight_recorder.py
+# ============================================================
+# Flight Recorder Overhead Benchmark
+#
+# ROLE:
+#   - 1 メッセージあたりの観測コストを比較する。
+#       legacy   : 従来の capture（InputPacket を _json_safe で deep copy して 1 件保持）
+#       recorder : flight_recorder.attach_packet（参照保持）+ checkpoint 12 件の note_checkpoint
+#                  （legacy には無かった checkpoint 記録込みで比較）
+#   - リングから読み出した packet が legacy の deep copy と同じ内容でなければ exit 1。
+#
+# USAGE:
+#   python -m bench.flight_recorder --messages 20000
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict
+import argparse
+import json
+import sys
+import time
+
+from ovv.bis.types import InputPacket
+from ovv.observability import flight_recorder
+
+
+_CHECKPOINTS = [
+    ("BG", "BG_ENTRY"), ("BG", "BG_VALIDATE_INPUT"), ("BG", "BG_BUILD_PACKET"),
+    ("IF", "IF_ENTRY"), ("IF", "IF_DISPATCH_CORE"), ("CORE", "CORE_RECEIVE_PACKET"),
+    ("CORE", "CORE_INFERENCE_DONE"), ("CORE", "CORE_RETURN_RESULT"), ("IF", "IF_CORE_OK"),
+    ("ST", "ST_RECEIVE_RESULT"), ("ST", "ST_SEND_DISCORD"), ("IF", "IF_STABILIZE"),
+]
+
+
+def _legacy_json_safe(value: Any) -> Any:
+    # 置き換え前の capture_interface_packet._json_safe
+    if isinstance(value, dict):
+        return {k: _legacy_json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_legacy_json_safe(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "__dict__"):
+        return _legacy_json_safe(value.__dict__)
+    return f"<unserializable {type(value).__name__}: {repr(value)}>"
+
+
+def _packet(i: int, content_chars: int) -> InputPacket:
+    return InputPacket(
+        raw="!t " + "x" * content_chars,
+        source="discord",
+        command="free_chat",
+        content="x" * content_chars,
+        author_id="1234567890",
+        channel_id="9876543210",
+        trace_id=f"trace-{i:08d}",
+        context_key="9876543210",
+        task_id="9876543210",
+        user_meta={"user_id": "1234567890", "user_name": "someone"},
+        meta={
+            "discord_channel_id": "9876543210",
+            "discord_message_id": str(10_000_000 + i),
+            "discord_thread_name": "設計レビュー",
+        },
+    )
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    packets = [_packet(i, args.content_chars) for i in range(args.messages)]
+
+    last = None
+    t0 = time.perf_counter()
+    for p in packets:
+        last = _legacy_json_safe(p)
+    legacy = time.perf_counter() - t0
+
+    # 実運用と同じ順序（BG_ENTRY → capture → 残りの checkpoint）
+    flight_recorder.clear_traces()
+    head, rest = _CHECKPOINTS[0], _CHECKPOINTS[1:]
+    t0 = time.perf_counter()
+    for p in packets:
+        tid = p.trace_id
+        flight_recorder.note_checkpoint(tid, head[0], head[1], "DEBUG", "ok")
+        flight_recorder.attach_packet(tid, p)
+        for layer, cp in rest:
+            flight_recorder.note_checkpoint(tid, layer, cp, "DEBUG", "ok")
+    recorder = time.perf_counter() - t0
+
+    rec = flight_recorder.get_trace(packets[-1].trace_id)
+    same = rec is not None and flight_recorder.to_dict(rec)["packet"] == last
+    n = args.messages
+    return {
+        "bench": "flight_recorder",
+        "messages": n,
+        "content_chars": args.content_chars,
+        "legacy_capture_us": round(legacy / n * 1e6, 3),
+        "recorder_us": round(recorder / n * 1e6, 3),
+        "speedup": round(legacy / recorder, 2) if recorder else None,
+        "packet_equal": same,
+        "ok": same,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Flight recorder overhead benchmark")
+    ap.add_argument("--messages", type=int, default=20000)
+    ap.add_argument("--content-chars", type=int, default=400)
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
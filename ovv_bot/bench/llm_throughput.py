@@ -0,0 +1,103 @@
+# bench/llm_throughput.py
+# ============================================================
+# LLM Path Throughput Benchmark (offline / StubProvider)
+#
+# ROLE:
+#   - ネットワーク無しで LLM を通るパイプラインの throughput / latency を測る。
+#   - provider は StubProvider（レイテンシ・トークン速度を指定可能）に固定する。
+#
+# USAGE:
+#   python -m bench.llm_throughput --requests 200 --concurrency 16 \
+#       --latency-ms 300 --tokens-per-sec 80
+#
+# NOTE:
+#   - PG は不要（POSTGRES_URL 未設定なら response_cache の L2 は自動で無効）
+#   - --duplicate-ratio で同一プロンプトの割合を上げると single-flight の効果が見える
+# ============================================================
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import time
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def _runtime_memory(i: int, turns: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "role": "user" if t % 2 == 0 else "assistant",
+            "content": f"thread {i} message {t}: 設計方針の確認と次の作業の整理",
+            "ts": f"2025-01-01T00:{t // 60:02d}:{t % 60:02d}+00:00",
+        }
+        for t in range(turns)
+    ]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ.setdefault("OVV_LLM_CACHE_PG", "0")
+
+    from ovv.external_services.llm.providers import StubProvider, set_provider
+    from ovv.external_services.llm.single_flight import llm_single_flight
+    from ovv.brain.threadbrain_generator import generate_tb_summary
+
+    stub = StubProvider(latency_ms=args.latency_ms, tokens_per_sec=args.tokens_per_sec)
+    set_provider(stub)
+
+    unique = max(1, int(args.requests * (1.0 - args.duplicate_ratio)))
+    memories = [_runtime_memory(i, args.turns) for i in range(unique)]
+
+    def _one(i: int) -> float:
+        t0 = time.perf_counter()
+        generate_tb_summary(i % unique, memories[i % unique])
+        return (time.perf_counter() - t0) * 1000.0
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = sorted(pool.map(_one, range(args.requests)))
+    elapsed = time.perf_counter() - t_start
+
+    set_provider(None)
+
+    return {
+        "bench": "llm_throughput",
+        "provider": stub.name,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "provider_calls": stub.calls,
+        "elapsed_sec": round(elapsed, 4),
+        "throughput_rps": round(args.requests / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50), 3),
+            "p95": round(_percentile(latencies, 0.95), 3),
+            "p99": round(_percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "single_flight": llm_single_flight.stats(),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Offline LLM path throughput benchmark")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--turns", type=int, default=30, help="runtime_memory entries per thread")
+    ap.add_argument("--latency-ms", type=float, default=200.0)
+    ap.add_argument("--tokens-per-sec", type=float, default=0.0)
+    ap.add_argument("--duplicate-ratio", type=float, default=0.0)
+    args = ap.parse_args()
+
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
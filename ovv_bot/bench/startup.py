@@ -0,0 +1,410 @@
+# bench/startup.py
+# ============================================================
+# Startup / Import-time Benchmark (regression gate)
+#
+# ROLE:
+#   - 起動コストを項目ごとに「新しいインタプリタ」で測る（cold import）。
+#       import:<module>          : 主要モジュールの import 時間
+#       build:notion_client      : get_notion_client()（notion_client import + Client 生成）
+#       build:openai_client      : OpenAIProvider._get_client()（openai import + Client 生成）
+#       build:bot                : commands.Bot(...) の生成
+#       register:debug_commands  : register_debug_commands(bot)
+#       bot.py:to_run            : インタプリタ起動 → bot.py が bot.run() に到達するまで
+#                                  （boot_timing の phase 内訳も出す）
+#   - どの import が支配的かを -X importtime で採り、モジュール別 self 時間と
+#     トップレベルパッケージ別（ovv / discord / aiohttp ...）の合計の上位を出す。
+#   - ベースライン（bench/baselines/startup.json）と比べ、中央値が
+#     しきい値を超えて遅くなった項目があれば exit 1。
+#     ベースラインが無ければ比較を飛ばして exit 0（--require-baseline なら exit 1）。
+#
+# NOTE:
+#   - 子プロセスは stub の ENV で動かす（ダミーの API key / token、POSTGRES_URL なし）。
+#     ネットワークには出ない。import 時に PG / Notion / Discord へ接続する変更が入ると
+#     その項目がエラーになり、ゲートで落ちる。
+#   - bot.py:to_run は DISCORD_BOT_TOKEN を外して bot.py を __main__ として実行する
+#     （token が無いと bot.run() を呼ばずに終わる＝ gateway 接続の直前までを測る）。
+#   - --cold-bytecode は __pycache__ を使わない（毎回コンパイル。新規コンテナでの初回起動に近い）。
+#   - 時間系のベースラインはマシン依存。比較する環境で --update-baseline し直すこと。
+#
+# USAGE:
+#   python -m bench.startup
+#   python -m bench.startup --runs 7 --cold-bytecode
+#   python -m bench.startup --output /tmp/startup.json
+#   python -m bench.startup --update-baseline
+#   python -m bench.startup --require-baseline      # CI ゲート（ベースライン必須）
+# ============================================================
+
+from __future__ import annotations
+
+# 子プロセスでは計測対象の import を汚さないよう、ここでは最小限しか import しない
+import os
+import sys
+import time
+
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(_HERE)
+BASELINE_PATH = os.path.join(_HERE, "baselines", "startup.json")
+
+IMPORT_TARGETS = (
+    "discord",
+    "database.pg",
+    "ovv.bis.boundary_gate",
+    "ovv.core.ovv_core",
+    "ovv.bis.utils.debug.debug_commands",
+    "ovv.external_services.notion.notion_client",
+    "ovv.external_services.llm.providers",
+    "notion_client",
+    "openai",
+)
+
+OTHER_CASES = (
+    "build:notion_client",
+    "build:openai_client",
+    "build:bot",
+    "bot.py:to_run",
+)
+
+# 1 case が複数の metric を出す場合の逆引き
+_CASE_OF = {"register:debug_commands": "build:bot"}
+
+# 子プロセスに渡す stub ENV（実在の secret は渡さない）
+STUB_ENV = {
+    "DISCORD_BOT_TOKEN": "bench-discord-token",
+    "OPENAI_API_KEY": "sk-bench",
+    "NOTION_API_KEY": "secret_bench",
+    "NOTION_TASK_DB_ID": "00000000000000000000000000000000",
+    "OVV_LLM_PROVIDER": "openai",
+    "OVV_TRACE_PERSIST": "0",
+    "OVV_BOOT_VERBOSE": "0",
+}
+_PASSTHROUGH_ENV = ("PATH", "HOME", "LANG", "LC_ALL", "PYTHONPATH", "VIRTUAL_ENV", "SYSTEMROOT", "TMPDIR")
+
+
+# ============================================================
+# Child (1 case = 1 interpreter)
+# ============================================================
+
+def _ms_since(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def _child(case: str) -> dict:
+    """
+    計測値 {metric: ms} と補足情報を返す。
+    """
+    if case.startswith("import:"):
+        import importlib
+
+        t0 = time.perf_counter()
+        importlib.import_module(case.split(":", 1)[1])
+        return {"metrics": {case: _ms_since(t0)}}
+
+    if case == "build:notion_client":
+        from ovv.external_services.notion.notion_client import get_notion_client
+
+        t0 = time.perf_counter()
+        client = get_notion_client()
+        if client is None:
+            raise RuntimeError("notion client not built (NOTION_API_KEY missing?)")
+        return {"metrics": {case: _ms_since(t0)}}
+
+    if case == "build:openai_client":
+        from ovv.external_services.llm.providers import OpenAIProvider
+
+        t0 = time.perf_counter()
+        OpenAIProvider()._get_client()
+        return {"metrics": {case: _ms_since(t0)}}
+
+    if case == "build:bot":
+        import discord
+        from discord.ext import commands
+        from ovv.bis.utils.debug.debug_commands import register_debug_commands
+
+        t0 = time.perf_counter()
+        intents = discord.Intents.default()
+        intents.message_content = True
+        bot = commands.Bot(command_prefix="__OVV_INTERNAL__", intents=intents)
+        built = _ms_since(t0)
+        t0 = time.perf_counter()
+        register_debug_commands(bot)
+        return {
+            "metrics": {case: built, "register:debug_commands": _ms_since(t0)},
+            "info": {"commands": len(bot.commands)},
+        }
+
+    if case == "bot.py:to_run":
+        import contextlib
+        import io
+        import runpy
+
+        os.environ.pop("DISCORD_BOT_TOKEN", None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(os.path.join(ROOT, "bot.py"), run_name="__main__")
+        from ovv.observability import boot_timing
+
+        rep = boot_timing.boot_report()
+        total = (rep["interpreter_ms"] or 0.0) + _ms_since(boot_timing.BOOT_T0)
+        return {
+            "metrics": {case: total},
+            "info": {
+                "interpreter_ms": rep["interpreter_ms"],
+                "phases": {ev["name"]: ev["duration_ms"] for ev in rep["events"] if ev["duration_ms"]},
+            },
+        }
+
+    raise ValueError(f"unknown case: {case}")
+
+
+def _child_main(case: str) -> None:
+    import json
+
+    try:
+        out = _child(case)
+    except BaseException as e:
+        out = {"error": f"{type(e).__name__}: {e}"}
+    # 最終行だけを親が読む（bot 側の print と混ざってもよいように）
+    sys.stdout.write("\n" + json.dumps(out) + "\n")
+
+
+# ============================================================
+# Parent
+# ============================================================
+
+def _child_env(cold_bytecode: bool) -> dict:
+    import tempfile
+
+    env = {k: os.environ[k] for k in _PASSTHROUGH_ENV if k in os.environ}
+    env.update(STUB_ENV)
+    if cold_bytecode:
+        env["PYTHONPYCACHEPREFIX"] = tempfile.mkdtemp(prefix="ovv-bench-pyc-")
+    return env
+
+
+def _spawn(args: list, cold_bytecode: bool, timeout: float = 120.0):
+    import shutil
+    import subprocess
+
+    env = _child_env(cold_bytecode)
+    try:
+        return subprocess.run(
+            [sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True, timeout=timeout,
+        )
+    finally:
+        if "PYTHONPYCACHEPREFIX" in env:
+            shutil.rmtree(env["PYTHONPYCACHEPREFIX"], ignore_errors=True)
+
+
+def _run_case(case: str, cold_bytecode: bool) -> dict:
+    import json
+
+    proc = _spawn(["-m", "bench.startup", "--child", case], cold_bytecode)
+    lines = [ln for ln in proc.stdout.splitlines() if ln.strip()]
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-1:] or ["no output"]
+        return {"error": f"exit {proc.returncode}: {tail[0]}"}
+
+
+def _import_profile(target: str, top: int, cold_bytecode: bool) -> dict:
+    """
+    python -X importtime -c "import <target>" の stderr を集計する。
+      top_self     : self 時間の上位（どのモジュールの本体が重いか）
+      top_packages : トップレベルパッケージ別の self 合計の上位（どの依存が重いか）
+    """
+    proc = _spawn(["-X", "importtime", "-c", f"import {target}"], cold_bytecode)
+    rows = []
+    for ln in proc.stderr.splitlines():
+        if not ln.startswith("import time:") or "imported package" in ln:
+            continue
+        parts = ln[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cum_us, name = parts
+        try:
+            rows.append((name.rstrip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue
+    if not rows:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["no output"]
+        return {"target": target, "error": f"exit {proc.returncode}: {tail[0]}"}
+
+    # 名前の先頭の空白数 = ネストの深さ。行は import 完了順に出るので、
+    # 最後の最上位行（target）とその直前の最上位行のあいだが target の部分木（interpreter 起動分を除く）
+    def _depth(name: str) -> int:
+        return len(name) - len(name.lstrip())
+
+    depth0 = min(_depth(n) for n, _, _ in rows)
+    tops = [i for i, (n, _, _) in enumerate(rows) if _depth(n) == depth0]
+    start = tops[-2] + 1 if len(tops) > 1 else 0
+    tree = [(n.strip(), s, c) for n, s, c in rows[start:]]
+
+    by_package: dict = {}
+    for name, self_us, _ in tree:
+        root = name.split(".", 1)[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+    return {
+        "target": target,
+        "total_ms": round(tree[-1][2] / 1000.0, 1),
+        "modules": len(tree),
+        "top_self": [[n, round(s / 1000.0, 2)] for n, s, _ in sorted(tree, key=lambda r: -r[1])[:top]],
+        "top_packages": [
+            [n, round(s / 1000.0, 2)] for n, s in sorted(by_package.items(), key=lambda r: -r[1])[:top]
+        ],
+    }
+
+
+def _measure(cases: list, runs: int, cold_bytecode: bool) -> dict:
+    import statistics
+
+    samples: dict = {}
+    info: dict = {}
+    errors: dict = {}
+    for case in cases:
+        for _ in range(runs):
+            out = _run_case(case, cold_bytecode)
+            if "error" in out:
+                errors[case] = out["error"]
+                break
+            for metric, ms in out["metrics"].items():
+                samples.setdefault(metric, []).append(ms)
+            if out.get("info"):
+                info[case] = out["info"]
+
+    results = {
+        metric: {
+            "median_ms": round(statistics.median(v), 2),
+            "min_ms": round(min(v), 2),
+            "max_ms": round(max(v), 2),
+            "runs": len(v),
+        }
+        for metric, v in samples.items()
+    }
+    return {"results": results, "info": info, "errors": errors}
+
+
+# ------------------------------------------------------------
+# Compare
+# ------------------------------------------------------------
+
+def _compare(current: dict, errors: dict, baseline: dict, args) -> list:
+    failures = []
+    for metric, base in sorted(baseline.get("results", {}).items()):
+        cur = current.get(metric)
+        if cur is None:
+            case = _CASE_OF.get(metric, metric)
+            failures.append(f"{metric}: not measured ({errors.get(case, 'case not run')})")
+            continue
+        limit = base["median_ms"] * (1.0 + args.max_increase)
+        delta = cur["median_ms"] - base["median_ms"]
+        cur["vs_baseline"] = round(cur["median_ms"] / base["median_ms"], 3) if base["median_ms"] else None
+        if cur["median_ms"] > limit and delta > args.min_delta_ms:
+            failures.append(
+                f"{metric}: median {cur['median_ms']:.1f}ms vs baseline {base['median_ms']:.1f}ms "
+                f"(+{delta:.1f}ms, > {args.max_increase:.0%})"
+            )
+    return failures
+
+
+# ------------------------------------------------------------
+# Run
+# ------------------------------------------------------------
+
+def run(args) -> dict:
+    import json
+    import platform
+
+    cases = [f"import:{m}" for m in IMPORT_TARGETS] + list(OTHER_CASES)
+    if args.only:
+        cases = [c for c in cases if any(k in c for k in args.only)]
+
+    measured = _measure(cases, args.runs, args.cold_bytecode)
+    report = {
+        "bench": "startup",
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "cold_bytecode": args.cold_bytecode,
+        "results": measured["results"],
+        "info": measured["info"],
+        "errors": measured["errors"],
+    }
+    if args.importtime_target:
+        report["importtime"] = _import_profile(args.importtime_target, args.top, args.cold_bytecode)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {"python": report["python"], "cold_bytecode": args.cold_bytecode, "results": report["results"]},
+                f, ensure_ascii=False, indent=1, sort_keys=True,
+            )
+            f.write("\n")
+        report["baseline_updated"] = args.baseline
+        report["ok"] = True
+        return report
+
+    failures = []
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = None
+        if args.require_baseline:
+            failures.append(f"baseline not found: {args.baseline} (run with --update-baseline)")
+        else:
+            report["baseline"] = "no baseline, comparison skipped"
+    except OSError as e:
+        baseline = None
+        failures.append(f"baseline not readable: {e}")
+
+    if baseline is not None:
+        if baseline.get("cold_bytecode") != args.cold_bytecode:
+            failures.append(
+                f"baseline cold_bytecode={baseline.get('cold_bytecode')} != {args.cold_bytecode} "
+                "(measure with the same mode or --update-baseline)"
+            )
+        else:
+            failures.extend(_compare(report["results"], report["errors"], baseline, args))
+
+    report["failures"] = failures
+    report["ok"] = not failures
+    return report
+
+
+def main() -> None:
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Startup / import-time benchmark with regression gate")
+    ap.add_argument("--runs", type=int, default=5, help="fresh interpreters per case")
+    ap.add_argument("--only", nargs="*", help="substring filter on case names")
+    ap.add_argument("--cold-bytecode", action="store_true", help="ignore __pycache__ (compile every run)")
+    ap.add_argument("--importtime-target", default="ovv.bis.boundary_gate",
+                    help="module for the -X importtime breakdown ('' to skip)")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--require-baseline", action="store_true",
+                    help="fail when the baseline file is missing (default: skip the comparison)")
+    ap.add_argument("--output", help="also write the JSON report to this path")
+    ap.add_argument("--max-increase", type=float, default=0.30, help="allowed median increase ratio")
+    ap.add_argument("--min-delta-ms", type=float, default=15.0,
+                    help="ignore increases smaller than this (noise on small modules)")
+    args = ap.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        _child_main(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,124 @@
+# bench/tb_prompt.py
+# ============================================================
+# TB Prompt Memo Benchmark
+#
+# ROLE:
+#   - tb_prompt_cache の memo が組み立てより速いかを、公開関数そのもので比較する。
+#       cached   : meta.revision 付きの TB（2 回目以降は memo hit）
+#       uncached : 同じ内容で revision の無い TB（fingerprint None → 毎回組み立て）
+#     対象: build_tb_prompt / build_scoring_prompt / normalize_thread_brain（v2 TB）
+#   - cached と uncached の結果が一致しなければ exit 1。
+#   - --max-ratio を指定すると、cached / uncached がそれを超えた場合も exit 1。
+#
+# USAGE:
+#   python -m bench.tb_prompt --iterations 20000
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+import argparse
+import copy
+import json
+import sys
+import time
+
+from ovv.brain.tb_prompt_cache import clear_prompt_cache
+from ovv.brain.tb_scoring import build_scoring_prompt
+from ovv.brain.threadbrain_adapter import build_tb_prompt, normalize_thread_brain
+
+
+def _tb(version: str, revision: Optional[str]) -> Dict[str, Any]:
+    # generator が返す程度の TB（各セクション数件）
+    meta: Dict[str, Any] = {
+        "version": version,
+        "updated_at": "2026-10-18T12:00:00+00:00",
+        "context_key": 1234567890,
+        "total_tokens_estimate": 820,
+    }
+    if revision is not None:
+        meta["revision"] = revision
+    tb: Dict[str, Any] = {
+        "meta": meta,
+        "status": {"phase": "active", "last_major_event": "schema review", "risk": ["migration lock", "cache drift"]},
+        "decisions": [f"決定 {i}: PostgreSQL の advisory lock で直列化する" for i in range(5)],
+        "unresolved": [f"未解決 {i}: snapshot 間隔の妥当性" for i in range(4)],
+        "next_actions": [f"次 {i}: ベンチを取り直す" for i in range(4)],
+        "history_digest": "永続化レイヤの整理について議論した。" * 8,
+        "high_level_goal": "ThreadWBS の永続化をイベントログ化する",
+        "recent_messages": [f"user: メッセージ {i}" for i in range(6)],
+        "current_position": "レビュー指摘の対応中",
+    }
+    if version.startswith("3"):
+        tb["constraints_soft"] = ["敬語で答える", "箇条書きを優先する"]
+    else:
+        tb["constraints"] = ["JSONで返して", "敬語で答える", "絶対に推測で断定しない", "箇条書きを優先する"]
+    return tb
+
+
+def _time_us(fn: Callable[[], Any], iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    clear_prompt_cache()
+    n = args.iterations
+    cases = {
+        "build_tb_prompt": (build_tb_prompt, "3.0"),
+        "build_scoring_prompt": (build_scoring_prompt, "3.0"),
+        "normalize_thread_brain_v2": (normalize_thread_brain, "2.0"),
+    }
+
+    results: Dict[str, Any] = {}
+    equal = True
+    ok = True
+    for name, (fn, version) in cases.items():
+        cached_tb = _tb(version, "rev-bench-0001")
+        plain_tb = _tb(version, None)
+        # revision 以外は同じ内容。出力比較時は revision を除いて比べる
+        out_cached = fn(copy.deepcopy(cached_tb))
+        out_plain = fn(copy.deepcopy(plain_tb))
+        if isinstance(out_cached, dict):
+            out_cached = {**out_cached, "meta": {k: v for k, v in out_cached["meta"].items() if k != "revision"}}
+        same = out_cached == out_plain
+        equal = equal and same
+
+        cached = _time_us(lambda: fn(cached_tb), n)
+        uncached = _time_us(lambda: fn(plain_tb), n)
+        ratio = cached / uncached if uncached else None
+        if args.max_ratio is not None and ratio is not None and ratio > args.max_ratio:
+            ok = False
+        results[name] = {
+            "cached_us": round(cached, 2),
+            "uncached_us": round(uncached, 2),
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "output_equal": same,
+        }
+
+    return {
+        "bench": "tb_prompt",
+        "iterations": n,
+        "cases": results,
+        "max_ratio": args.max_ratio,
+        "ok": ok and equal,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="TB prompt memo benchmark")
+    ap.add_argument("--iterations", type=int, default=20000)
+    ap.add_argument("--max-ratio", type=float, default=None,
+                    help="fail if cached/uncached exceeds this ratio for any case")
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
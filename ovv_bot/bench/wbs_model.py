@@ -0,0 +1,169 @@
+# bench/wbs_model.py
+# ============================================================
+# ThreadWBS Representation Benchmark
+#
+# ROLE:
+#   - キャッシュ 1 件あたりのメモリと codec 時間を、表現ごとに比較する。
+#       dict   : 現行の入れ子 dict（json.loads の結果）
+#       json   : JSON text（pg_wbs のキャッシュ既定 OVV_WBS_CACHE_FORMAT=json）
+#       model  : wbs_model.ThreadWBS（__slots__ / epoch int / uuid bytes）
+#       binary : ThreadWBS.to_bytes()（OVV_WBS_CACHE_FORMAT=binary）
+#   - codec: json.loads / json.dumps と from_dict / to_dict / to_bytes / from_bytes、
+#     および「binary → dict」（キャッシュから dict を返す経路）を比較する。
+#     *_cold は時刻変換の memo を毎回捨てた値（初回 load 相当）。
+#   - WBS は thread_wbs_builder で組み立てる（実運用と同じ形）。
+#   - どの経路でも元の dict に戻らなければ exit 1。
+#
+# USAGE:
+#   python -m bench.wbs_model --work-items 20 --drafts 30 --questions 10
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+import argparse
+import copy
+import json
+import sys
+import time
+import tracemalloc
+
+from ovv.bis.wbs import thread_wbs_builder as builder
+from ovv.bis.wbs import wbs_model
+from ovv.bis.wbs.wbs_model import ThreadWBS
+
+
+def _build(args: argparse.Namespace) -> Dict[str, Any]:
+    wbs = builder.create_empty_wbs("設計レビュー: 永続化レイヤの整理", trace_id="bench")
+    for i in range(args.work_items):
+        wbs = builder.accept_work_item(wbs, {"rationale": f"作業項目 {i}: スキーマ差分を確認して移行手順を書く"})
+        if i % 3 == 0:
+            wbs, _ = builder.mark_focus_done(wbs)
+    ops = []
+    for i in range(args.drafts):
+        ops.append({"op": "append_draft", "draft": {"text": f"候補 {i}: キャッシュの無効化条件を洗い出す", "kind": "work_item_candidate"}})
+    for i in range(args.questions):
+        ops.append({"op": "append_question", "question": {"text": f"質問 {i}: snapshot の間隔はいくつが妥当か"}})
+    ops.append({"op": "set_intent", "intent": {"state": "candidate", "summary": "永続化の整理"}})
+    wbs = builder.apply_draft_ops(wbs, ops)
+    drafts = wbs["volatile"]["drafts"]
+    for d in drafts[: len(drafts) // 4]:
+        wbs = builder.promote_draft_to_work_item(wbs, draft_id=d["draft_id"], reason="bench")
+    return wbs
+
+
+def _edge(wbs: Dict[str, Any]) -> Dict[str, Any]:
+    # 変換対象にならない値（数値の時刻・Z 表記・bool・大文字 uuid・未知キー）を混ぜた WBS
+    edge = copy.deepcopy(wbs)
+    edge["meta"]["created_at"] = 1700000000
+    edge["meta"]["imported_from"] = "legacy"
+    edge["work_items"][0]["created_at"] = "2026-01-01T00:00:00Z"
+    edge["work_items"][1]["finalized_at"] = True
+    edge["volatile"]["drafts"][0]["draft_id"] = edge["volatile"]["drafts"][0]["draft_id"].upper()
+    edge["volatile"]["drafts"][1]["updated_at"] = 1.5
+    edge["volatile"]["intent"]["updated_at"] = None
+    return edge
+
+
+def _retained(make: Callable[[], Any], copies: int) -> float:
+    # 同じ表現を copies 個保持したときの 1 個あたりの確保量（bytes）
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    held = [make() for _ in range(copies)]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del held
+    return used / copies
+
+
+def _time_us(fn: Callable[[], Any], loops: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return (time.perf_counter() - t0) / loops * 1e6
+
+
+def _cold(fn: Callable[[], Any]) -> Callable[[], Any]:
+    def call() -> Any:
+        wbs_model._ts_parse.cache_clear()
+        wbs_model._ts_format.cache_clear()
+        return fn()
+    return call
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    wbs = _build(args)
+    text = json.dumps(wbs, ensure_ascii=False)
+    model = ThreadWBS.from_dict(wbs)
+    blob = model.to_bytes()
+
+    # ---- 往復一致（dict として。キー順は _FIELDS 順になる） ----
+    edge = _edge(wbs)
+    edge_model = ThreadWBS.from_dict(edge)
+    checks = {
+        "model_to_dict": model.to_dict() == wbs,
+        "binary_to_dict": ThreadWBS.from_bytes(blob).to_dict() == wbs,
+        "binary_to_model": ThreadWBS.from_bytes(blob) == model,
+        "edge_model_to_dict": edge_model.to_dict() == edge,
+        "edge_binary_to_dict": ThreadWBS.from_bytes(edge_model.to_bytes()).to_dict() == edge,
+    }
+
+    # ---- メモリ（キャッシュ 1 件あたり） ----
+    memory = {
+        "dict": _retained(lambda: json.loads(text), args.copies),
+        "json_text": _retained(lambda: json.dumps(wbs, ensure_ascii=False), args.copies),
+        "model": _retained(lambda: ThreadWBS.from_bytes(blob), args.copies),
+        "binary": _retained(lambda: model.to_bytes(), args.copies),
+    }
+
+    # ---- codec ----
+    n = args.loops
+    codec = {
+        "json_loads": _time_us(lambda: json.loads(text), n),
+        "json_dumps": _time_us(lambda: json.dumps(wbs, ensure_ascii=False), n),
+        "from_dict": _time_us(lambda: ThreadWBS.from_dict(wbs), n),
+        "to_dict": _time_us(model.to_dict, n),
+        "to_bytes": _time_us(model.to_bytes, n),
+        "from_bytes": _time_us(lambda: ThreadWBS.from_bytes(blob), n),
+        "bytes_to_dict": _time_us(lambda: ThreadWBS.from_bytes(blob).to_dict(), n),
+        "dict_to_bytes": _time_us(lambda: ThreadWBS.from_dict(wbs).to_bytes(), n),
+        "from_dict_cold": _time_us(_cold(lambda: ThreadWBS.from_dict(wbs)), n),
+        "to_dict_cold": _time_us(_cold(model.to_dict), n),
+        "bytes_to_dict_cold": _time_us(_cold(lambda: ThreadWBS.from_bytes(blob).to_dict()), n),
+    }
+
+    ok = all(checks.values())
+    return {
+        "bench": "wbs_model",
+        "shape": {
+            "work_items": len(wbs["work_items"]),
+            "drafts": len(wbs["volatile"]["drafts"]),
+            "questions": len(wbs["volatile"]["open_questions"]),
+        },
+        "json_bytes": len(text.encode("utf-8")),
+        "binary_bytes": len(blob),
+        "memory_bytes": {k: round(v) for k, v in memory.items()},
+        "memory_vs_dict": {k: round(v / memory["dict"], 3) for k, v in memory.items()},
+        "codec_us": {k: round(v, 2) for k, v in codec.items()},
+        "checks": checks,
+        "ok": ok,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="ThreadWBS representation benchmark")
+    ap.add_argument("--work-items", type=int, default=20)
+    ap.add_argument("--drafts", type=int, default=30)
+    ap.add_argument("--questions", type=int, default=10)
+    ap.add_argument("--copies", type=int, default=200)
+    ap.add_argument("--loops", type=int, default=2000)
+    args = ap.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@
 #   [DELEGATE]     Boundary_Gate への完全委譲
 #   [DEBUG]        起動時の環境可視化 / Debug Command Suite 登録
 #   [OBSERVE]      デプロイ時デバッグ通知（Bot 自身による送信）
+#   [BOOT]         起動段階の所要時間（boot_timing）。ツリー / sys.path の診断出力は
+#                  opt-in（OVV_BOOT_VERBOSE=1 / !dbg_boot）。DB migration と cache warm-up は on_ready で 1 回
+#                  （database.migrations / ovv.bis.warmup）
 #
 # CONSTRAINTS:
 #   - Core / WBS / Persist / Notion を直接触らない
@@ -18,44 +21,44 @@
 #   - 観測系は失敗しても Bot を止めない
 # ---------------------------------------------------------------------
 
+import asyncio
 import os
-import sys
-import discord
-from discord.ext import commands
 
-print("=== BOT.PY IMPORT START ===")
+from ovv.observability import boot_timing
+from ovv.observability.boot_timing import phase
+
+# 起動時の詳細出力（ディレクトリツリー / sys.path / import 前後の print）。
+# 既定では出さず、!dbg_boot tree / !dbg_boot path で必要なときに見る
+BOOT_VERBOSE = os.getenv("OVV_BOOT_VERBOSE", "0") == "1"
+
+with phase("import discord"):
+    import discord
+    from discord.ext import commands
 
 # ================================================================
-# [DEBUG] Render 起動時：ディレクトリ構造 / sys.path を可視化
+# [DEBUG] 起動時診断（opt-in）
 # ================================================================
-print("=== PROJECT DIR TREE DUMP (from bot.py working directory) ===")
-for root, dirs, files in os.walk(".", topdown=True):
-    level = root.count(os.sep)
-    indent = " " * 2 * level
-    print(f"{indent}{root}/")
-    for f in files:
-        print(f"{indent}  {f}")
-print("=== END TREE DUMP ===\n")
-
-print("=== PYTHON SYSPATH (import root check) ===")
-for p in sys.path:
-    print(p)
-print("=== END SYSPATH ===\n")
+if BOOT_VERBOSE:
+    from ovv.bis.utils.debug.boot_diagnostics import dir_tree_lines, sys_path_lines
+
+    print("=== PROJECT DIR TREE DUMP (from bot.py working directory) ===")
+    print("\n".join(dir_tree_lines()))
+    print("=== END TREE DUMP ===\n")
+    print("=== PYTHON SYSPATH (import root check) ===")
+    print("\n".join(sys_path_lines()))
+    print("=== END SYSPATH ===\n")
 
 # ================================================================
 # Import Boundary
 # ================================================================
-print("=== BEFORE boundary_gate import ===")
-from ovv.bis.boundary_gate import handle_discord_input
-print("=== AFTER boundary_gate import ===")
+with phase("import boundary_gate"):
+    from ovv.bis.boundary_gate import handle_discord_input
 
-print("=== BEFORE debug_commands import ===")
-from ovv.bis.utils.debug.debug_commands import register_debug_commands
-print("=== AFTER debug_commands import ===")
+with phase("import debug_commands"):
+    from ovv.bis.utils.debug.debug_commands import register_debug_commands
 
-print("=== BEFORE bot_notifier import ===")
-from ovv.bis.utils.debug.bot_notifier import notify_deploy_ok_via_bot
-print("=== AFTER bot_notifier import ===")
+with phase("import bot_notifier"):
+    from ovv.bis.utils.debug.bot_notifier import notify_deploy_ok_via_bot
 
 # ================================================================
 # Discord Bot Instance
@@ -73,12 +76,16 @@ bot = commands.Bot(
 # ================================================================
 # Debug Command Suite 登録
 # ================================================================
-register_debug_commands(bot)
-print("[DEBUG] Debug Command Suite registered.")
+with phase("register debug commands"):
+    register_debug_commands(bot)
+boot_timing.mark("imports done")
 
 # ================================================================
 # Discord Events
 # ================================================================
+_migrated = False
+
+
 @bot.event
 async def on_ready():
     """
@@ -86,6 +93,41 @@ async def on_ready():
     ここを「デプロイ成功」とみなして通知する。
     """
     print(f"[Discord] Bot logged in as {bot.user}")
+    boot_timing.mark("on_ready")
+    print(boot_timing.boot_summary())
+
+    # [PERSIST] import 時ではなくログイン後に 1 回だけ（loop を止めないよう worker thread で）
+    #           最新なら schema_migrations の version 確認 1 往復のみ
+    #           失敗したら _migrated を立てず、次の on_ready（再接続）で再試行する
+    #           （同時実行は migrate 側の advisory lock で直列化される）
+    global _migrated
+    if not _migrated:
+        try:
+            from database.migrations import migrate
+
+            with phase("migrations"):
+                res = await asyncio.to_thread(migrate)
+            _migrated = True
+            if res["applied"]:
+                print(f"[migrations] schema {res['from']} -> {res['to']}")
+        except Exception as e:
+            print("[Persist] Migration failed (will retry on next on_ready):", e)
+
+    # [PERSIST] 最近動いていたスレッドの WBS / Notion page_id を先読み（background・1 回のみ）
+    try:
+        from ovv.bis.warmup import start_warmup
+
+        start_warmup()
+    except Exception as e:
+        print("[warmup] start failed (ignored):", repr(e))
+
+    # [OBSERVE] event loop の遅延監視（再接続で on_ready が再度呼ばれても 1 組のみ）
+    try:
+        from ovv.observability.loop_monitor import start_loop_monitor
+
+        start_loop_monitor()
+    except Exception as e:
+        print("[loop_monitor] start failed (ignored):", repr(e))
 
     try:
         await notify_deploy_ok_via_bot(
@@ -138,7 +180,18 @@ async def on_message(message: discord.Message):
 # Entry Point
 # ================================================================
 def run(token: str):
+    # [OBSERVE] ローカル /metrics（OVV_METRICS_PORT 設定時のみ）。失敗しても Bot は起動する
+    try:
+        from ovv.observability.metrics import start_metrics_server
+        from ovv.observability.metrics_collectors import register_default_collectors
+
+        register_default_collectors()
+        start_metrics_server()
+    except Exception as e:
+        print("[metrics] server start failed (ignored):", repr(e))
+
     print("[Discord] starting bot.run()")
+    boot_timing.mark("bot.run")
     bot.run(token)
 
 if __name__ == "__main__":
@@ -5,7 +5,11 @@ import os
 # Environment Loader + Global Constants
 # ============================================================
 
-print("=== [BOOT] Loading environment variables ===")
+# 起動時の print は OVV_BOOT_VERBOSE=1 のときのみ
+_VERBOSE = os.getenv("OVV_BOOT_VERBOSE", "0") == "1"
+
+if _VERBOSE:
+    print("=== [BOOT] Loading environment variables ===")
 
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -23,5 +27,6 @@ if not OPENAI_API_KEY:
 if not NOTION_API_KEY:
     raise RuntimeError("NOTION_API_KEY missing")
 
-print("=== [ENV] Env OK ===")
-print("=== [ENV] POSTGRES_URL detected:", str(POSTGRES_URL)[:80], "...")
+if _VERBOSE:
+    print("=== [ENV] Env OK ===")
+    print("=== [ENV] POSTGRES_URL detected:", str(POSTGRES_URL)[:80], "...")
@@ -1,31 +1,15 @@
 # ovv_bot/database/migrate_wbs.py
+#   thread_wbs は database.migrations の step 0002_thread_wbs に移行。
+#   互換のため残す: 実行すると未適用の step をすべて適用する。
 
 from __future__ import annotations
 
-import os
-import psycopg2
+from database.migrations import migrate
 
-POSTGRES_URL = os.getenv("POSTGRES_URL")
-if not POSTGRES_URL:
-    raise RuntimeError("POSTGRES_URL is not set")
-
-SQL = """
-CREATE TABLE IF NOT EXISTS thread_wbs (
-    thread_id TEXT PRIMARY KEY,
-    wbs_json  TEXT NOT NULL,
-    updated_at TIMESTAMPTZ DEFAULT NOW()
-);
-"""
 
 def main():
-    conn = psycopg2.connect(POSTGRES_URL)
-    try:
-        with conn.cursor() as cur:
-            cur.execute(SQL)
-        conn.commit()
-        print("[migrate_wbs] thread_wbs table ensured")
-    finally:
-        conn.close()
+    res = migrate()
+    print(f"[migrate_wbs] schema {res['from']} -> {res['to']} (thread_wbs ensured)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,353 @@
+# database/migrations.py
+# ============================================================
+# MODULE CONTRACT: Persist / Schema Migrations v1.1
+#
+# ROLE:
+#   - スキーマ変更を番号付きの step として順に適用し、schema_migrations に記録する。
+#   - import 時 DDL（pg.migrate_persist_v3）と個別スクリプト（migrate_wbs.py 等）を置き換える。
+#
+# RESPONSIBILITY TAGS:
+#   [VERSION]  current_version() : schema_migrations の最大 version（表が無ければ 0）
+#   [APPLY]    migrate(target=None) : 未適用 step を 1 step = 1 transaction で適用
+#   [LOCK]     pg_advisory_lock で複数レプリカの同時適用を防ぐ（取得後に version を再確認）
+#   [FAST]     最新なら version 確認の 1 往復だけで終わる（起動時はこの経路）
+#   [CLI]      python -m database.migrations [status | up [--to N]]
+#
+# CONSTRAINTS:
+#   - step は追記のみ（既存 step の version / 内容を変えない）
+#   - step の SQL はこのファイルに書いた時点の文面で固定する（実行時モジュールの定数を参照しない。
+#     実行時モジュールは表を作らず、ここで作られている前提で使う）
+#   - 各 statement は冪等（IF NOT EXISTS 等）。import 時 DDL で作られた既存 DB にもそのまま適用できる
+#   - 専用接続を使う（advisory lock は session 単位のため、共有接続に残さない）
+#   - 破壊的なリセット（migrate_reset.py）は step に含めない
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import argparse
+import os
+import time
+
+
+PG_URL = os.getenv("POSTGRES_URL")
+
+# pg_advisory_lock のキー（ASCII "ovv_mig"）
+MIGRATION_LOCK_KEY = 0x6F76765F6D6967
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: Tuple[str, ...]
+
+
+CREATE_TABLE_SCHEMA_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    duration_ms DOUBLE PRECISION
+);
+"""
+
+# ------------------------------------------------------------
+# Step DDL（適用済みの step と同じ文面のまま変えないこと）
+# ------------------------------------------------------------
+
+# 0001_persist_v3
+CREATE_TABLE_TASK_SESSION = """
+CREATE TABLE IF NOT EXISTS task_session (
+    task_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    started_at TIMESTAMP,
+    ended_at TIMESTAMP,
+    duration_seconds INTEGER,
+    trace_id TEXT
+);
+"""
+
+CREATE_TABLE_TASK_LOG = """
+CREATE TABLE IF NOT EXISTS task_log (
+    id SERIAL PRIMARY KEY,
+    task_id TEXT,
+    event_type TEXT,
+    content TEXT,
+    created_at TIMESTAMP,
+    trace_id TEXT
+);
+"""
+
+ALTER_TASK_SESSION_ADD_TRACE_ID = """
+ALTER TABLE IF EXISTS task_session
+ADD COLUMN IF NOT EXISTS trace_id TEXT;
+"""
+
+ALTER_TASK_LOG_ADD_TRACE_ID = """
+ALTER TABLE IF EXISTS task_log
+ADD COLUMN IF NOT EXISTS trace_id TEXT;
+"""
+
+# 0002_thread_wbs
+CREATE_TABLE_THREAD_WBS = """
+CREATE TABLE IF NOT EXISTS thread_wbs (
+    thread_id TEXT PRIMARY KEY,
+    wbs_json  TEXT NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+"""
+
+# 0003_llm_response_cache
+CREATE_TABLE_LLM_RESPONSE_CACHE = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response_text TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_hit_at TIMESTAMPTZ,
+    hit_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+CREATE_INDEX_LLM_RESPONSE_CACHE_CREATED_AT = """
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_created_at
+    ON llm_response_cache (created_at);
+"""
+
+# 0004_trace_event（日次パーティションは trace_store の writer が作る）
+CREATE_TABLE_TRACE_EVENT = """
+CREATE TABLE IF NOT EXISTS trace_event (
+    trace_id TEXT NOT NULL,
+    ts TIMESTAMPTZ NOT NULL,
+    kind TEXT NOT NULL,
+    layer TEXT,
+    name TEXT NOT NULL,
+    level TEXT,
+    summary TEXT,
+    duration_ms DOUBLE PRECISION,
+    error JSONB
+) PARTITION BY RANGE (ts);
+"""
+
+# 親に作ればパーティションへ伝播する（PostgreSQL 11+）。
+# text_pattern_ops は完全一致と先頭一致（LIKE 'abc%'）の両方に効く
+CREATE_INDEX_TRACE_EVENT = """
+CREATE INDEX IF NOT EXISTS trace_event_trace_ts_idx ON trace_event (trace_id text_pattern_ops, ts);
+"""
+
+# 0005_thread_wbs_updated_at
+# 手作業で作られた古い thread_wbs には updated_at が無い場合がある（pg_wbs.save は v2.2 から更新する）
+ALTER_THREAD_WBS_ADD_UPDATED_AT = """
+ALTER TABLE thread_wbs
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+"""
+
+# on_ready の warm-up（最近更新された N スレッド）用
+CREATE_INDEX_THREAD_WBS_UPDATED_AT = """
+CREATE INDEX IF NOT EXISTS thread_wbs_updated_at_idx
+    ON thread_wbs (updated_at DESC NULLS LAST);
+"""
+
+# 0006_thread_wbs_event
+ALTER_THREAD_WBS_ADD_SEQ = """
+ALTER TABLE thread_wbs
+ADD COLUMN IF NOT EXISTS seq BIGINT NOT NULL DEFAULT 0;
+"""
+
+CREATE_TABLE_THREAD_WBS_EVENT = """
+CREATE TABLE IF NOT EXISTS thread_wbs_event (
+    thread_id TEXT NOT NULL,
+    seq BIGINT NOT NULL,
+    op TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    trace_id TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (thread_id, seq)
+);
+"""
+
+
+def _migrations() -> Tuple[Migration, ...]:
+    return (
+        Migration(1, "persist_v3", (
+            CREATE_TABLE_TASK_SESSION,
+            CREATE_TABLE_TASK_LOG,
+            ALTER_TASK_SESSION_ADD_TRACE_ID,
+            ALTER_TASK_LOG_ADD_TRACE_ID,
+        )),
+        Migration(2, "thread_wbs", (
+            CREATE_TABLE_THREAD_WBS,
+        )),
+        Migration(3, "llm_response_cache", (
+            CREATE_TABLE_LLM_RESPONSE_CACHE,
+            CREATE_INDEX_LLM_RESPONSE_CACHE_CREATED_AT,
+        )),
+        # 日次パーティションの作成 / DROP は trace_store の writer が行う（時刻依存のため step にしない）
+        Migration(4, "trace_event", (
+            CREATE_TABLE_TRACE_EVENT,
+            CREATE_INDEX_TRACE_EVENT,
+        )),
+        Migration(5, "thread_wbs_updated_at", (
+            ALTER_THREAD_WBS_ADD_UPDATED_AT,
+            CREATE_INDEX_THREAD_WBS_UPDATED_AT,
+        )),
+        # 既存の thread_wbs 行は seq 0 の snapshot としてそのまま読める
+        Migration(6, "thread_wbs_event", (
+            ALTER_THREAD_WBS_ADD_SEQ,
+            CREATE_TABLE_THREAD_WBS_EVENT,
+        )),
+    )
+
+
+def latest_version() -> int:
+    return max(m.version for m in _migrations())
+
+
+# ============================================================
+# Version / Apply
+# ============================================================
+
+def _connect() -> Any:
+    import psycopg2
+
+    if not PG_URL:
+        raise RuntimeError("POSTGRES_URL が設定されていません。")
+    conn = psycopg2.connect(PG_URL)
+    conn.autocommit = True
+    return conn
+
+
+def current_version(cur: Any) -> int:
+    """
+    適用済みの最大 version。schema_migrations が無ければ 0。
+    （autocommit 接続なので、表が無いエラーの後もそのまま使える）
+    """
+    import psycopg2
+
+    try:
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations;")
+    except psycopg2.errors.UndefinedTable:
+        return 0
+    return int(cur.fetchone()[0])
+
+
+def _apply(conn: Any, m: Migration) -> float:
+    t0 = time.perf_counter()
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            for sql in m.statements:
+                cur.execute(sql)
+            duration_ms = (time.perf_counter() - t0) * 1000.0
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s);",
+                (m.version, m.name, duration_ms),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+    return duration_ms
+
+
+def migrate(target: Optional[int] = None) -> Dict[str, Any]:
+    """
+    未適用の step を target（既定: 最新）まで適用する。
+    Returns: {"from": int, "to": int, "applied": [(version, name, ms), ...]}
+    """
+    steps = _migrations()
+    target = latest_version() if target is None else target
+    applied: List[Tuple[int, str, float]] = []
+
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            before = current_version(cur)
+            if before >= target:
+                return {"from": before, "to": before, "applied": applied}
+
+            cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_KEY,))
+            try:
+                cur.execute(CREATE_TABLE_SCHEMA_MIGRATIONS)
+                # 待っている間に他のレプリカが適用している可能性がある
+                before = current_version(cur)
+                for m in steps:
+                    if before < m.version <= target:
+                        applied.append((m.version, m.name, round(_apply(conn, m), 1)))
+                        print(f"[migrations] applied {m.version:04d}_{m.name}")
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_KEY,))
+            after = current_version(cur)
+    finally:
+        conn.close()
+    return {"from": before, "to": after, "applied": applied}
+
+
+def status() -> Dict[str, Any]:
+    """
+    適用済み / 未適用の step 一覧。
+    """
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            version = current_version(cur)
+            rows: Dict[int, Tuple[Any, Any]] = {}
+            if version:
+                cur.execute("SELECT version, applied_at, duration_ms FROM schema_migrations;")
+                rows = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+    finally:
+        conn.close()
+    return {
+        "version": version,
+        "latest": latest_version(),
+        "steps": [
+            {
+                "version": m.version,
+                "name": m.name,
+                "applied_at": rows[m.version][0].isoformat() if m.version in rows else None,
+                "duration_ms": rows[m.version][1] if m.version in rows else None,
+            }
+            for m in _migrations()
+        ],
+    }
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Ovv schema migrations")
+    sub = ap.add_subparsers(dest="cmd")
+    sub.add_parser("status", help="show applied / pending steps")
+    up = sub.add_parser("up", help="apply pending steps")
+    up.add_argument("--to", type=int, default=None, help="target version (default: latest)")
+    args = ap.parse_args()
+
+    if args.cmd == "up":
+        res = migrate(args.to)
+        print(f"[migrations] version {res['from']} -> {res['to']} ({len(res['applied'])} applied)")
+        return
+
+    st = status()
+    print(f"[migrations] version {st['version']} / latest {st['latest']}")
+    for s in st["steps"]:
+        state = f"applied {s['applied_at']}" if s["applied_at"] else "pending"
+        print(f"  {s['version']:04d}_{s['name']:<24} {state}")
+
+
+__all__ = [
+    "MIGRATION_LOCK_KEY",
+    "Migration",
+    "current_version",
+    "latest_version",
+    "migrate",
+    "status",
+]
+
+
+if __name__ == "__main__":
+    main()
+
@@ -7,16 +7,21 @@
 #   - task_log / task_session に trace_id カラムを追加（NULL許容 / 既存コード破壊なし）
 #   - insert_task_log に trace_id を任意引数として追加（既存呼び出しはそのまま動作）
 #   - init_db の再接続耐性（closed 判定）
+#   - metrics: 接続（回数・所要時間）/ クエリ（種別ごとの所要時間・エラー）
+#   - import 時の自動マイグレーションを廃止（database.migrations に移行。DDL 定数はここに残す）
 # ============================================================
 
 from __future__ import annotations
 
 import os
+import time
 import psycopg2
 import psycopg2.extras
 from datetime import datetime
 from typing import Any, Optional
 
+from ovv.observability import metrics
+
 
 # ============================================================
 # DB接続
@@ -28,6 +33,24 @@ _conn = None  # internal
 conn = None   # public alias (debug/debug_commands.py compatibility)
 
 
+# ============================================================
+# Metrics（接続は 1 本共有のため pool 待ちは無く、接続確立の時間を測る）
+# ============================================================
+
+_M_CONNECTS = metrics.counter("ovv_db_connects_total", "PostgreSQL connection attempts", ("result",))
+_M_CONNECT_SECONDS = metrics.histogram("ovv_db_connect_duration_seconds", "PostgreSQL connect latency")
+_M_QUERY_SECONDS = metrics.histogram("ovv_db_query_duration_seconds", "PostgreSQL query latency", ("op",))
+_M_QUERY_ERRORS = metrics.counter("ovv_db_query_errors_total", "PostgreSQL query errors", ("op",))
+
+_SQL_OPS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "WITH", "DROP"))
+
+
+def _sql_op(sql: str) -> str:
+    head = sql.lstrip()[:8].split(None, 1)
+    op = head[0].upper() if head else ""
+    return op if op in _SQL_OPS else "OTHER"
+
+
 def init_db():
     """
     Persist v3.0 の唯一の接続獲得口。
@@ -50,7 +73,14 @@ def init_db():
     if not PG_URL:
         raise RuntimeError("POSTGRES_URL が設定されていません。")
 
-    _conn = psycopg2.connect(PG_URL)
+    t0 = time.perf_counter()
+    try:
+        _conn = psycopg2.connect(PG_URL)
+    except Exception:
+        _M_CONNECTS.labels("error").inc()
+        raise
+    _M_CONNECT_SECONDS.observe(time.perf_counter() - t0)
+    _M_CONNECTS.labels("ok").inc()
     _conn.autocommit = True
     conn = _conn
     return _conn
@@ -63,12 +93,20 @@ def _execute(sql: str, params: Any = None):
     - 接続は init_db() に追従
     """
     c = init_db()
-    with c.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-        cur.execute(sql, params)
-        try:
-            return cur.fetchall()
-        except psycopg2.ProgrammingError:
-            return None
+    op = _sql_op(sql)
+    t0 = time.perf_counter()
+    try:
+        with c.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute(sql, params)
+            try:
+                return cur.fetchall()
+            except psycopg2.ProgrammingError:
+                return None
+    except Exception:
+        _M_QUERY_ERRORS.labels(op).inc()
+        raise
+    finally:
+        _M_QUERY_SECONDS.labels(op).observe(time.perf_counter() - t0)
 
 
 # ============================================================
@@ -112,7 +150,8 @@ ADD COLUMN IF NOT EXISTS trace_id TEXT;
 
 def migrate_persist_v3() -> None:
     """
-    Persist v3.0 の最小マイグレーション。
+    Persist v3.0 の最小マイグレーション（互換のため残す）。
+    起動時の適用は database.migrations（step 0001_persist_v3）が行う。
     - CREATE TABLE（未作成なら作成）
     - 既存表には trace_id カラムを追加（IF NOT EXISTS）
     """
@@ -211,13 +250,3 @@ def insert_task_session_end_and_duration(task_id: str, ended_at: datetime, trace
     _execute(sql_update, (ended_at, duration_seconds, trace_id, task_id))
 
     return duration_seconds
-
-
-# ============================================================
-# 自動マイグレーション
-# ============================================================
-
-try:
-    migrate_persist_v3()
-except Exception as e:
-    print("[Persist] Migration failed:", e)
\ No newline at end of file
@@ -1,88 +1,302 @@
 # database/pg_wbs.py
 # ============================================================
-# MODULE CONTRACT: Persist / ThreadWBS Persistence v2.1
+# MODULE CONTRACT: Persist / ThreadWBS Persistence v3.1 (Event Log + Snapshot)
 #
 # ROLE:
-#   - thread_id ↔ ThreadWBS(JSON) の永続化
+#   - thread_id ↔ ThreadWBS の永続化
+#   - v3.0: WBS 全体の上書きをやめ、操作イベントの追記（thread_wbs_event）にする。
+#           thread_wbs は「seq 時点の snapshot」として WBS_SNAPSHOT_EVERY 件ごとに更新する。
 #
 # RESPONSIBILITY TAGS:
-#   [PERSIST]   WBS JSON の保存/取得
+#   [LOAD]      snapshot + それより後のイベントを 1 query で読み、replay して現在の WBS を返す
+#   [APPEND]    append_thread_wbs_event : seq = 読んだ seq + 1 で追記（PK 衝突 = 他の書き手が先行）
+#   [SNAPSHOT]  snapshot から WBS_SNAPSHOT_EVERY 件進んだら thread_wbs を更新（seq は単調増加のみ）
+#   [HISTORY]   load_thread_wbs_history : 直近の操作（op / trace_id / 時刻）
+#   [CACHE]     thread_id → (JSON text, seq, snapshot seq) の LRU（追記で更新 / 衝突・wipe で破棄）
+#               v3.1: OVV_WBS_CACHE_FORMAT=binary なら JSON text の代わりに wbs_model のバイナリを持つ
+#               （1 件あたりのメモリ約 1/3。その代わり load ごとの復元は json.loads より遅い）
+#   [PREFETCH]  prefetch_recent_thread_wbs(limit) : updated_at 降順の N 件を 1 query でキャッシュへ
 #   [GUARD]     JSON 正規化と例外ガード
 #
 # CONSTRAINTS:
-#   - 構造解釈・推論は行わない
+#   - 構造解釈・推論は行わない（イベントの畳み込みは ovv.bis.wbs.thread_wbs_events.replay に委譲）
 #   - DB スキーマ差異を吸収し、Core を失敗させない
+#   - キャッシュは dict ではなく JSON text / バイナリを持つ（呼び出し側が load 結果を直接書き換えるため、
+#     load ごとに新しい dict を返す）
+#   - thread_wbs / thread_wbs_event への書き込みはこのモジュール経由のみを前提とする
+#     （他プロセスの追記は、こちらの追記が seq 衝突した時点か TTL で追従）
+#   - イベントは削除しない（wipe を除く）。履歴 = 監査ログ
 # ============================================================
 
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import json
+import os
 
 from database.pg import _execute
+from ovv.bis.utils.lru import BoundedLRU
+from ovv.bis.wbs.thread_wbs_events import replay
+from ovv.bis.wbs.wbs_model import wbs_from_bytes, wbs_to_bytes
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+WBS_CACHE_MAX_ITEMS = int(os.getenv("OVV_WBS_CACHE_MAX_ITEMS", "512"))
+WBS_CACHE_TTL_SEC = float(os.getenv("OVV_WBS_CACHE_TTL_SEC", "600"))
+WBS_SNAPSHOT_EVERY = max(1, int(os.getenv("OVV_WBS_SNAPSHOT_EVERY", "20")))
+# "json"（既定）| "binary"
+WBS_CACHE_FORMAT = os.getenv("OVV_WBS_CACHE_FORMAT", "json")
+
+# (JSON text | bytes, seq, snapshot seq)
+_cache = BoundedLRU(WBS_CACHE_MAX_ITEMS, ttl_sec=WBS_CACHE_TTL_SEC)
+
+
+def _decode(thread_id: str, raw: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        print("[Persist][thread_wbs] JSON decode failed:", thread_id)
+        return None
+
+
+def _pack(wbs: Dict[str, Any], wbs_json: Optional[str] = None) -> Any:
+    # キャッシュに置く形（WBS_CACHE_FORMAT）。wbs_json があれば json 形式ではそれを使う
+    if WBS_CACHE_FORMAT == "binary":
+        return wbs_to_bytes(wbs)
+    return wbs_json if wbs_json is not None else json.dumps(wbs, ensure_ascii=False)
+
+
+def _unpack(thread_id: str, cached: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(cached, bytes):
+        return wbs_from_bytes(cached)
+    return _decode(thread_id, cached)
+
+
+def _fold(thread_id: str, rows: List[Dict[str, Any]]) -> Optional[Tuple[Any, int, int]]:
+    """
+    1 スレッド分の行（snapshot 列 + LEFT JOIN したイベント列、seq 昇順）を畳み込む。
+    Returns: (キャッシュ形式の WBS, seq, snapshot seq)。WBS が無ければ None。
+    """
+    snap_raw = rows[0].get("wbs_json")
+    snap_seq = int(rows[0].get("snap_seq") or 0)
+    wbs = _decode(thread_id, snap_raw) if snap_raw else None
+
+    tail = [r for r in rows if r.get("seq") is not None]
+    if not tail:
+        return (_pack(wbs, snap_raw), snap_seq, snap_seq) if isinstance(wbs, dict) else None
+
+    try:
+        events = [(r["op"], json.loads(r["payload"]), r.get("trace_id")) for r in tail]
+    except (json.JSONDecodeError, TypeError):
+        print("[Persist][thread_wbs] event decode failed:", thread_id)
+        return None
+    wbs = replay(wbs, events)
+    if not isinstance(wbs, dict):
+        return None
+    return _pack(wbs), int(tail[-1]["seq"]), snap_seq
 
 
 # ============================================================
 # Public API (Core 契約準拠)
 # ============================================================
 
+_LOAD_SQL = """
+    SELECT s.wbs_json, s.seq AS snap_seq, e.seq, e.op, e.payload, e.trace_id
+    FROM thread_wbs s
+    LEFT JOIN thread_wbs_event e
+        ON e.thread_id = s.thread_id AND e.seq > s.seq
+    WHERE s.thread_id = %s
+    ORDER BY e.seq
+"""
+
+
+def _load_entry(thread_id: str) -> Optional[Tuple[Any, int, int]]:
+    entry = _cache.get(thread_id)
+    if entry is not None:
+        return entry
+
+    rows = _execute(_LOAD_SQL, (thread_id,))
+    if not rows:
+        return None
+    entry = _fold(thread_id, rows)
+    if entry is not None:
+        _cache.put(thread_id, entry)
+    return entry
+
+
+def load_thread_wbs_versioned(thread_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    (WBS, seq) を返す。seq は最後に適用されたイベント番号（WBS が無ければ (None, 0)）。
+    """
+    if not thread_id:
+        return None, 0
+    entry = _load_entry(thread_id)
+    if entry is None:
+        return None, 0
+    return _unpack(thread_id, entry[0]), entry[1]
+
+
 def load_thread_wbs(thread_id: str) -> Optional[Dict[str, Any]]:
     """
-    thread_id に紐づく WBS(JSON) を取得する。
+    thread_id に紐づく現在の WBS を取得する。
+    """
+    return load_thread_wbs_versioned(thread_id)[0]
+
+
+def append_thread_wbs_event(
+    thread_id: str,
+    base_seq: int,
+    op: str,
+    payload: Dict[str, Any],
+    trace_id: Optional[str],
+    wbs_after: Optional[Dict[str, Any]],
+) -> bool:
+    """
+    seq = base_seq + 1 でイベントを追記する。
+    既に同じ seq がある（他の書き手が先に追記した）なら False（呼び出し側が読み直して再適用）。
+    wbs_after は追記後の WBS（キャッシュと snapshot に使う）。
     """
     if not thread_id:
-        return None
+        return False
 
+    if base_seq == 0:
+        # 初回: snapshot 行（空）を用意する。旧形式の行があればそのまま seq 0 の snapshot として使う
+        _execute(
+            """
+            INSERT INTO thread_wbs (thread_id, wbs_json, seq, updated_at)
+            VALUES (%s, 'null', 0, NOW())
+            ON CONFLICT (thread_id) DO NOTHING
+            """,
+            (thread_id,),
+        )
+
+    seq = base_seq + 1
     sql = """
-        SELECT wbs_json
-        FROM thread_wbs
-        WHERE thread_id = %s
-        LIMIT 1
+        WITH ev AS (
+            INSERT INTO thread_wbs_event (thread_id, seq, op, payload, trace_id)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (thread_id, seq) DO NOTHING
+            RETURNING thread_id
+        )
+        UPDATE thread_wbs SET updated_at = NOW()
+        FROM ev
+        WHERE thread_wbs.thread_id = ev.thread_id
+        RETURNING thread_wbs.seq AS snap_seq
     """
-
-    rows = _execute(sql, (thread_id,))
+    try:
+        rows = _execute(sql, (thread_id, seq, op, json.dumps(payload, ensure_ascii=False), trace_id))
+    except Exception:
+        _cache.pop(thread_id)
+        raise
     if not rows:
-        return None
+        _cache.pop(thread_id)
+        return False
 
-    raw = rows[0].get("wbs_json")
-    if not raw:
-        return None
+    if not isinstance(wbs_after, dict):
+        _cache.pop(thread_id)
+        return True
 
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        print("[Persist][thread_wbs] JSON decode failed:", thread_id)
-        return None
+    wbs_json = None
+    snap_seq = int(rows[0].get("snap_seq") or 0)
+    if seq - snap_seq >= WBS_SNAPSHOT_EVERY:
+        wbs_json = json.dumps(wbs_after, ensure_ascii=False)
+        try:
+            _execute(
+                "UPDATE thread_wbs SET wbs_json = %s, seq = %s WHERE thread_id = %s AND seq < %s",
+                (wbs_json, seq, thread_id, seq),
+            )
+            snap_seq = seq
+        except Exception as e:
+            # snapshot はあくまで読み出しの短縮。失敗してもイベントは確定している
+            print("[Persist][thread_wbs] snapshot failed (ignored):", repr(e))
+    _cache.put(thread_id, (_pack(wbs_after, wbs_json), seq, snap_seq))
+    return True
 
 
 def save_thread_wbs(thread_id: str, wbs: Dict[str, Any]) -> None:
     """
-    WBS(JSON) を UPSERT で保存する。
-    created_at / updated_at は **存在しない DB でも動作する**
+    WBS 全体を保存する（v2 互換）。中身は "replace" イベントとして追記する。
     """
     if not thread_id or not isinstance(wbs, dict):
         return
+    from ovv.bis.wbs.thread_wbs_events import apply_op
 
-    wbs_json = json.dumps(wbs, ensure_ascii=False)
+    apply_op(thread_id, "replace", state=wbs)
 
-    # 最小構成での UPSERT（既存 DB と完全互換）
-    sql = """
-        INSERT INTO thread_wbs (thread_id, wbs_json)
-        VALUES (%s, %s)
-        ON CONFLICT (thread_id)
-        DO UPDATE SET
-            wbs_json = EXCLUDED.wbs_json
+
+def wipe_thread_wbs(thread_id: str) -> None:
     """
+    thread_id に紐づく WBS（snapshot + イベント）を削除する（debug / reset 用）。
+    """
+    if not thread_id:
+        return
 
-    _execute(sql, (thread_id, wbs_json))
+    _cache.pop(thread_id)
+    _execute("DELETE FROM thread_wbs_event WHERE thread_id = %s", (thread_id,))
+    _execute("DELETE FROM thread_wbs WHERE thread_id = %s", (thread_id,))
 
 
-def wipe_thread_wbs(thread_id: str) -> None:
+def load_thread_wbs_history(thread_id: str, limit: int = 20) -> List[Dict[str, Any]]:
     """
-    thread_id に紐づく WBS を削除する（debug / reset 用）。
+    直近 limit 件のイベント（新しい順）。payload 本体は返さず、サイズだけ返す。
     """
     if not thread_id:
-        return
+        return []
+    sql = """
+        SELECT seq, op, trace_id, created_at, LENGTH(payload) AS payload_bytes
+        FROM thread_wbs_event
+        WHERE thread_id = %s
+        ORDER BY seq DESC
+        LIMIT %s
+    """
+    return list(_execute(sql, (thread_id, limit)) or [])
+
+
+# ============================================================
+# Warm-up / Observe
+# ============================================================
+
+def prefetch_recent_thread_wbs(limit: int) -> List[str]:
+    """
+    updated_at の新しい順に最大 limit 件の WBS を 1 query で読み（snapshot + 後続イベント）、
+    キャッシュへ入れる。
+    Returns: キャッシュできた thread_id（新しい順）
+    """
+    if limit <= 0:
+        return []
+
+    sql = """
+        WITH recent AS (
+            SELECT thread_id, wbs_json, seq, updated_at
+            FROM thread_wbs
+            ORDER BY updated_at DESC NULLS LAST
+            LIMIT %s
+        )
+        SELECT r.thread_id, r.wbs_json, r.seq AS snap_seq, e.seq, e.op, e.payload, e.trace_id
+        FROM recent r
+        LEFT JOIN thread_wbs_event e
+            ON e.thread_id = r.thread_id AND e.seq > r.seq
+        ORDER BY r.updated_at DESC NULLS LAST, r.thread_id, e.seq
+    """
+
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for row in _execute(sql, (limit,)) or []:
+        thread_id = row.get("thread_id")
+        if thread_id:
+            grouped.setdefault(thread_id, []).append(row)
+
+    thread_ids: List[str] = []
+    for thread_id, rows in grouped.items():
+        entry = _fold(thread_id, rows)
+        if entry is None:
+            continue
+        _cache.put(thread_id, entry)
+        thread_ids.append(thread_id)
+    return thread_ids
+
 
-    sql = "DELETE FROM thread_wbs WHERE thread_id = %s"
-    _execute(sql, (thread_id,))
\ No newline at end of file
+def wbs_cache_stats() -> Dict[str, Any]:
+    return {**_cache.stats(), "format": WBS_CACHE_FORMAT}
@@ -1,6 +1,6 @@
 # ovv/bis/boundary_gate.py
 # ============================================================
-# MODULE CONTRACT: BIS / Boundary_Gate v3.8.2
+# MODULE CONTRACT: BIS / Boundary_Gate v3.8.3
 #   (Debugging Subsystem v1.0 compliant: trace_id + checkpoints + failsafe)
 #
 # ROLE:
@@ -29,26 +29,33 @@
 #       - "!" から始まる未知コマンドは "unknown_command" として Core に委譲
 #   - v3.8.2:
 #       - "!wbs+" を "wbs_show_full" にマップ（Stableを壊さず Volatile overview 表示の入口）
+#   - v3.8.3:
+#       - DEBUG_BIS は OVV_DEBUG_BIS で切替（スタックトレース出力のみ）
+#       - InputPacket の repr 出力は checkpoint_log の BG レベル / trace sampling に従う
+#       - bg.total / bg.discord_send の span を stage_metrics に記録（trace_id / command_type 付き）
 # ============================================================
 
 from __future__ import annotations
 
 from typing import Optional, Tuple, Any, Dict
+import os
+import time
 import traceback
-import json
 import uuid
-from datetime import datetime, timezone
 
 from .types import InputPacket
 from .interface_box import handle_request
 from .capture_interface_packet import capture  # dbg_packet 用
+from ovv.observability.checkpoint_log import log_enabled, log_event
+from ovv.observability.stage_metrics import record_stage, set_span_context, stage_timer
 
 
 # ------------------------------------------------------------
 # Debug Flag
 # ------------------------------------------------------------
 
-DEBUG_BIS = True  # Render ログに内部スタックトレースを出す（構造ログは常に出す）
+# Render ログに内部スタックトレースを出す（構造ログは常に出す）
+DEBUG_BIS = os.getenv("OVV_DEBUG_BIS", "1") != "0"
 
 
 # ------------------------------------------------------------
@@ -61,6 +68,15 @@ _DEBUG_COMMAND_HEADS = {
     "dbg_packet", "!dbg_packet",
     "dbg_mem", "!dbg_mem",
     "dbg_all", "!dbg_all",
+    "dbg_llm", "!dbg_llm",
+    "dbg_rules", "!dbg_rules",
+    "dbg_log", "!dbg_log",
+    "dbg_perf", "!dbg_perf",
+    "dbg_trace", "!dbg_trace",
+    "dbg_loop", "!dbg_loop",
+    "dbg_prof", "!dbg_prof",
+    "dbg_boot", "!dbg_boot",
+    "dbg_wbs_log", "!dbg_wbs_log",
     "wipe", "!wipe",
     "help", "!help",
     "dbg_help", "!dbg_help",
@@ -79,15 +95,15 @@ CP_BG_BUILD_PACKET = "BG_BUILD_PACKET"
 CP_BG_DISPATCH_CORE = "BG_DISPATCH_CORE"
 CP_BG_FAILSAFE = "BG_FAILSAFE"
 
+# stage（span 計測。!dbg_perf で分布を見る）
+STAGE_BG_TOTAL = "bg.total"
+STAGE_BG_DISCORD_SEND = "bg.discord_send"
+
 
 # ------------------------------------------------------------
 # Logging (Structured JSON)
 # ------------------------------------------------------------
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _log_event(
     *,
     trace_id: str,
@@ -97,17 +113,14 @@ def _log_event(
     summary: str,
     error: Optional[Dict[str, Any]] = None,
 ) -> None:
-    payload: Dict[str, Any] = {
-        "trace_id": trace_id,
-        "checkpoint": checkpoint,
-        "layer": layer,
-        "level": level,
-        "summary": summary,
-        "timestamp": _now_iso(),
-    }
-    if error is not None:
-        payload["error"] = error
-    print(json.dumps(payload, ensure_ascii=False))
+    log_event(
+        trace_id=trace_id,
+        checkpoint=checkpoint,
+        layer=layer,
+        level=level,
+        summary=summary,
+        error=error,
+    )
 
 
 def _log_debug(*, trace_id: str, checkpoint: str, summary: str) -> None:
@@ -307,6 +320,7 @@ async def handle_discord_input(message: Any) -> None:
     """
 
     trace_id = str(uuid.uuid4())
+    t_entry = time.perf_counter()
     last_checkpoint = CP_BG_ENTRY
     _log_debug(trace_id=trace_id, checkpoint=CP_BG_ENTRY, summary="bg entry")
 
@@ -348,6 +362,9 @@ async def handle_discord_input(message: Any) -> None:
 
         author_id, user_name = _extract_author_meta(message)
 
+        # 以降この task 内で記録される stage を trace_id / command_type に紐付ける
+        set_span_context(trace_id, command_type)
+
         # Discord Thread = task_id = context_key（現行方針）
         context_key = channel_id
         task_id = context_key
@@ -387,19 +404,20 @@ async def handle_discord_input(message: Any) -> None:
         try:
             capture(packet)
         except Exception as e:
+            _log_error(
+                trace_id=trace_id,
+                checkpoint=CP_BG_BUILD_PACKET,
+                summary="capture failed (non-fatal)",
+                code="E_BG_CAPTURE",
+                exc=e,
+                at="BG_BUILD_PACKET",
+                retryable=False,
+            )
             if DEBUG_BIS:
-                _log_error(
-                    trace_id=trace_id,
-                    checkpoint=CP_BG_BUILD_PACKET,
-                    summary="capture failed (non-fatal)",
-                    code="E_BG_CAPTURE",
-                    exc=e,
-                    at="BG_BUILD_PACKET",
-                    retryable=False,
-                )
                 traceback.print_exc()
 
-        if DEBUG_BIS:
+        # InputPacket 全体の repr は重いので BG の DEBUG かつ sampling 対象の trace のみ
+        if log_enabled(LAYER_BG, "DEBUG", trace_id):
             print("[Boundary_Gate] Captured InputPacket:", packet)
 
         # ---- Dispatch to BIS pipeline ----
@@ -437,7 +455,8 @@ async def handle_discord_input(message: Any) -> None:
         # ---- Discord reply ----
         if final_message and channel is not None:
             try:
-                await channel.send(final_message)
+                with stage_timer(STAGE_BG_DISCORD_SEND):
+                    await channel.send(final_message)
             except Exception as e:
                 _log_error(
                     trace_id=trace_id,
@@ -451,6 +470,8 @@ async def handle_discord_input(message: Any) -> None:
                 if DEBUG_BIS:
                     traceback.print_exc()
 
+        record_stage(STAGE_BG_TOTAL, (time.perf_counter() - t_entry) * 1000.0)
+
     except Exception as e:
         last_checkpoint = CP_BG_FAILSAFE
         _log_error(
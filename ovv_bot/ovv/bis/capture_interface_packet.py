@@ -1,13 +1,15 @@
 # ovv/bis/capture_interface_packet.py
 # ============================================================
-# MODULE CONTRACT: BIS / PacketCapture v1.5 (Defensive + Trace-Aware)
+# MODULE CONTRACT: BIS / PacketCapture v2.0 (Flight Recorder backed)
 #
 # ROLE:
 #   - BIS パイプライン入口（Boundary_Gate → Interface_Box）で受け取る
-#     InputPacket を "開発者向け診断用途" として 1 件だけ保持する。
+#     InputPacket を "開発者向け診断用途" として trace 単位で保持する。
+#   - 保持そのものは observability.flight_recorder（直近 N trace のリング）に委譲し、
+#     ここは dbg_packet 互換の読み取り API を提供する。
 #
 # RESPONSIBILITY TAGS:
-#   [CAPTURE]  パケットのスナップショットを安全に保持
+#   [CAPTURE]  packet を trace_id に紐付けて参照保持（コピーしない）
 #   [READ]     dbg_packet / debug_commands からの読み取り専用 API
 #   [DEFENSE]  InputPacket 仕様変更に対して壊れない防御的構造
 #   [TRACE]    trace_id を確実に観測可能な形で保持
@@ -15,9 +17,14 @@
 # GUARANTEES:
 #   - Capture は BIS パイプラインに影響しない（例外非送出）
 #   - InputPacket の内部構造変更に対して壊れない
-#   - JSON-safe 変換により Discord 表示で破綻しない
+#   - JSON-safe 変換は読み出し時のみ（メッセージごとの deep copy をしない）
 #   - 最大 1900 文字の安全トリミング
 #
+# CHANGELOG:
+#   - v2.0:
+#       - 単一の _last_packet（毎回 deep copy）→ flight_recorder のリング（参照保持・遅延変換）
+#       - get_interface_packet(trace_id) を追加
+#
 # NON-GOALS:
 #   - Pipeline 制御（Interface_Box / Core / Stabilizer）への干渉
 #   - Persist / Notion への書き込み
@@ -29,6 +36,8 @@ from __future__ import annotations
 from typing import Optional, Any, Dict
 import json
 
+from ovv.observability import flight_recorder
+
 
 # ------------------------------------------------------------
 # Constants
@@ -38,45 +47,12 @@ _MAX_DEBUG_LEN = 1900
 
 
 # ------------------------------------------------------------
-# Internal State
-# ------------------------------------------------------------
-
-_last_packet: Optional[Dict[str, Any]] = None
-
-
-# ------------------------------------------------------------
-# Utilities: JSON-safe conversion  [DEFENSE]
+# Utilities  [DEFENSE]
 # ------------------------------------------------------------
 
-def _json_safe(value: Any) -> Any:
+def _extract_trace_id(packet: Any) -> Optional[str]:
     """
-    InputPacket の構造が将来変化しても壊れないよう、
-    JSON シリアライズ可能な形に安全変換する。
-
-    - dict → 再帰処理
-    - list/tuple → 再帰処理
-    - 基本型 → そのまま
-    - dataclass / object → __dict__ 展開
-    - 未知オブジェクト → repr() 文字列に落とす
-    """
-    if isinstance(value, dict):
-        return {k: _json_safe(v) for k, v in value.items()}
-
-    if isinstance(value, (list, tuple)):
-        return [_json_safe(v) for v in value]
-
-    if isinstance(value, (str, int, float, bool)) or value is None:
-        return value
-
-    if hasattr(value, "__dict__"):
-        return _json_safe(value.__dict__)
-
-    return f"<unserializable {type(value).__name__}: {repr(value)}>"
-
-
-def _extract_trace_id(packet: Any, safe_packet: Dict[str, Any]) -> None:
-    """
-    trace_id を可能な限り正規化して top-level に昇格させる。
+    trace_id を可能な限り正規化して取り出す。
 
     優先順位:
       1. packet.trace_id
@@ -85,17 +61,25 @@ def _extract_trace_id(packet: Any, safe_packet: Dict[str, Any]) -> None:
     try:
         tid = getattr(packet, "trace_id", None)
         if isinstance(tid, str) and tid:
-            safe_packet["trace_id"] = tid
-            return
+            return tid
 
         meta = getattr(packet, "meta", None)
         if isinstance(meta, dict):
             mt = meta.get("trace_id")
             if isinstance(mt, str) and mt:
-                safe_packet["trace_id"] = mt
-                return
+                return mt
     except Exception:
         pass
+    return None
+
+
+def _packet_dict(rec: flight_recorder.TraceRecord) -> Dict[str, Any]:
+    safe = flight_recorder.to_dict(rec)["packet"]
+    if not isinstance(safe, dict):
+        safe = {"packet": safe}
+    safe["trace_id"] = rec.trace_id
+    safe["_captured_from"] = "Boundary_Gate"
+    return safe
 
 
 # ------------------------------------------------------------
@@ -104,29 +88,16 @@ def _extract_trace_id(packet: Any, safe_packet: Dict[str, Any]) -> None:
 
 def capture(packet: Any) -> None:
     """
-    Boundary_Gate から呼ばれ、直近の InputPacket を保持する。
+    Boundary_Gate から呼ばれ、InputPacket を trace_id に紐付けて保持する。
 
     注意:
     - 例外をパイプラインへ伝播しない
     - Debug Layer は観測専用（挙動を変えない）
     """
-    global _last_packet
-
     try:
-        safe_packet = _json_safe(packet)
-
-        # trace_id を正規化して保持
-        if isinstance(safe_packet, dict):
-            _extract_trace_id(packet, safe_packet)
-            safe_packet["_captured_from"] = "Boundary_Gate"
-
-        _last_packet = safe_packet
-
+        flight_recorder.attach_packet(_extract_trace_id(packet), packet)
     except Exception as e:
-        _last_packet = {
-            "error": "capture_failed",
-            "reason": repr(e),
-        }
+        print(f"[PacketCapture] capture failed (ignored): {e!r}")
 
 
 # ------------------------------------------------------------
@@ -135,9 +106,20 @@ def capture(packet: Any) -> None:
 
 def get_last_interface_packet() -> Optional[Dict[str, Any]]:
     """
-    Debug Layer（dbg_packet 等）が使用する読み取り API。
+    Debug Layer（dbg_packet 等）が使用する読み取り API（最新の packet）。
+    """
+    rec = flight_recorder.last_packet_record()
+    return _packet_dict(rec) if rec is not None else None
+
+
+def get_interface_packet(trace_id: str) -> Optional[Dict[str, Any]]:
+    """
+    trace_id（先頭一致可）の packet。リングから外れていれば None。
     """
-    return _last_packet
+    rec = flight_recorder.get_trace(trace_id)
+    if rec is None or rec.packet is None:
+        return None
+    return _packet_dict(rec)
 
 
 # ------------------------------------------------------------
@@ -153,11 +135,12 @@ def debug_dump() -> str:
     str
         Discord 制限を考慮し、最大 ~1900 文字で安全トリミング。
     """
-    if _last_packet is None:
+    packet = get_last_interface_packet()
+    if packet is None:
         return "(No packet captured)"
 
     try:
-        text = json.dumps(_last_packet, indent=2, ensure_ascii=False)
+        text = json.dumps(packet, indent=2, ensure_ascii=False)
         return text[:_MAX_DEBUG_LEN]
     except Exception as e:
-        return f"(packet dump failed: {repr(e)})"
\ No newline at end of file
+        return f"(packet dump failed: {repr(e)})"
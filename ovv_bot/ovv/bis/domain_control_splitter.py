@@ -26,6 +26,8 @@
 
 from typing import Dict, Any, Tuple, Optional
 
+from ovv.bis.utils.control_patterns import CONTROL_MATCHER
+
 
 CONTROL_KEYS = {
     "format",            # 例: "json", "markdown 禁止"
@@ -71,8 +73,7 @@ def split_thread_brain(tb: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str,
 
         # 値が LLM向け指示語を含む場合も control 側へ送る
         if isinstance(value, str):
-            v = value.lower()
-            if any(x in v for x in ["jsonで返", "markdown", "禁止", "フォーマット"]):
+            if "split.control" in CONTROL_MATCHER.categories(value):
                 control[key] = value
                 continue
 
@@ -8,7 +8,7 @@
 #
 # RESPONSIBILITY TAGS:
 #   [INTERFACE]   InputPacket 最小ガード
-#   [DELEGATE]    Core.handle_packet への完全委譲
+#   [DELEGATE]    Core.handle_packet_async への完全委譲
 #   [BRIDGE]      CoreResult → Stabilizer 変換（無加工）
 #   [DEBUG]       Debugging Subsystem v1.0（観測のみ）
 #   [NO_SILENT]   例外は必ずログ化し、Boundary_Gate FAILSAFE へ集約
@@ -22,13 +22,14 @@
 from __future__ import annotations
 
 from typing import Any, Dict
-import json
 import traceback
-from datetime import datetime, timezone
 
 from ovv.bis.types import InputPacket
-from ovv.core.ovv_core import handle_packet, CoreResult
+from ovv.core.ovv_core import handle_packet_async, CoreResult
 from ovv.bis.stabilizer import Stabilizer
+from ovv.observability import flight_recorder
+from ovv.observability.checkpoint_log import log_event
+from ovv.observability.stage_metrics import stage_timer
 
 
 # ============================================================
@@ -43,15 +44,15 @@ CP_IF_CORE_OK = "IF_CORE_OK"
 CP_IF_STABILIZE = "IF_STABILIZE"
 CP_IF_EXCEPTION = "IF_EXCEPTION"
 
+# stage（span 計測）
+STAGE_IF_CORE = "if.core"
+STAGE_IF_STABILIZE = "if.stabilize"
+
 
 # ============================================================
 # Structured logging (observation only)
 # ============================================================
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _trace_id_from_packet(packet: Any) -> str:
     tid = getattr(packet, "trace_id", None)
     if isinstance(tid, str) and tid:
@@ -72,17 +73,14 @@ def _log_event(
     summary: str,
     error: Dict[str, Any] | None = None,
 ) -> None:
-    payload: Dict[str, Any] = {
-        "trace_id": trace_id,
-        "checkpoint": checkpoint,
-        "layer": LAYER_IF,
-        "level": level,
-        "summary": summary,
-        "timestamp": _now_iso(),
-    }
-    if error is not None:
-        payload["error"] = error
-    print(json.dumps(payload, ensure_ascii=False))
+    log_event(
+        trace_id=trace_id,
+        checkpoint=checkpoint,
+        layer=LAYER_IF,
+        level=level,
+        summary=summary,
+        error=error,
+    )
 
 
 def _log_debug(*, trace_id: str, checkpoint: str, summary: str) -> None:
@@ -132,6 +130,20 @@ def _safe_user_id(packet: InputPacket) -> str:
     return ""
 
 
+def _result_summary(core_result: CoreResult) -> Dict[str, Any]:
+    """
+    flight_recorder 用の CoreResult 要約（本文・WBS 本体は持たない）。
+    """
+    co = core_result.core_output if isinstance(core_result.core_output, dict) else {}
+    ops = core_result.notion_ops if isinstance(core_result.notion_ops, list) else []
+    return {
+        "mode": co.get("mode"),
+        "discord_output_chars": len(core_result.discord_output or ""),
+        "notion_ops": [op.get("op") for op in ops if isinstance(op, dict)],
+        "has_wbs": isinstance(core_result.wbs, dict),
+    }
+
+
 def _build_thread_state(core_result: CoreResult) -> Dict[str, Any]:
     """
     Stabilizer が参照する thread_state を **包装のみ**で構築する。
@@ -166,7 +178,7 @@ async def handle_request(packet: InputPacket) -> str:
 
     Flow:
       1) guard
-      2) Core.handle_packet(packet)
+      2) Core.handle_packet_async(packet)
       3) Stabilizer.finalize()
       4) Discord 返却文(str)
     """
@@ -189,10 +201,12 @@ async def handle_request(packet: InputPacket) -> str:
         return "Invalid input packet."
 
     # --- Core ---
-    _log_debug(trace_id=trace_id, checkpoint=CP_IF_DISPATCH_CORE, summary="dispatch core.handle_packet")
+    _log_debug(trace_id=trace_id, checkpoint=CP_IF_DISPATCH_CORE, summary="dispatch core.handle_packet_async")
     try:
-        core_result: CoreResult = handle_packet(packet)
+        with stage_timer(STAGE_IF_CORE):
+            core_result: CoreResult = await handle_packet_async(packet)
         _log_debug(trace_id=trace_id, checkpoint=CP_IF_CORE_OK, summary="core returned CoreResult")
+        flight_recorder.attach_result(trace_id, _result_summary(core_result))
     except Exception as e:
         # 重要：ここで握りつぶさない。必ずログ→再送出し、BG_FAILSAFE に集約。
         _log_error(
@@ -219,10 +233,12 @@ async def handle_request(packet: InputPacket) -> str:
         command_type=_safe_str(packet.command),
         core_output=core_result.core_output or {},   # ★ Core の構造をそのまま
         thread_state=_build_thread_state(core_result),  # ★ 包装のみ（改変しない）
+        trace_id=trace_id,
     )
 
     try:
-        return await st.finalize()
+        with stage_timer(STAGE_IF_STABILIZE):
+            return await st.finalize()
     except Exception as e:
         # Stabilizer 自身も No Silent Death だが、IF でも観測を残す。
         _log_error(
@@ -1,5 +1,5 @@
 # ovv/bis/memory_kind.py
-# Memory Kind Classifier v1.0
+# Memory Kind Classifier v1.1
 #
 # [MODULE CONTRACT]
 # NAME: memory_kind
@@ -12,6 +12,13 @@
 # OUTPUT:
 #   - kind: str ("domain" / "control" / "system" / "other")
 #
+# BATCH:
+#   - classify_memory_kinds(entries) は runtime_memory のリスト全体を 1 回で判定し、
+#     kind code の array("B")（KIND_NAMES の添字）を返す
+#   - 全件の先頭部分を区切り文字で連結し、共有 matcher で 1 回だけ走査する
+#   - 巨大な履歴は workers 指定で複数プロセスに分割できる
+#   - 先頭部分 → control 判定は classify_cache で memo する（単発・バッチ共通）
+#
 # MUST:
 #   - LLM 向けのフォーマット指示や一時的な遊びルールなどを "control" として分類する
 #   - 通常の会話・設計議論・仕様検討は "domain" として分類する
@@ -23,25 +30,44 @@
 
 from __future__ import annotations
 
-from typing import Literal
+from array import array
+from bisect import bisect_right
+from typing import Any, List, Literal, Sequence, Tuple
+import os
+
+from ovv.bis.utils.control_patterns import (
+    CONTROL_LINE_PREFIXES,
+    CONTROL_MATCHER,
+    MEMORY_CONTROL_PATTERNS,
+)
+from ovv.bis.utils.classify_cache import memo_classify, memo_classify_many
+from ovv.bis.utils.process_fanout import fan_out
 
 Kind = Literal["domain", "control", "system", "other"]
 
+# kind code（classify_memory_kinds の戻り値）
+KIND_DOMAIN = 0
+KIND_CONTROL = 1
+KIND_SYSTEM = 2
+KIND_OTHER = 3
+KIND_NAMES: Tuple[Kind, ...] = ("domain", "control", "system", "other")
+
+# これ未満の件数では workers を指定してもプロセス分割しない
+PROCESS_MIN_ITEMS = int(os.getenv("OVV_CLASSIFY_PROCESS_MIN_ITEMS", "50000"))
+
 
-CONTROL_PATTERNS = [
-    # 出力形式指定
-    "jsonで返", "json で返", "json形式", "json 形式",
-    "マークダウン禁止", "markdown 禁止", "markdownで", "マークダウンで",
-    # ロール指示
-    "として振る舞", "として動作しろ", "あなたは", "you are now",
-    # システム/プロンプト指示
-    "system prompt", "システムプロンプト", "プロンプトとして扱え",
-    "以降必ず", "必ず", "のみで応答",
-]
+# パターン表は control_patterns に集約（mem.control）
+CONTROL_PATTERNS = MEMORY_CONTROL_PATTERNS
 
-CONTROL_PREFIXES = [
-    "[PROMPT]", "[prompt]", "[CONTROL]", "[control]",
-]
+CONTROL_PREFIXES = list(CONTROL_LINE_PREFIXES)
+
+_HEAD_CHARS = 80
+
+MEMO_NAMESPACE = "memory_kind"
+
+# バッチ走査時のエントリ区切り。どのパターンにも含まれない文字なので、
+# ヒットがエントリをまたぐことはない
+_SEP = "\x00"
 
 
 def _looks_like_control_text(text: str) -> bool:
@@ -50,18 +76,32 @@ def _looks_like_control_text(text: str) -> bool:
         return False
 
     # 明示プレフィクス
-    for prefix in CONTROL_PREFIXES:
-        if t.startswith(prefix):
-            return True
+    if t.startswith(CONTROL_LINE_PREFIXES):
+        return True
 
-    head = t[:80]
-    lowered = head.lower()
+    # 先頭 _HEAD_CHARS 文字のみを見る（判定は先頭部分だけで決まるので、それをキーに memo）
+    return memo_classify(MEMO_NAMESPACE, t[:_HEAD_CHARS], _head_is_control)
 
-    for pat in CONTROL_PATTERNS:
-        if pat.lower() in lowered:
-            return True
 
-    return False
+def _head_is_control(head: str) -> bool:
+    return "mem.control" in CONTROL_MATCHER.categories(head)
+
+
+def _heads_are_control(heads: List[str]) -> List[bool]:
+    """
+    先頭部分を区切り文字で連結して 1 回だけ走査し、ヒット位置から要素を引く。
+    """
+    flags = [False] * len(heads)
+    starts: List[int] = []
+    pos = 0
+    for h in heads:
+        starts.append(pos)
+        pos += len(h) + 1
+
+    for hit in CONTROL_MATCHER.scan(_SEP.join(heads)):
+        if hit.category == "mem.control":
+            flags[bisect_right(starts, hit.start) - 1] = True
+    return flags
 
 
 def classify_memory_kind(role: str, content: str) -> Kind:
@@ -79,4 +119,59 @@ def classify_memory_kind(role: str, content: str) -> Kind:
     if _looks_like_control_text(content):
         return "control"
 
-    return "domain"
\ No newline at end of file
+    return "domain"
+
+
+# ------------------------------------------------------------
+# Batch
+# ------------------------------------------------------------
+
+def _classify_kinds_chunk(entries: Sequence[Any]) -> array:
+    codes = array("B", bytes(len(entries)))      # 既定は KIND_DOMAIN
+
+    owners: List[int] = []
+    heads: List[str] = []
+    append_owner = owners.append
+    append_head = heads.append
+    prefixes = CONTROL_LINE_PREFIXES
+    for i, m in enumerate(entries):
+        if not isinstance(m, dict):
+            codes[i] = KIND_OTHER
+            continue
+        if m.get("role") == "system":
+            codes[i] = KIND_SYSTEM
+            continue
+        content = m.get("content")
+        if not isinstance(content, str):
+            continue
+        t = content.strip()
+        if not t:
+            continue
+        if t.startswith(prefixes):
+            codes[i] = KIND_CONTROL
+            continue
+        append_owner(i)
+        append_head(t[:_HEAD_CHARS])
+
+    if not heads:
+        return codes
+
+    # memo に無い先頭部分だけをまとめて走査する
+    for i, is_control in zip(owners, memo_classify_many(MEMO_NAMESPACE, heads, _heads_are_control)):
+        if is_control:
+            codes[i] = KIND_CONTROL
+
+    return codes
+
+
+def classify_memory_kinds(entries: Sequence[Any], *, workers: int = 0) -> array:
+    """
+    runtime_memory のリスト全体の kind を判定し、kind code の array("B") を返す。
+    各要素は classify_memory_kind(entry["role"], entry["content"]) と同じ判定になる
+    （dict 以外の要素は KIND_OTHER）。
+
+    workers > 1 かつ PROCESS_MIN_ITEMS 件以上なら複数プロセスで分割実行する。
+    """
+    if workers > 1 and len(entries) >= PROCESS_MIN_ITEMS:
+        return fan_out(_classify_kinds_chunk, entries, workers=workers)
+    return _classify_kinds_chunk(entries)
@@ -26,9 +26,9 @@
 from __future__ import annotations
 
 from typing import Any, Callable, Dict, Optional
-import json
 import traceback
-from datetime import datetime, timezone
+
+from ovv.observability.checkpoint_log import log_event
 
 
 # ------------------------------------------------------------
@@ -47,10 +47,6 @@ CP_CORE_EXCEPTION = "CORE_EXCEPTION"
 # Structured logging (observation only)
 # ------------------------------------------------------------
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _log_event(
     *,
     trace_id: str,
@@ -59,17 +55,14 @@ def _log_event(
     summary: str,
     error: Optional[Dict[str, Any]] = None,
 ) -> None:
-    payload: Dict[str, Any] = {
-        "trace_id": trace_id or "UNKNOWN",
-        "checkpoint": checkpoint,
-        "layer": LAYER_CORE,
-        "level": level,
-        "summary": summary,
-        "timestamp": _now_iso(),
-    }
-    if error is not None:
-        payload["error"] = error
-    print(json.dumps(payload, ensure_ascii=False))
+    log_event(
+        trace_id=trace_id,
+        checkpoint=checkpoint,
+        layer=LAYER_CORE,
+        level=level,
+        summary=summary,
+        error=error,
+    )
 
 
 def _log_debug(*, trace_id: str, checkpoint: str, summary: str) -> None:
@@ -16,7 +16,6 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional, List
 from datetime import datetime, timezone
-import json
 import traceback
 
 from ovv.external_services.notion.ops.executor import execute_notion_ops
@@ -25,6 +24,8 @@ from database.pg import (
     insert_task_session_end_and_duration,
     insert_task_log,
 )
+from ovv.observability.checkpoint_log import log_event
+from ovv.observability.stage_metrics import stage_timer
 
 # ============================================================
 # Debugging Subsystem v1.0 — Checkpoints (FIXED)
@@ -37,15 +38,15 @@ CP_ST_SANITIZE = "ST_SANITIZE"
 CP_ST_SEND_DISCORD = "ST_SEND_DISCORD"
 CP_ST_EXCEPTION = "ST_EXCEPTION"
 
+# stage（span 計測）
+STAGE_ST_PERSIST = "st.persist"
+STAGE_ST_NOTION = "st.notion"
+
 
 # ============================================================
 # Logging
 # ============================================================
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _log_event(
     *,
     trace_id: str,
@@ -55,17 +56,14 @@ def _log_event(
     summary: str,
     error: Optional[Dict[str, Any]] = None,
 ) -> None:
-    payload: Dict[str, Any] = {
-        "trace_id": trace_id,
-        "checkpoint": checkpoint,
-        "layer": layer,
-        "level": level,
-        "summary": summary,
-        "timestamp": _now_iso(),
-    }
-    if error is not None:
-        payload["error"] = error
-    print(json.dumps(payload, ensure_ascii=False))
+    log_event(
+        trace_id=trace_id,
+        checkpoint=checkpoint,
+        layer=layer,
+        level=level,
+        summary=summary,
+        error=error,
+    )
 
 
 def _log_debug(*, trace_id: str, checkpoint: str, summary: str) -> None:
@@ -104,7 +102,13 @@ def _log_error(
     )
 
 
-def _resolve_trace_id(context_key: Optional[str], core_output: Dict[str, Any]) -> str:
+def _resolve_trace_id(
+    context_key: Optional[str],
+    core_output: Dict[str, Any],
+    trace_id: Optional[str] = None,
+) -> str:
+    if isinstance(trace_id, str) and trace_id:
+        return trace_id
     tid = core_output.get("trace_id")
     if isinstance(tid, str) and tid:
         return tid
@@ -131,6 +135,7 @@ class Stabilizer:
         command_type: Optional[str] = None,  # 互換のため残す（使用しない）
         core_output: Optional[Dict[str, Any]] = None,
         thread_state: Optional[Dict[str, Any]] = None,
+        trace_id: Optional[str] = None,
     ):
         self.message_for_user = str(message_for_user or "")
         self.notion_ops = self._normalize_ops(notion_ops)
@@ -143,7 +148,9 @@ class Stabilizer:
         self.thread_state = thread_state or {}
 
         self.mode: str = str(self.core_output.get("mode") or "unknown")
-        self.trace_id = _resolve_trace_id(context_key, self.core_output)
+        self.trace_id = _resolve_trace_id(context_key, self.core_output, trace_id)
+        # context_key で代用した値は trace_id として永続化しない
+        self._persist_trace_id = self.trace_id if self.trace_id not in (context_key, "UNKNOWN") else None
 
         self._last_duration_seconds: Optional[int] = None
 
@@ -192,6 +199,7 @@ class Stabilizer:
             event_type=self.mode,
             content=self.message_for_user or "",
             created_at=now,
+            trace_id=self._persist_trace_id,
         )
 
         if self.mode == "task_start":
@@ -199,12 +207,14 @@ class Stabilizer:
                 task_id=self.task_id,
                 user_id=self.user_id,
                 started_at=now,
+                trace_id=self._persist_trace_id,
             )
 
         elif self.mode == "task_end":
             self._last_duration_seconds = insert_task_session_end_and_duration(
                 task_id=self.task_id,
                 ended_at=now,
+                trace_id=self._persist_trace_id,
             )
 
     # ========================================================
@@ -289,7 +299,8 @@ class Stabilizer:
         self._sanitize()
 
         try:
-            self._write_persist()
+            with stage_timer(STAGE_ST_PERSIST):
+                self._write_persist()
         except Exception as e:
             _log_error(
                 trace_id=self.trace_id,
@@ -308,11 +319,12 @@ class Stabilizer:
 
         if ops:
             try:
-                await execute_notion_ops(
-                    ops,
-                    context_key=self.context_key,
-                    user_id=self.user_id,
-                )
+                with stage_timer(STAGE_ST_NOTION):
+                    await execute_notion_ops(
+                        ops,
+                        context_key=self.context_key,
+                        user_id=self.user_id,
+                    )
             except Exception as e:
                 _log_error(
                     trace_id=self.trace_id,
@@ -0,0 +1,203 @@
+# ovv/bis/utils/classify_cache.py
+# ============================================================
+# MODULE CONTRACT: BIS / Utils / Classification Memo v1.1
+#
+# ROLE:
+#   - テキスト分類・除去の結果を「正規化済みテキストのハッシュ」で再利用する。
+#     同じ制御語や制約（"jsonで返して" / "敬語禁止" 等）は
+#     TB 正規化・memory 判定のたびに繰り返し現れるため。
+#
+# CONSUMERS（namespace）:
+#   - constraint:<profile>  : ovv/brain/constraint_rules.py（MEMO_MIN_CHARS 以上のみ）
+#   - memory_kind           : ovv/bis/memory_kind.py
+#   - strip                 : ovv/bis/utils/context_splitter.py
+#
+# RESPONSIBILITY TAGS:
+#   [KEY]       (namespace, version, text)            : 短いテキスト（str の hash は文字列側にキャッシュ）
+#               (namespace, version, blake2b-128(text)) : 長いテキスト（本体をキーに保持しない）
+#               version は分類規則の世代など（規則差し替え直後の書き戻し競合を防ぐ）
+#   [BOUNDED]   共有 BoundedLRU 1 本（件数上限 + バイト上限）+ 長大テキストは対象外
+#               バイト数はキー（インラインのテキスト）と結果文字列（strip）から見積もる
+#   [OBSERVE]   namespace ごとの hit / miss
+#   [THREAD]    LRU・カウンタとも lock で保護（worker thread から利用可）
+#
+# CONSTRAINTS:
+#   - 呼び出し側は正規化済みテキストを渡すこと（正規化前後で結果が変わらない前提）
+#   - 分類規則が変わったら clear_classify_cache() で破棄する
+# ============================================================
+
+from __future__ import annotations
+
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Hashable, List, Sequence, Tuple, TypeVar
+import os
+import sys
+import threading
+
+from .lru import BoundedLRU
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+CLASSIFY_CACHE_MAX_ITEMS = int(os.getenv("OVV_CLASSIFY_CACHE_MAX_ITEMS", "4096"))
+
+# キー + 値の見積もり合計の上限（strip は結果文字列を持つため、件数だけでは上限にならない）
+CLASSIFY_CACHE_MAX_BYTES = int(os.getenv("OVV_CLASSIFY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# これより長いテキストは memo しない（結果文字列を抱え込まないため）
+CLASSIFY_CACHE_MAX_TEXT_CHARS = int(os.getenv("OVV_CLASSIFY_CACHE_MAX_TEXT_CHARS", "65536"))
+
+# これ以下の長さのテキストはそのままキーにする（ダイジェスト計算のほうが分類より高くつくため）
+_INLINE_KEY_CHARS = 256
+
+
+# 1 エントリあたりの固定分（キー tuple / OrderedDict ノード等の概算）
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+T = TypeVar("T")
+
+
+def _entry_bytes(key: Tuple[str, Hashable, Hashable], value: Any) -> int:
+    size = _ENTRY_OVERHEAD_BYTES + sys.getsizeof(key[2])
+    if isinstance(value, str):
+        size += sys.getsizeof(value)
+    return size
+
+
+_cache = BoundedLRU(CLASSIFY_CACHE_MAX_ITEMS, max_bytes=CLASSIFY_CACHE_MAX_BYTES, sizeof=_entry_bytes)
+_MISSING = object()
+
+_counter_lock = threading.Lock()
+_counters: Dict[str, List[int]] = {}    # namespace -> [hits, misses]
+
+
+# ------------------------------------------------------------
+# Key / counters
+# ------------------------------------------------------------
+
+def text_key(namespace: str, text: str, version: Hashable = None) -> Tuple[str, Hashable, Hashable]:
+    if len(text) <= _INLINE_KEY_CHARS:
+        return namespace, version, text
+    digest = blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return namespace, version, digest
+
+
+def _counter(namespace: str) -> List[int]:
+    # _counter_lock 保持中に呼ぶこと
+    c = _counters.get(namespace)
+    if c is None:
+        c = _counters[namespace] = [0, 0]
+    return c
+
+
+def _cacheable(text: str) -> bool:
+    return CLASSIFY_CACHE_MAX_ITEMS > 0 and len(text) <= CLASSIFY_CACHE_MAX_TEXT_CHARS
+
+
+# ------------------------------------------------------------
+# Memo
+# ------------------------------------------------------------
+
+def memo_classify(
+    namespace: str,
+    text: str,
+    compute: Callable[[str], T],
+    *,
+    version: Hashable = None,
+) -> T:
+    """
+    (namespace, version, text) の結果を引く。miss 時のみ compute(text) して保存する。
+    """
+    if not _cacheable(text):
+        return compute(text)
+
+    key = text_key(namespace, text, version)
+    cached = _cache.get(key, _MISSING)
+    hit = cached is not _MISSING
+    with _counter_lock:
+        _counter(namespace)[0 if hit else 1] += 1
+    if hit:
+        return cached
+
+    value = compute(text)
+    _cache.put(key, value)
+    return value
+
+
+def memo_classify_many(
+    namespace: str,
+    texts: Sequence[str],
+    compute_many: Callable[[List[str]], Sequence[T]],
+    *,
+    version: Hashable = None,
+) -> List[T]:
+    """
+    texts それぞれの結果を引き、miss 分だけをまとめて compute_many() に渡す。
+    戻り値は texts と同じ順序。
+    """
+    out: List[Any] = [_MISSING] * len(texts)
+    miss_idx: List[int] = []
+    miss_keys: List[Hashable] = []
+    hits = 0
+    uncached = 0
+
+    for i, text in enumerate(texts):
+        if not _cacheable(text):
+            miss_idx.append(i)
+            miss_keys.append(None)
+            uncached += 1
+            continue
+        key = text_key(namespace, text, version)
+        cached = _cache.get(key, _MISSING)
+        if cached is _MISSING:
+            miss_idx.append(i)
+            miss_keys.append(key)
+        else:
+            out[i] = cached
+            hits += 1
+
+    if miss_idx:
+        values = compute_many([texts[i] for i in miss_idx])
+        for i, key, value in zip(miss_idx, miss_keys, values):
+            out[i] = value
+            if key is not None:
+                _cache.put(key, value)
+
+    with _counter_lock:
+        c = _counter(namespace)
+        c[0] += hits
+        c[1] += len(miss_idx) - uncached
+    return out
+
+
+# ------------------------------------------------------------
+# Observe / reset
+# ------------------------------------------------------------
+
+def classify_cache_stats() -> Dict[str, Any]:
+    with _counter_lock:
+        namespaces = {
+            ns: {
+                "hits": h,
+                "misses": m,
+                "hit_rate": (h / (h + m)) if (h + m) else 0.0,
+            }
+            for ns, (h, m) in sorted(_counters.items())
+        }
+    return {"lru": _cache.stats(), "namespaces": namespaces}
+
+
+def clear_classify_cache() -> None:
+    _cache.clear()
+
+
+__all__ = [
+    "classify_cache_stats",
+    "clear_classify_cache",
+    "memo_classify",
+    "memo_classify_many",
+    "text_key",
+]
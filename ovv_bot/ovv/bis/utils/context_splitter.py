@@ -1,6 +1,6 @@
 # ovv/bis/utils/context_splitter.py
 # ============================================================
-# MODULE CONTRACT: BIS / context_splitter v1.1
+# MODULE CONTRACT: BIS / context_splitter v1.3
 #   (Debugging Subsystem v1.0 aware / Deterministic Normalizer)
 #
 # ROLE:
@@ -11,6 +11,7 @@
 #   [NORMALIZE]    入力テキストの正規化
 #   [DETECT_CTL]   指示文候補行の検出
 #   [FILTER]       指示文行の除去
+#   [STREAM]       チャンク列 / file-like から行を逐次フィルタ（メモリ上限つき）
 #   [PUBLIC_API]   呼び出し側向けユーティリティ API
 #   [DEBUG_SAFE]   Debugging Subsystem と非干渉（観測のみ・副作用なし）
 #
@@ -23,11 +24,33 @@
 # NOTE:
 #   - Debugging Subsystem v1.0 の trace_id / checkpoint とは直接連携しない。
 #     （本モジュールは「内容正規化」のみを責務とする観測非依存ユーティリティ）
+#   - v1.2: パターン表は control_patterns に集約。テキスト全体を 1 回だけ走査し、
+#     ヒット位置を行へ割り当てる（行 × パターンのループを廃止）。
+#   - 除去結果は classify_cache で memo する（同じテキストを繰り返し除去しない）。
+#   - v1.3: iter_strip_llm_instructions() を追加。STREAM_THRESHOLD_CHARS を超える入力は
+#     STREAM_BLOCK_CHARS 単位のブロックで処理し、全行リストを作らない。
 # ============================================================
 
 from __future__ import annotations
 
-from typing import Any, Iterable, List
+from bisect import bisect_right
+from typing import Any, Iterable, Iterator, List, Set, Union
+import os
+
+from .classify_cache import memo_classify
+from .control_patterns import CONTROL_LINE_PREFIXES, CONTROL_MATCHER, CTX_CATEGORIES
+
+
+MEMO_NAMESPACE = "strip"
+
+# これを超える入力は逐次処理に切り替える
+STREAM_THRESHOLD_CHARS = int(os.getenv("OVV_CONTEXT_STREAM_THRESHOLD_CHARS", "262144"))
+
+# 逐次処理で一度に扱うブロックの大きさ（文字数。行の途中では切らない）
+STREAM_BLOCK_CHARS = int(os.getenv("OVV_CONTEXT_STREAM_BLOCK_CHARS", "65536"))
+
+# str.splitlines() が行区切りとみなす文字
+_LINE_BREAKS = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
 
 
 # ------------------------------------------------------------
@@ -49,39 +72,6 @@ def _normalize_text(text: str) -> str:
 # [DETECT_CTL] 指示文候補判定（1行単位）
 # ------------------------------------------------------------
 
-# 出力形式 / フォーマット指示
-_FORMAT_PATTERNS = [
-    "jsonで返", "json で返", "json形式", "json 形式",
-    "yamlで返", "yaml で返", "xmlで返", "xml で返",
-    "マークダウン禁止", "markdown 禁止",
-    "markdownで", "マークダウンで",
-    "表形式で返", "テーブル形式で返", "箇条書きで返",
-    "コードブロックで返", "```",
-]
-
-# ロール / 人格指示
-_ROLE_PATTERNS = [
-    "として動作しろ", "として動作せよ",
-    "として振る舞え", "として振る舞う",
-    "あなたは", "you are now", "act as",
-]
-
-# システム越境
-_SYSTEM_PATTERNS = [
-    "system prompt", "システムプロンプト",
-    "プロンプトを無視", "prompt を無視",
-    "ignore the system prompt", "override the system prompt",
-    "jailbreak",
-]
-
-# LLM 制御・強制語
-_CONTROL_PATTERNS = [
-    "のみ返す", "だけ返す", "だけを返す", "のみを返す",
-    "以降必ず", "絶対に", "のみで応答", "以外は書かない",
-    "説明文なしで", "説明文は不要", "説明はいらない",
-]
-
-
 def _is_likely_instruction_line(line: str) -> bool:
     """
     1行が「LLM 向けの指示文」と見なせるかを判定する。
@@ -91,55 +81,127 @@ def _is_likely_instruction_line(line: str) -> bool:
     if not s:
         return False
 
-    lower = s.lower()
-
     # 明示プレフィクス
-    if s.startswith(("[PROMPT]", "[prompt]", "[CONTROL]", "[control]")):
+    if s.startswith(CONTROL_LINE_PREFIXES):
         return True
 
-    for pat in _ROLE_PATTERNS:
-        if pat in s:
-            return True
-
-    for pat in _SYSTEM_PATTERNS:
-        if pat.lower() in lower:
-            return True
+    return any(h.category in CTX_CATEGORIES for h in CONTROL_MATCHER.scan(s))
 
-    for pat in _FORMAT_PATTERNS:
-        if pat.lower() in lower:
-            return True
 
-    for pat in _CONTROL_PATTERNS:
-        if pat in s:
-            return True
+def _instruction_line_indexes(text: str, lines: List[str]) -> Set[int]:
+    """
+    text を 1 回だけ走査し（lines は text.splitlines(keepends=True)）、
+    指示文パターンを含む行番号の集合を返す。
+    """
+    starts: List[int] = []
+    offset = 0
+    for ln in lines:
+        starts.append(offset)
+        offset += len(ln)
 
-    return False
+    marked: Set[int] = set()
+    for h in CONTROL_MATCHER.scan(text):
+        if h.category in CTX_CATEGORIES:
+            # パターンは改行を含まないので、開始位置の行に収まる
+            marked.add(bisect_right(starts, h.start) - 1)
+    return marked
 
 
 # ------------------------------------------------------------
 # [FILTER] 指示文行の除去ロジック
 # ------------------------------------------------------------
 
+def _filter_lines(block: str) -> Iterator[str]:
+    """
+    block（完結した行の並び）から指示文行・空行を除いた行を順に返す（改行なし）。
+    """
+    lines = block.splitlines()
+    marked = _instruction_line_indexes(block, block.splitlines(keepends=True))
+
+    for idx, line in enumerate(lines):
+        s = line.strip()
+        if not s:
+            continue
+        if idx in marked or s.startswith(CONTROL_LINE_PREFIXES):
+            continue
+        yield line
+
+
 def strip_llm_instructions_from_text(text: str) -> str:
     """
     単一テキストから「指示文っぽい行」を除去し、残りを結合して返す。
+    結果は正規化済みテキストのハッシュで memo される（classify_cache）。
+    STREAM_THRESHOLD_CHARS を超えるテキストは逐次処理する（結果は同一）。
     """
     norm = _normalize_text(text)
     if not norm:
         return ""
 
-    lines = norm.splitlines()
-    kept: List[str] = []
+    if len(norm) > STREAM_THRESHOLD_CHARS:
+        return "\n".join(iter_strip_llm_instructions(norm)).strip()
 
-    for raw_line in lines:
-        line = raw_line.rstrip("\r\n")
-        if not line.strip():
-            continue
-        if _is_likely_instruction_line(line):
+    return memo_classify(MEMO_NAMESPACE, norm, _strip_normalized)
+
+
+def _strip_normalized(norm: str) -> str:
+    return "\n".join(_filter_lines(norm)).strip()
+
+
+# ------------------------------------------------------------
+# [STREAM] 逐次フィルタ
+# ------------------------------------------------------------
+
+TextSource = Union[str, Iterable[str], Any]
+
+
+def _iter_chunks(source: TextSource) -> Iterator[str]:
+    if isinstance(source, str):
+        for i in range(0, len(source), STREAM_BLOCK_CHARS):
+            yield source[i:i + STREAM_BLOCK_CHARS]
+        return
+
+    read = getattr(source, "read", None)
+    if callable(read):
+        while True:
+            chunk = read(STREAM_BLOCK_CHARS)
+            if not chunk:
+                return
+            yield chunk
+
+    for chunk in source:
+        if chunk:
+            yield chunk if isinstance(chunk, str) else str(chunk)
+
+
+def _last_line_break(buf: str) -> int:
+    return max(buf.rfind(ch) for ch in _LINE_BREAKS)
+
+
+def iter_strip_llm_instructions(source: TextSource) -> Iterator[str]:
+    """
+    テキスト（str / str チャンクの iterable / read() を持つ file-like）から
+    指示文行・空行を除いた行を逐次 yield する（改行なし）。
+
+    - 行の途中でチャンクが切れても、次のチャンクと連結してから判定する
+    - 保持するのは「処理中のブロック + 未完の 1 行」のみ
+    - "\n".join(...).strip() した結果は strip_llm_instructions_from_text と同一
+    """
+    pending: List[str] = []     # 行区切りをまだ含まない断片
+
+    for chunk in _iter_chunks(source):
+        cut = _last_line_break(chunk)
+        if cut < 0:
+            pending.append(chunk)
             continue
-        kept.append(line)
 
-    return "\n".join(kept).strip()
+        head = chunk[:cut + 1]
+        block = "".join(pending) + head if pending else head
+        pending = [chunk[cut + 1:]] if cut + 1 < len(chunk) else []
+
+        yield from _filter_lines(block)
+
+    if pending:
+        yield from _filter_lines("".join(pending))
 
 
 # ------------------------------------------------------------
@@ -181,15 +243,34 @@ def _extract_text_from_dict(obj: dict) -> str:
 # [PUBLIC_API]
 # ------------------------------------------------------------
 
+def _iter_item_lines(items: Iterable[Any]) -> Iterator[str]:
+    """
+    _flatten_iterable_text と同じ連結結果を、連結文字列を作らずにチャンクで返す。
+    """
+    first = True
+    for v in items:
+        if v is None:
+            continue
+        t = (v if isinstance(v, str) else str(v)).strip()
+        if not t:
+            continue
+        yield t if first else "\n" + t
+        first = False
+
+
 def clean_context_text(value: Any) -> str:
     """
     Notion Task Summary / ThreadWBS / ThreadBrain に渡す前の
     文脈テキスト正規化 API。
+    STREAM_THRESHOLD_CHARS を超える入力は逐次フィルタで処理する。
     """
     if isinstance(value, str):
         return strip_llm_instructions_from_text(value)
 
     if isinstance(value, (list, tuple)):
+        size = sum(len(v) for v in value if isinstance(v, str))
+        if size > STREAM_THRESHOLD_CHARS:
+            return "\n".join(iter_strip_llm_instructions(_iter_item_lines(value))).strip()
         flat = _flatten_iterable_text(value)
         return strip_llm_instructions_from_text(flat)
 
@@ -202,5 +283,6 @@ def clean_context_text(value: Any) -> str:
 
 __all__ = [
     "clean_context_text",
+    "iter_strip_llm_instructions",
     "strip_llm_instructions_from_text",
 ]
\ No newline at end of file
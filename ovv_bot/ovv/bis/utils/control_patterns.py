@@ -0,0 +1,115 @@
+# ovv/bis/utils/control_patterns.py
+# ============================================================
+# MODULE CONTRACT: BIS / Utils / Control Pattern Tables v1.0
+#
+# ROLE:
+#   - 制御語（LLM 向け指示文）判定で使うパターン表を一箇所に集約し、
+#     import 時に 1 本の PatternMatcher（CONTROL_MATCHER）へコンパイルする。
+#
+# CONSUMERS:
+#   - ovv/bis/utils/context_splitter.py     : ctx.*
+#   - ovv/bis/memory_kind.py                : mem.control
+#   - ovv/bis/domain_control_splitter.py    : split.control
+#
+# CONSTRAINTS:
+#   - 表の追加・変更はここだけで行う（各モジュールに部分文字列ループを書かない）
+#   - hard / soft 制約の分類規則は ovv/brain/constraint_rules.json 側
+#   - ignore-case カテゴリは旧実装で `.lower()` 比較していたもののみ
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+from .pattern_matcher import PatternMatcher
+
+
+# ------------------------------------------------------------
+# context_splitter（1 行単位の指示文検出）
+# ------------------------------------------------------------
+
+# 出力形式 / フォーマット指示（ignore-case）
+CTX_FORMAT_PATTERNS = [
+    "jsonで返", "json で返", "json形式", "json 形式",
+    "yamlで返", "yaml で返", "xmlで返", "xml で返",
+    "マークダウン禁止", "markdown 禁止",
+    "markdownで", "マークダウンで",
+    "表形式で返", "テーブル形式で返", "箇条書きで返",
+    "コードブロックで返", "```",
+]
+
+# ロール / 人格指示
+CTX_ROLE_PATTERNS = [
+    "として動作しろ", "として動作せよ",
+    "として振る舞え", "として振る舞う",
+    "あなたは", "you are now", "act as",
+]
+
+# システム越境（ignore-case）
+CTX_SYSTEM_PATTERNS = [
+    "system prompt", "システムプロンプト",
+    "プロンプトを無視", "prompt を無視",
+    "ignore the system prompt", "override the system prompt",
+    "jailbreak",
+]
+
+# LLM 制御・強制語
+CTX_CONTROL_PATTERNS = [
+    "のみ返す", "だけ返す", "だけを返す", "のみを返す",
+    "以降必ず", "絶対に", "のみで応答", "以外は書かない",
+    "説明文なしで", "説明文は不要", "説明はいらない",
+]
+
+CONTROL_LINE_PREFIXES = ("[PROMPT]", "[prompt]", "[CONTROL]", "[control]")
+
+
+# ------------------------------------------------------------
+# memory_kind（runtime_memory 1 件の control 判定 / ignore-case）
+# ------------------------------------------------------------
+
+MEMORY_CONTROL_PATTERNS = [
+    # 出力形式指定
+    "jsonで返", "json で返", "json形式", "json 形式",
+    "マークダウン禁止", "markdown 禁止", "markdownで", "マークダウンで",
+    # ロール指示
+    "として振る舞", "として動作しろ", "あなたは", "you are now",
+    # システム/プロンプト指示
+    "system prompt", "システムプロンプト", "プロンプトとして扱え",
+    "以降必ず", "必ず", "のみで応答",
+]
+
+
+# ------------------------------------------------------------
+# domain_control_splitter（TB 値の control 判定 / ignore-case）
+# ------------------------------------------------------------
+
+SPLIT_CONTROL_PATTERNS = ["jsonで返", "markdown", "禁止", "フォーマット"]
+
+
+# ------------------------------------------------------------
+# Shared matcher（import 時に 1 回だけ構築）
+# ------------------------------------------------------------
+
+_TABLES: Dict[str, List[str]] = {
+    "ctx.format": CTX_FORMAT_PATTERNS,
+    "ctx.role": CTX_ROLE_PATTERNS,
+    "ctx.system": CTX_SYSTEM_PATTERNS,
+    "ctx.control": CTX_CONTROL_PATTERNS,
+    "mem.control": MEMORY_CONTROL_PATTERNS,
+    "split.control": SPLIT_CONTROL_PATTERNS,
+}
+
+
+_IGNORE_CASE = ["ctx.format", "ctx.system", "mem.control", "split.control"]
+
+CONTROL_MATCHER = PatternMatcher(_TABLES, ignore_case=_IGNORE_CASE)
+
+CTX_CATEGORIES = frozenset({"ctx.format", "ctx.role", "ctx.system", "ctx.control"})
+
+
+__all__ = [
+    "CONTROL_MATCHER",
+    "CONTROL_LINE_PREFIXES",
+    "CTX_CATEGORIES",
+    "MEMORY_CONTROL_PATTERNS",
+]
@@ -0,0 +1,57 @@
+# ovv/bis/utils/debug/boot_diagnostics.py
+# ============================================================
+# MODULE CONTRACT: Debug / Boot Diagnostics v1.0
+#
+# ROLE:
+#   - 以前 bot.py が import 時に毎回 print していた起動診断
+#     （作業ディレクトリのツリー / sys.path）を、必要なときだけ作る。
+#
+# USERS:
+#   - bot.py（OVV_BOOT_VERBOSE=1 のときのみ起動時に出力）
+#   - !dbg_boot tree / !dbg_boot path
+#
+# CONSTRAINTS:
+#   - 観測専用（例外を出さない）
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+import os
+import sys
+
+
+# Discord 表示用に省略するディレクトリ
+SKIP_DIRS = frozenset(("__pycache__", ".git", ".venv", "venv", "node_modules"))
+
+
+def dir_tree_lines(
+    root: str = ".",
+    *,
+    skip: Iterable[str] = (),
+    max_lines: Optional[int] = None,
+) -> List[str]:
+    """
+    os.walk によるディレクトリツリー（従来の起動時ダンプと同じ字下げ）。
+    """
+    skip_set = frozenset(skip)
+    out: List[str] = []
+    try:
+        for cur, dirs, files in os.walk(root, topdown=True):
+            if skip_set:
+                dirs[:] = [d for d in dirs if d not in skip_set]
+            level = cur.count(os.sep)
+            indent = " " * 2 * level
+            out.append(f"{indent}{cur}/")
+            out.extend(f"{indent}  {f}" for f in files)
+            if max_lines is not None and len(out) >= max_lines:
+                out = out[:max_lines]
+                out.append("...")
+                break
+    except Exception as e:
+        out.append(f"(walk failed: {e!r})")
+    return out
+
+
+def sys_path_lines() -> List[str]:
+    return [str(p) for p in sys.path]
@@ -15,7 +15,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import importlib
+import io
+import time
 import discord
 from discord.ext import commands
 
@@ -23,8 +26,9 @@ from database import pg as db_pg
 
 # dbg_packet 用
 try:
-    from ovv.bis.capture_interface_packet import get_last_interface_packet
+    from ovv.bis.capture_interface_packet import get_interface_packet, get_last_interface_packet
 except Exception:
+    get_interface_packet = None
     get_last_interface_packet = None
 
 
@@ -40,6 +44,47 @@ def _check_module(path: str) -> str:
         return f"ERROR: {repr(e)}"
 
 
+# ------------------------------------------------------------
+# Helper: PostgreSQL に永続化された trace（dbg_trace 用）
+# ------------------------------------------------------------
+
+async def _send_stored_trace(ctx: commands.Context, trace_id: str) -> None:
+    try:
+        from ovv.observability import trace_store
+        rows = await asyncio.to_thread(trace_store.load_trace, trace_id)
+    except Exception as e:
+        await ctx.send(f"trace_event 読み出し失敗: {repr(e)}")
+        return
+
+    if not rows:
+        await ctx.send(f"trace not found (リング・trace_event とも無し。db 検索は 8 文字以上): {trace_id}")
+        return
+
+    tids = sorted({r["trace_id"] for r in rows})
+    t0 = rows[0]["ts"]
+    lines = [f"=== TRACE {', '.join(tids)} (db) ===", f"started_at: {t0.isoformat()}", ""]
+    spans = []
+    for r in rows:
+        at_ms = (r["ts"] - t0).total_seconds() * 1000.0
+        if r["kind"] == "span":
+            spans.append((r["name"], at_ms, r["duration_ms"] or 0.0))
+            continue
+        level = (r["level"] or "-")[0]
+        lines.append(f"{at_ms:>9.1f} ms  {level} {r['name']:<22} {str(r['summary'] or '')[:40]}")
+        if r["error"]:
+            err = r["error"]
+            lines.append(f"           [error] {err.get('type')}: {str(err.get('message'))[:100]}")
+    if spans:
+        lines.extend(["", "[spans]"])
+        for name, at_ms, dur in spans:
+            lines.append(f"{name:<24} @{at_ms:>9.1f} ms  {dur:>10.1f} ms")
+
+    text = "\n".join(lines)
+    if len(text) > 1900:
+        text = text[:1900] + "\n..."
+    await ctx.send("```\n" + text + "\n```")
+
+
 # ------------------------------------------------------------
 # Public Entry
 # ------------------------------------------------------------
@@ -93,16 +138,16 @@ def register_debug_commands(bot: commands.Bot) -> None:
         await ctx.send(f"```\n" + "\n".join(lines) + "\n```")
 
     # ========================================================
-    # 3. dbg_packet — Pipeline 入力パケット確認
+    # 3. dbg_packet — Pipeline 入力パケット確認（!dbg_packet [trace_id]）
     # ========================================================
     @bot.command(name="dbg_packet")
-    async def dbg_packet(ctx: commands.Context):
+    async def dbg_packet(ctx: commands.Context, trace_id: str = ""):
 
         if get_last_interface_packet is None:
             await ctx.send("capture_interface_packet 未導入のため使用不可。")
             return
 
-        packet = get_last_interface_packet()
+        packet = get_interface_packet(trace_id) if trace_id else get_last_interface_packet()
 
         if not packet:
             await ctx.send("No packet captured yet.")
@@ -187,3 +232,497 @@ def register_debug_commands(bot: commands.Bot) -> None:
             pass
 
         await ctx.send("Memory + ThreadBrain wiped.")
+
+    # ========================================================
+    # 7. dbg_llm — LLM single-flight / response cache / TB prompt memo stats
+    # ========================================================
+    @bot.command(name="dbg_llm")
+    async def dbg_llm(ctx: commands.Context):
+
+        try:
+            from ovv.external_services.llm.single_flight import llm_single_flight
+            from ovv.external_services.llm.response_cache import cache_stats
+            from ovv.brain.tb_prompt_cache import prompt_cache_stats
+            from ovv.observability.stage_metrics import stage_snapshot
+        except Exception as e:
+            await ctx.send(f"llm client 未導入のため使用不可: {repr(e)}")
+            return
+
+        sf = llm_single_flight.stats()
+        cs = cache_stats()
+        mem = cs.get("memory", {})
+
+        lines = [
+            "=== LLM CLIENT ===",
+            "",
+            "[SingleFlight]",
+            f"calls           : {sf['calls']}",
+            f"executions      : {sf['executions']}",
+            f"shared_inflight : {sf['shared_inflight']}",
+            f"recent_hits     : {sf['recent_hits']}",
+            f"inflight        : {sf['inflight']}",
+            f"saved_ratio     : {sf['saved_ratio']:.1%}",
+            "",
+            "[ResponseCache]",
+            f"bypass          : {cs['bypass']}",
+            f"pg_enabled      : {cs['pg_enabled']}",
+            f"hit_rate        : {cs['hit_rate']:.1%}",
+            f"memory_hits     : {cs['memory_hits']}",
+            f"pg_hits         : {cs['pg_hits']}",
+            f"misses          : {cs['misses']}",
+            f"puts            : {cs['puts']}",
+            f"pg_errors       : {cs['pg_errors']}",
+            f"memory_size     : {mem.get('size')}/{mem.get('max_items')}",
+        ]
+
+        pm = prompt_cache_stats()
+        lines.extend(["", "[TBPromptMemo]"])
+        for name in ("prompts", "normalized"):
+            st = pm[name]
+            lines.append(
+                f"{name:<15} : hit_rate={st['hit_rate']:.1%} size={st['size']}/{st['max_items']}"
+            )
+        for stage, st in sorted(stage_snapshot().items()):
+            if stage.startswith("tb."):
+                lines.append(f"{stage:<15} : avg={st['avg_ms']}ms max={st['max_ms']}ms n={st['count']}")
+
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    # ========================================================
+    # 8. dbg_rules — constraint rule table status / reload / test / classify memo
+    #     !dbg_rules
+    #     !dbg_rules reload
+    #     !dbg_rules test <text>
+    # ========================================================
+    @bot.command(name="dbg_rules")
+    async def dbg_rules(ctx: commands.Context, action: str = "", *, text: str = ""):
+
+        try:
+            from ovv.brain.constraint_rules import active_rules, reload_rules, rules_status
+            from ovv.bis.utils.classify_cache import classify_cache_stats
+        except Exception as e:
+            await ctx.send(f"constraint rules 未導入のため使用不可: {repr(e)}")
+            return
+
+        lines = ["=== CONSTRAINT RULES ==="]
+
+        if action == "reload":
+            result = reload_rules()
+            lines.append(f"reload          : {'OK' if result['ok'] else 'FAILED（旧規則を維持）'}")
+            if not result["ok"]:
+                lines.append(f"error           : {result['error']}")
+        elif action == "test":
+            rules = active_rules()
+            lines.append(f"text            : {text[:80]}")
+            for profile in rules.profiles:
+                category, rule_id = rules.explain(text.strip(), profile)
+                lines.append(f"{profile:<15} : {category} ({rule_id or '-'})")
+            lines.append("")
+        elif action:
+            await ctx.send("usage: !dbg_rules [reload | test <text>]")
+            return
+
+        st = rules_status()
+        lines.extend([
+            f"source          : {st['source']}",
+            f"version         : {st['version']}",
+            f"rules           : {st['rules']}",
+            f"profiles        : {', '.join(st['profiles'])}",
+            f"reloads         : {st['reloads']}",
+            f"last_error      : {st['last_error'] or '-'}",
+        ])
+
+        memo = classify_cache_stats()
+        lru = memo["lru"]
+        lines.extend([
+            "",
+            "[ClassifyMemo]",
+            f"size            : {lru['size']}/{lru['max_items']} (evictions={lru['evictions']})",
+        ])
+        for ns, c in memo["namespaces"].items():
+            lines.append(f"{ns:<15} : hit_rate={c['hit_rate']:.1%} hits={c['hits']} misses={c['misses']}")
+
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    # ========================================================
+    # 9. dbg_log — checkpoint log level / trace sampling（再起動なしで変更）
+    #     !dbg_log
+    #     !dbg_log level <BG|IF|CORE|ST|*> <DEBUG|INFO|WARN|ERROR>
+    #     !dbg_log sample <0.0-1.0>
+    #     !dbg_log reset
+    # ========================================================
+    @bot.command(name="dbg_log")
+    async def dbg_log(ctx: commands.Context, action: str = "", *args: str):
+
+        try:
+            from ovv.observability import checkpoint_log as cl
+        except Exception as e:
+            await ctx.send(f"checkpoint_log 未導入のため使用不可: {repr(e)}")
+            return
+
+        usage = "usage: !dbg_log [level <LAYER|*> <LEVEL> | sample <rate> | reset]"
+        lines = ["=== CHECKPOINT LOG ==="]
+
+        try:
+            if action == "level" and len(args) == 2:
+                cl.set_log_level(args[0], args[1])
+                lines.append(f"set level       : {args[0].upper()} -> {args[1].upper()}")
+            elif action == "sample" and len(args) == 1:
+                cl.set_sample_rate(float(args[0]))
+                lines.append(f"set sample_rate : {float(args[0])}")
+            elif action == "reset":
+                cl.reset_log_config()
+                lines.append("reset           : env defaults")
+            elif action:
+                await ctx.send(usage)
+                return
+        except ValueError as e:
+            await ctx.send(f"{e}\n{usage}")
+            return
+
+        cfg = cl.log_config()
+        st = cl.log_stats()
+        lines.extend([
+            f"default         : {cfg['default']}",
+            f"sample_rate     : {cfg['sample_rate']:.2%} (ERROR は常に出力)",
+        ])
+        for layer, level in cfg["layers"].items():
+            lines.append(f"{layer:<15} : {level}")
+        lines.extend([
+            "",
+            "[Writer]",
+            f"async           : {st['async']} (alive={st['writer_alive']})",
+            f"enqueued        : {st['enqueued']}",
+            f"written         : {st['written']} (batches={st['batches']})",
+            f"suppressed      : {st['suppressed']}",
+            f"dropped         : {st['dropped']}",
+            f"queued          : {st['queued']} (max={st['queue_max']})",
+        ])
+
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    # ========================================================
+    # 10. dbg_perf — stage 別レイテンシ分布（rolling window）
+    #     !dbg_perf                 : 直近 60s / 300s / 900s の全 command 合算
+    #     !dbg_perf <window> [cmd]  : window = 秒数 or all
+    #     !dbg_perf trace <trace_id>
+    # ========================================================
+    @bot.command(name="dbg_perf")
+    async def dbg_perf(ctx: commands.Context, action: str = "", arg: str = ""):
+
+        try:
+            from ovv.observability import stage_metrics as sm
+        except Exception as e:
+            await ctx.send(f"stage_metrics 未導入のため使用不可: {repr(e)}")
+            return
+
+        usage = "usage: !dbg_perf [<seconds>|all [command_type] | trace <trace_id>]"
+
+        if action == "trace":
+            bd = sm.trace_breakdown(arg)
+            if bd is None:
+                await ctx.send(f"trace not found (直近 {sm.PERF_TRACE_MAX} 件のみ保持): {arg}")
+                return
+            lines = [f"=== TRACE {arg} ({bd['command_type']}) ==="]
+            for stage, ms in sorted(bd["stages"].items(), key=lambda kv: -kv[1]):
+                lines.append(f"{stage:<24} {ms:>10.1f} ms")
+            await ctx.send("```\n" + "\n".join(lines) + "\n```")
+            return
+
+        if not action:
+            windows = list(sm.PERF_WINDOWS)
+        elif action == "all":
+            windows = [None]
+        elif action.isdigit():
+            windows = [int(action)]
+        else:
+            await ctx.send(usage)
+            return
+        command_type = arg or None
+        cmd_key = command_type or sm.ALL_COMMANDS
+
+        lines = [f"=== PERF (command_type={cmd_key}) ==="]
+        for window in windows:
+            snap = sm.perf_snapshot(window, command_type=command_type)
+            label = "all" if window is None else f"{window}s"
+            lines.extend(["", f"[{label}]".ljust(30) + "     n     /s     p50     p95     p99     max (ms)"])
+            for stage, by_cmd in snap["stages"].items():
+                st = by_cmd.get(cmd_key)
+                if st is None:
+                    continue
+                per_sec = "-" if st["per_sec"] is None else f"{st['per_sec']:.2f}"
+                lines.append(
+                    f"{stage:<30} {st['count']:>5} {per_sec:>6} {st['p50_ms']:>7.1f} "
+                    f"{st['p95_ms']:>7.1f} {st['p99_ms']:>7.1f} {st['max_ms']:>7.1f}"
+                )
+
+        cmds = sm.perf_command_types()
+        if cmds and command_type is None:
+            lines.extend(["", "command_types: " + ", ".join(cmds)])
+
+        text = "\n".join(lines)
+        if len(text) > 1900:
+            text = text[:1900] + "\n..."
+        await ctx.send("```\n" + text + "\n```")
+
+    # ========================================================
+    # 11. dbg_trace — flight recorder（直近 N trace）
+    #     !dbg_trace             : 直近の trace 一覧
+    #     !dbg_trace <trace_id>  : checkpoint 列 / stage 内訳 / 結果 / エラー（先頭一致可）
+    #     !dbg_trace <trace_id> db : PostgreSQL（trace_event + task_log）から復元
+    #                               リングに無い trace は自動的に db を見る
+    # ========================================================
+    @bot.command(name="dbg_trace")
+    async def dbg_trace(ctx: commands.Context, trace_id: str = "", source: str = ""):
+
+        try:
+            from ovv.observability import flight_recorder as fr
+            from ovv.observability.stage_metrics import trace_breakdown
+        except Exception as e:
+            await ctx.send(f"flight_recorder 未導入のため使用不可: {repr(e)}")
+            return
+
+        if not trace_id:
+            st = fr.recorder_stats()
+            lines = [f"=== RECENT TRACES ({st['size']}/{st['capacity']}) ==="]
+            for rec in fr.recent_traces(15):
+                errs = f" errors={len(rec.errors)}" if rec.errors else ""
+                lines.append(f"{rec.trace_id[:8]}  {rec.command_type:<16} {rec.elapsed_ms:>9.1f} ms{errs}")
+            await ctx.send("```\n" + "\n".join(lines) + "\n```")
+            return
+
+        rec = None if source.lower() == "db" else fr.get_trace(trace_id)
+        if rec is None:
+            await _send_stored_trace(ctx, trace_id)
+            return
+
+        d = fr.to_dict(rec)
+        lines = [f"=== TRACE {d['trace_id']} ({d['command_type']}) ===", ""]
+        prev = 0.0
+        for ev in d["checkpoints"]:
+            lines.append(
+                f"{ev['at_ms']:>9.1f} ms (+{ev['at_ms'] - prev:>8.1f})  {ev['level'][0]} {ev['checkpoint']:<22} {ev['summary'][:40]}"
+            )
+            prev = ev["at_ms"]
+        if d["dropped_checkpoints"]:
+            lines.append(f"... {d['dropped_checkpoints']} checkpoints dropped")
+
+        bd = trace_breakdown(rec.trace_id)
+        if bd:
+            lines.extend(["", "[stages]"])
+            for stage, ms in sorted(bd["stages"].items(), key=lambda kv: -kv[1]):
+                lines.append(f"{stage:<24} {ms:>10.1f} ms")
+        if d["result"]:
+            lines.extend(["", f"[result] {d['result']}"])
+        for err in d["errors"]:
+            lines.append(f"[error] {err.get('checkpoint')}: {err.get('type')}: {str(err.get('message'))[:120]}")
+
+        text = "\n".join(lines)
+        if len(text) > 1900:
+            text = text[:1900] + "\n..."
+        await ctx.send("```\n" + text + "\n```")
+
+    # ========================================================
+    # 12. dbg_loop — event loop の遅延・停止
+    #     !dbg_loop      : lag 分布（直近 60s / 累計）と直近の停止一覧
+    #     !dbg_loop <n>  : n 番目（1 = 最新）の停止のスタック
+    # ========================================================
+    @bot.command(name="dbg_loop")
+    async def dbg_loop(ctx: commands.Context, index: str = ""):
+
+        try:
+            from ovv.observability import loop_monitor as lm
+        except Exception as e:
+            await ctx.send(f"loop_monitor 未導入のため使用不可: {repr(e)}")
+            return
+
+        stalls = lm.recent_stalls(lm.LOOP_STALL_KEEP)
+
+        if index:
+            try:
+                stall = stalls[int(index) - 1]
+            except (ValueError, IndexError):
+                await ctx.send(f"usage: !dbg_loop [<1..{len(stalls)}>]")
+                return
+            lines = [
+                f"=== STALL #{index}  {stall['duration_ms']:.0f} ms ===",
+                f"stage  : {stall['stage'] or '-'}",
+                f"trace  : {stall['trace_id'] or '-'} ({stall['command_type'] or '-'})",
+                f"task   : {stall['task'] or '-'}",
+                "",
+            ]
+            if stall["stack"]:
+                lines.extend(line.rstrip() for line in stall["stack"])
+            else:
+                lines.append("(スタック未採取: watchdog の確認より早く loop が再開した)")
+            text = "\n".join(lines)
+            if len(text) > 1900:
+                # 末尾（停止している箇所）を優先して残す
+                text = "...\n" + text[-1900:]
+            await ctx.send("```\n" + text + "\n```")
+            return
+
+        snap = lm.loop_snapshot()
+        w, t = snap["window"], snap["total"]
+        lines = [
+            f"=== EVENT LOOP (running={snap['running']} tick={snap['tick_ms']:.0f}ms stall>={snap['stall_ms']:.0f}ms) ===",
+            f"last {snap['window_seconds']}s : p50={w['p50_ms']:.1f}ms p99={w['p99_ms']:.1f}ms max={w['max_ms']:.1f}ms (n={w['count']})",
+            f"total      : p50={t['p50_ms']:.1f}ms p99={t['p99_ms']:.1f}ms max={snap['max_lag_ms']:.1f}ms",
+            f"stalls     : {snap['stalls']} (stack captured {snap['stacks_captured']})",
+            "",
+        ]
+        for i, st in enumerate(stalls[:10], 1):
+            at = time.strftime("%H:%M:%S", time.localtime(st["started_at"]))
+            tid = (st["trace_id"] or "-")[:8]
+            lines.append(f"#{i:<2} {at} {st['duration_ms']:>8.0f} ms  {st['stage'] or '-':<20} {tid}")
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    # ========================================================
+    # 13. dbg_prof — サンプリング profiler
+    #     !dbg_prof start [seconds] [interval_ms] : 開始（既定 30s / 10ms、終了時に結果を投稿）
+    #     !dbg_prof stop                          : 途中で止めて結果を投稿
+    #     !dbg_prof / !dbg_prof last              : 状態 / 直近の結果を再投稿
+    #     結果は stage / checkpoint / 関数ごとの割合 + collapsed stack（.folded）添付
+    # ========================================================
+    prof_posted = {"result": None}
+
+    async def _post_profile(ctx: commands.Context, res) -> None:
+        if res is None:
+            await ctx.send("profile 結果なし")
+            return
+        if prof_posted["result"] is res:
+            return
+        prof_posted["result"] = res
+
+        text = "\n".join(["=== PROFILE ==="] + res.summary_lines())
+        if len(text) > 1900:
+            text = text[:1900] + "\n..."
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(res.started_at))
+        try:
+            file = discord.File(io.BytesIO(res.collapsed().encode("utf-8")), filename=f"ovv-prof-{stamp}.folded")
+            await ctx.send("```\n" + text + "\n```", file=file)
+        except Exception as e:
+            await ctx.send("```\n" + text + "\n```" + f"\n(collapsed stack 添付失敗: {repr(e)})")
+
+    @bot.command(name="dbg_prof")
+    async def dbg_prof(ctx: commands.Context, action: str = "", seconds: str = "30", interval_ms: str = ""):
+
+        try:
+            from ovv.observability import profiler
+        except Exception as e:
+            await ctx.send(f"profiler 未導入のため使用不可: {repr(e)}")
+            return
+
+        if action == "start":
+            try:
+                sec = float(seconds)
+                ivl = float(interval_ms) if interval_ms else None
+            except ValueError:
+                await ctx.send("usage: !dbg_prof start [seconds] [interval_ms]")
+                return
+            if not profiler.start_profile(sec, ivl):
+                await ctx.send("profiler は既に実行中（!dbg_prof stop で停止）")
+                return
+            sec = max(1.0, min(sec, profiler.PROF_MAX_SECONDS))
+            await ctx.send(f"profiler started: {sec:.0f}s（終了時に結果を投稿）")
+            res = await asyncio.to_thread(profiler.wait_profile, sec + 10.0)
+            await _post_profile(ctx, res)
+            return
+
+        if action == "stop":
+            if not profiler.profile_running():
+                await ctx.send("profiler は実行中ではない（!dbg_prof last で直近の結果）")
+                return
+            res = await asyncio.to_thread(profiler.stop_profile)
+            await _post_profile(ctx, res)
+            return
+
+        if action == "last":
+            prof_posted["result"] = None
+            await _post_profile(ctx, profiler.last_profile())
+            return
+
+        state = "running" if profiler.profile_running() else "idle"
+        await ctx.send(f"profiler: {state}\nusage: !dbg_prof start [seconds] [interval_ms] | stop | last")
+
+    # ========================================================
+    # 14. dbg_boot — 起動時間の内訳 / 起動診断（opt-in）
+    #     !dbg_boot       : import / 登録 / on_ready / migration / warm-up の所要時間
+    #     !dbg_boot tree  : 作業ディレクトリのツリー（__pycache__ 等は省略）
+    #     !dbg_boot path  : sys.path
+    # ========================================================
+    @bot.command(name="dbg_boot")
+    async def dbg_boot(ctx: commands.Context, what: str = ""):
+
+        try:
+            from ovv.bis.utils.debug.boot_diagnostics import SKIP_DIRS, dir_tree_lines, sys_path_lines
+            from ovv.observability.boot_timing import boot_report_lines
+        except Exception as e:
+            await ctx.send(f"boot diagnostics 未導入のため使用不可: {repr(e)}")
+            return
+
+        if what == "tree":
+            lines = await asyncio.to_thread(dir_tree_lines, ".", skip=SKIP_DIRS, max_lines=120)
+            title = "=== PROJECT DIR TREE ==="
+        elif what == "path":
+            lines = sys_path_lines()
+            title = "=== PYTHON SYSPATH ==="
+        else:
+            lines = boot_report_lines()
+            title = "=== BOOT TIMING ==="
+            try:
+                from ovv.bis.warmup import warmup_stats
+
+                w = warmup_stats()
+                lines += [
+                    "",
+                    f"[warmup] {w['state']} threads={w['threads']}/{w['threads_limit']} "
+                    f"pages={w['pages_cached']} batches={w['notion_batches']} "
+                    f"duration={w['duration_ms']}ms budget={w['budget_ms']:.0f}ms"
+                    + (" (budget exceeded)" if w["timed_out"] else "")
+                    + (f" error={w['error']}" if w["error"] else ""),
+                ]
+            except Exception:
+                pass
+
+        text = "\n".join([title] + lines)
+        if len(text) > 1900:
+            text = text[:1900] + "\n..."
+        await ctx.send("```\n" + text + "\n```")
+
+    # ========================================================
+    # 15. dbg_wbs_log — ThreadWBS の操作履歴（thread_wbs_event）
+    #     !dbg_wbs_log [N] : このスレッドの直近 N 件（既定 20）
+    # ========================================================
+    @bot.command(name="dbg_wbs_log")
+    async def dbg_wbs_log(ctx: commands.Context, limit: int = 20):
+
+        try:
+            from database.pg_wbs import load_thread_wbs_history, load_thread_wbs_versioned
+        except Exception as e:
+            await ctx.send(f"pg_wbs 未導入のため使用不可: {repr(e)}")
+            return
+
+        thread_id = str(ctx.channel.id)
+        limit = max(1, min(limit, 50))
+        try:
+            rows = await asyncio.to_thread(load_thread_wbs_history, thread_id, limit)
+            _, seq = await asyncio.to_thread(load_thread_wbs_versioned, thread_id)
+        except Exception as e:
+            await ctx.send(f"WBS 履歴の取得に失敗: {repr(e)}")
+            return
+
+        if not rows:
+            await ctx.send("WBS events: (none)")
+            return
+
+        lines = [f"=== WBS EVENTS (thread={thread_id}, seq={seq}) ==="]
+        for r in rows:
+            at = r["created_at"].strftime("%m-%d %H:%M:%S") if r.get("created_at") else "-"
+            lines.append(
+                f"{r['seq']:>5}  {at}  {r['op']:<26} {r.get('payload_bytes') or 0:>5}B  {r.get('trace_id') or '-'}"
+            )
+        text = "\n".join(lines)
+        if len(text) > 1900:
+            text = text[:1900] + "\n..."
+        await ctx.send("```\n" + text + "\n```")
@@ -0,0 +1,128 @@
+# ovv/bis/utils/lru.py
+# ============================================================
+# MODULE CONTRACT: BIS / Utils / BoundedLRU v1.1
+#
+# ROLE:
+#   - プロセス内キャッシュ共通の「上限付き LRU」。
+#
+# RESPONSIBILITY TAGS:
+#   [BOUNDED]   max_items を超えたら最も古く使われたものから捨てる
+#               max_bytes + sizeof 指定時は、見積もりバイト数の合計でも同様に捨てる
+#   [TTL]       ttl_sec 指定時は期限切れを miss として扱う
+#   [OBSERVE]   hit / miss / eviction カウンタ
+#   [THREAD]    lock により worker thread からの同時利用に耐える
+#
+# CONSTRAINTS:
+#   - 値の中身を解釈しない（コピーもしない）
+#   - 外部 I/O を行わない
+# ============================================================
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+import time
+
+
+_MISSING = object()
+
+
+class BoundedLRU:
+    """
+    上限付き LRU キャッシュ。
+
+    - get() は hit 時にエントリを最新扱いに移動する
+    - ttl_sec=None なら期限なし
+    - max_bytes 指定時は sizeof(key, value) の合計を上限内に保つ（単独で上限を超える値は保存しない）
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        *,
+        ttl_sec: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Hashable, Any], int]] = None,
+    ) -> None:
+        self._max_items = max(0, int(max_items))
+        self._ttl_sec = ttl_sec if ttl_sec is None else max(0.0, float(ttl_sec))
+        self._max_bytes = None if max_bytes is None or sizeof is None else max(0, int(max_bytes))
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+
+            stored_at, value, size = entry
+            if self._ttl_sec is not None and time.monotonic() - stored_at > self._ttl_sec:
+                del self._data[key]
+                self._bytes -= size
+                self._misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self._max_items <= 0:
+            return
+        size = 0
+        if self._max_bytes is not None:
+            size = int(self._sizeof(key, value))  # type: ignore[misc]
+            if size > self._max_bytes:
+                self.pop(key)
+                return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (time.monotonic(), value, size)
+            self._bytes += size
+            while len(self._data) > self._max_items or (
+                self._max_bytes is not None and self._bytes > self._max_bytes
+            ):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            out = {
+                "size": len(self._data),
+                "max_items": self._max_items,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": (self._hits / total) if total else 0.0,
+            }
+            if self._max_bytes is not None:
+                out["bytes"] = self._bytes
+                out["max_bytes"] = self._max_bytes
+            return out
@@ -0,0 +1,214 @@
+# ovv/bis/utils/pattern_matcher.py
+# ============================================================
+# MODULE CONTRACT: BIS / Utils / PatternMatcher v1.0
+#   (Compiled Multi-Pattern Matcher / One Pass)
+#
+# ROLE:
+#   - 「カテゴリ → 部分文字列パターン列」の表から単一の正規表現を組み立て、
+#     テキスト 1 回の走査で全カテゴリのヒット（位置付き・重なり含む）を返す。
+#
+# RESPONSIBILITY TAGS:
+#   [COMPILE]   各パターンを「最も出現しにくい 1 文字（anchor）」で引く形に変換し、
+#               anchor 文字ごとにまとめた 1 本の alternation にする
+#                 例: "jsonで返" → j(?=sonで返)   /   "で返" → 返(?<=で返)
+#   [SCAN]      lower() はテキスト全体で 1 回だけ。
+#               re は先頭文字集合（= anchor 集合）で C 側スキップするため、
+#               anchor を含まない大半の位置は Python に戻らない
+#   [OVERLAP]   マッチ幅は anchor 1 文字なので、重なるヒットもすべて列挙される
+#   [CASE]      カテゴリ単位で case-sensitive / ignore-case を選べる
+#               （旧実装の `pat in s` / `pat.lower() in s.lower()` と同一判定）
+#
+# CONSTRAINTS:
+#   - 判定結果は「各パターンについて部分文字列検査した結果」と完全一致させる
+#   - 外部 I/O を行わない / deterministic
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+import re
+
+
+class Hit(NamedTuple):
+    start: int
+    end: int
+    category: str
+    pattern: str
+
+
+class _Entry(NamedTuple):
+    pattern: str        # 表に書かれた元のパターン
+    category: str
+    sensitive: bool
+
+
+class _Candidate(NamedTuple):
+    lowered: str
+    offset: int         # パターン内での anchor の位置
+    entries: Tuple[_Entry, ...]
+
+
+# ------------------------------------------------------------
+# Anchor selection（文字の出現しやすさの静的な目安。小さいほど稀）
+# ------------------------------------------------------------
+
+_EN_BY_FREQ = "etaoinsrhldcumfpgwybvkxjqz"
+_HIRAGANA_BY_FREQ = (
+    "のにはてをがとたしでいなるかっれもすこらまうよりくだけあおえせきさつそみやわろんゆ"
+    "めじぶねひほへふぐびぎぜぞづぬぱぽ"
+)
+
+
+def _commonness(ch: str) -> int:
+    code = ord(ch)
+    if ch.isascii():
+        if ch.isalpha():
+            return 60 - 2 * _EN_BY_FREQ.index(ch.lower())
+        if ch.isdigit():
+            return 40
+        if ch == "`":
+            return 2
+        return 80                                   # 空白・記号
+    if 0x3040 <= code <= 0x309F:                    # ひらがな
+        rank = _HIRAGANA_BY_FREQ.find(ch)
+        return 70 - rank if rank >= 0 else 10
+    if ch == "ー":
+        return 40
+    if 0x30A0 <= code <= 0x30FF:                    # カタカナ
+        return 12
+    if 0x4E00 <= code <= 0x9FFF:                    # 漢字
+        return 6
+    return 10
+
+
+def _anchor_offset(lowered: str) -> int:
+    return min(range(len(lowered)), key=lambda i: (_commonness(lowered[i]), i))
+
+
+# ------------------------------------------------------------
+# Matcher
+# ------------------------------------------------------------
+
+class PatternMatcher:
+    """
+    複数カテゴリのパターン表を 1 本にコンパイルしたマッチャ。
+
+    - tables: {category: [pattern, ...]}
+    - ignore_case: 大文字小文字を無視するカテゴリ名
+    """
+
+    def __init__(
+        self,
+        tables: Mapping[str, Iterable[str]],
+        *,
+        ignore_case: Iterable[str] = (),
+    ) -> None:
+        insensitive = set(ignore_case)
+
+        by_lowered: Dict[str, List[_Entry]] = {}
+        seen: Set[Tuple[str, str]] = set()
+        for category, patterns in tables.items():
+            for pat in patterns:
+                if not pat:
+                    raise ValueError(f"empty pattern in category {category!r}")
+                lowered = pat.lower()
+                if len(lowered) != len(pat):
+                    raise ValueError(f"pattern changes length on lower(): {pat!r}")
+                if (category, pat) in seen:
+                    continue
+                seen.add((category, pat))
+                by_lowered.setdefault(lowered, []).append(
+                    _Entry(pat, category, category not in insensitive)
+                )
+
+        # anchor 文字 → その文字で引くパターン群
+        self._by_anchor: Dict[str, List[_Candidate]] = {}
+        branches: Dict[str, List[str]] = {}
+        for lowered in sorted(by_lowered, key=lambda s: (-len(s), s)):
+            k = _anchor_offset(lowered)
+            anchor = lowered[k]
+            self._by_anchor.setdefault(anchor, []).append(
+                _Candidate(lowered, k, tuple(by_lowered[lowered]))
+            )
+            look = ""
+            if k:
+                look += "(?<=" + re.escape(lowered[: k + 1]) + ")"
+            if k + 1 < len(lowered):
+                look += "(?=" + re.escape(lowered[k + 1:]) + ")"
+            branches.setdefault(anchor, []).append(look)
+
+        # re の BRANCH は先頭から順に試すため、出現しやすい anchor を前に置く
+        parts: List[str] = []
+        for anchor in sorted(branches, key=lambda ch: (-_commonness(ch), ch)):
+            looks = branches[anchor]
+            if "" in looks:
+                parts.append(re.escape(anchor))
+            elif len(looks) == 1:
+                parts.append(re.escape(anchor) + looks[0])
+            else:
+                parts.append(re.escape(anchor) + "(?:" + "|".join(looks) + ")")
+
+        self._regex = re.compile("|".join(parts)) if parts else None
+        self.categories_known: FrozenSet[str] = frozenset(tables)
+
+    # --------------------------------------------------------
+    # Scan
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _lower_with_origin(text: str) -> Tuple[str, Optional[List[int]]]:
+        """
+        text.lower() と、lowered 上の位置 → text 上の位置の対応表を返す。
+        lower() で長さが変わらない（通常の）テキストでは対応表は None（恒等）。
+        """
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered, None
+
+        # 'İ' など lower() で文字数が増える文字を含む場合のみ（稀）
+        parts: List[str] = []
+        origin: List[int] = []
+        for i, ch in enumerate(text):
+            lc = ch.lower()
+            parts.append(lc)
+            origin.extend([i] * len(lc))
+        origin.append(len(text))
+        return "".join(parts), origin
+
+    def scan(self, text: str) -> List[Hit]:
+        """
+        全ヒットを開始位置順に返す（重なり・同一位置の複数カテゴリを含む）。
+        """
+        if not text or self._regex is None:
+            return []
+
+        lowered, origin = self._lower_with_origin(text)
+        by_anchor = self._by_anchor
+
+        hits: List[Hit] = []
+        for m in self._regex.finditer(lowered):
+            a = m.start()
+            for cand in by_anchor[lowered[a]]:
+                q = a - cand.offset
+                if q < 0 or not lowered.startswith(cand.lowered, q):
+                    continue
+                if origin is None:
+                    start, end = q, q + len(cand.lowered)
+                else:
+                    start, end = origin[q], origin[q + len(cand.lowered)]
+                for e in cand.entries:
+                    if e.sensitive and not text.startswith(e.pattern, start):
+                        continue
+                    hits.append(Hit(start, end, e.category, e.pattern))
+
+        hits.sort()
+        return hits
+
+    def categories(self, text: str) -> FrozenSet[str]:
+        """
+        text に 1 回以上ヒットしたカテゴリ集合。
+        """
+        return frozenset(h.category for h in self.scan(text))
+
+
+__all__ = ["Hit", "PatternMatcher"]
@@ -0,0 +1,164 @@
+# ovv/bis/warmup.py
+# ============================================================
+# MODULE CONTRACT: BIS / Cache Warm-up v1.0
+#
+# ROLE:
+#   - デプロイ直後（on_ready）に、最近動いていたスレッドの WBS と Notion page_id を
+#     先読みしてキャッシュへ入れ、各スレッドの初回コマンドが cold load を払わないようにする。
+#
+# RESPONSIBILITY TAGS:
+#   [WBS]      pg_wbs.prefetch_recent_thread_wbs(N) : thread_wbs.updated_at 降順 N 件を 1 query
+#   [NOTION]   executor.prefetch_page_ids() : task_id（= thread_id）を WARMUP_NOTION_BATCH 件ずつ
+#              1 query で解決。同時実行は WARMUP_CONCURRENCY まで
+#   [BUDGET]   全体で WARMUP_BUDGET_MS。超えたら残りを諦める（取れた分はキャッシュに残る）
+#   [ONCE]     start_warmup() は何度呼んでも 1 回だけ（on_ready は再接続でも呼ばれる）
+#   [OBSERVE]  boot_timing の "warmup" phase / warmup_stats()（!dbg_boot）
+#
+# CONSTRAINTS:
+#   - 観測・最適化専用（失敗しても Bot を止めない / 結果はキャッシュの中身にしか影響しない）
+#   - 同期 I/O は worker thread で行い、event loop を塞がない
+#   - migration（thread_wbs.updated_at）の後に呼ぶこと
+#   - OVV_WARMUP=0 なら何もしない
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import time
+
+from ovv.observability.boot_timing import phase
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+WARMUP = os.getenv("OVV_WARMUP", "1") != "0"
+WARMUP_THREADS = int(os.getenv("OVV_WARMUP_THREADS", "50"))
+WARMUP_BUDGET_MS = float(os.getenv("OVV_WARMUP_BUDGET_MS", "5000"))
+WARMUP_CONCURRENCY = max(1, int(os.getenv("OVV_WARMUP_CONCURRENCY", "2")))
+WARMUP_NOTION_BATCH = int(os.getenv("OVV_WARMUP_NOTION_BATCH", "25"))
+
+
+_task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+_stats: Dict[str, Any] = {
+    "state": "idle",
+    "threads": 0,
+    "wbs_cached": 0,
+    "pages_cached": 0,
+    "notion_batches": 0,
+    "timed_out": False,
+    "duration_ms": None,
+    "error": None,
+}
+
+
+# ------------------------------------------------------------
+# Steps
+# ------------------------------------------------------------
+
+def _remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+async def _warm_wbs(deadline: float) -> List[str]:
+    from database import pg_wbs
+
+    thread_ids = await asyncio.wait_for(
+        asyncio.to_thread(pg_wbs.prefetch_recent_thread_wbs, WARMUP_THREADS),
+        timeout=_remaining(deadline),
+    )
+    _stats["threads"] = len(thread_ids)
+    _stats["wbs_cached"] = len(thread_ids)
+    return thread_ids
+
+
+async def _warm_notion(thread_ids: List[str], deadline: float) -> None:
+    from ovv.external_services.notion.notion_client import get_notion_client
+    from ovv.external_services.notion.ops import executor
+
+    if not thread_ids:
+        return
+    # Client 生成（notion_client / httpx の import）も初回 op から外す
+    notion = await asyncio.wait_for(asyncio.to_thread(get_notion_client), timeout=_remaining(deadline))
+    if notion is None:
+        return
+
+    size = max(1, min(WARMUP_NOTION_BATCH, executor.PREFETCH_MAX_BATCH))
+    batches = [thread_ids[i:i + size] for i in range(0, len(thread_ids), size)]
+    sem = asyncio.Semaphore(WARMUP_CONCURRENCY)
+
+    async def _one(batch: List[str]) -> None:
+        async with sem:
+            if _remaining(deadline) <= 0:
+                return
+            found = await asyncio.to_thread(executor.prefetch_page_ids, notion, batch)
+            _stats["pages_cached"] += found
+            _stats["notion_batches"] += 1
+
+    # 期限切れでも worker thread 側の query は止まらない（結果はそのままキャッシュに入る）
+    await asyncio.wait_for(asyncio.gather(*(_one(b) for b in batches)), timeout=_remaining(deadline))
+
+
+async def warm_up() -> Dict[str, Any]:
+    """
+    WBS → Notion page_id の順に先読みする。失敗・期限切れは記録して戻る（例外を出さない）。
+    """
+    t0 = time.monotonic()
+    deadline = t0 + WARMUP_BUDGET_MS / 1000.0
+    _stats["state"] = "running"
+    try:
+        with phase("warmup"):
+            thread_ids = await _warm_wbs(deadline)
+            await _warm_notion(thread_ids, deadline)
+        _stats["state"] = "done"
+    except asyncio.TimeoutError:
+        _stats["state"] = "done"
+        _stats["timed_out"] = True
+    except Exception as e:
+        _stats["state"] = "failed"
+        _stats["error"] = repr(e)
+    _stats["duration_ms"] = round((time.monotonic() - t0) * 1000.0, 1)
+    print(
+        f"[warmup] {_stats['state']} threads={_stats['threads']} pages={_stats['pages_cached']} "
+        f"in {_stats['duration_ms']:.0f}ms" + (" (budget exceeded)" if _stats["timed_out"] else "")
+    )
+    return dict(_stats)
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def start_warmup() -> bool:
+    """
+    実行中の event loop 上で warm_up() を background task として 1 回だけ起動する。
+    """
+    global _task
+    if not WARMUP or _task is not None:
+        return False
+    try:
+        _task = asyncio.get_running_loop().create_task(warm_up(), name="ovv-warmup")
+    except Exception as e:
+        print(f"[warmup] start failed (ignored): {e!r}")
+        return False
+    return True
+
+
+def warmup_stats() -> Dict[str, Any]:
+    return {
+        "enabled": WARMUP,
+        "threads_limit": WARMUP_THREADS,
+        "budget_ms": WARMUP_BUDGET_MS,
+        "concurrency": WARMUP_CONCURRENCY,
+        **_stats,
+    }
+
+
+__all__ = [
+    "start_warmup",
+    "warm_up",
+    "warmup_stats",
+]
@@ -1,21 +1,29 @@
 # ovv/bis/wbs/thread_wbs_builder.py
 # ============================================================
-# MODULE CONTRACT: BIS / ThreadWBS Builder v1.5 (Volatile + Promotion integrated)
+# MODULE CONTRACT: BIS / ThreadWBS Builder v1.6 (Volatile + Promotion integrated)
 #
 # CHANGE:
 #   - volatile draft → stable work_item 昇格 API を正式導入
 #   - 昇格理由・操作者・時刻を volatile に保持
 #   - 推論・自動昇格は行わない
+#   - v1.6: create_empty_wbs / accept_work_item / edit_and_accept_work_item /
+#           mark_focus_dropped（Core が呼んでいたが未定義だったもの）を追加
+#   - v1.6: 時刻と生成 ID を event_clock 経由にする（thread_wbs_events の replay で
+#           同じ操作から同じ WBS を再現するため）
 # ============================================================
 
 from __future__ import annotations
 
-from typing import Dict, Any, Optional, Tuple, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional, Sequence, Tuple, List
 from datetime import datetime, timezone
 import json
 import re
 import uuid
 
+from .contracts import assert_ops_are_volatile_only
+
 # ------------------------------------------------------------
 # Debugging Subsystem v1.0 (Fixed checkpoints - DO NOT EXTEND HERE)
 # ------------------------------------------------------------
@@ -28,14 +36,64 @@ CP_CORE_EXECUTE = "CORE_EXECUTE"
 CP_CORE_RETURN_RESULT = "CORE_RETURN_RESULT"
 CP_CORE_EXCEPTION = "CORE_EXCEPTION"
 
+# ------------------------------------------------------------
+# Event clock（1 操作 = 1 時刻 + 生成 ID 列）
+# ------------------------------------------------------------
+
+class EventClock:
+    """
+    1 操作のあいだ _now_iso() は同じ時刻を返し、_new_id() は生成した ID を ids に記録する。
+    ids を渡して作ると（replay）、記録済みの ID を同じ順で返す。
+    """
+
+    __slots__ = ("at", "ids", "_pos")
+
+    def __init__(self, at: Optional[str] = None, ids: Optional[Sequence[str]] = None) -> None:
+        self.at = at or datetime.now(timezone.utc).isoformat()
+        self.ids: List[str] = list(ids or ())
+        self._pos = 0
+
+    def new_id(self) -> str:
+        if self._pos < len(self.ids):
+            value = self.ids[self._pos]
+        else:
+            value = str(uuid.uuid4())
+            self.ids.append(value)
+        self._pos += 1
+        return value
+
+
+_clock: ContextVar[Optional[EventClock]] = ContextVar("ovv_wbs_event_clock", default=None)
+
+
+@contextmanager
+def event_clock(at: Optional[str] = None, ids: Optional[Sequence[str]] = None) -> Iterator[EventClock]:
+    clock = EventClock(at, ids)
+    token = _clock.set(clock)
+    try:
+        yield clock
+    finally:
+        _clock.reset(token)
+
+
 # ------------------------------------------------------------
 # helpers
 # ------------------------------------------------------------
 
 def _now_iso() -> str:
+    clock = _clock.get()
+    if clock is not None:
+        return clock.at
     return datetime.now(timezone.utc).isoformat()
 
 
+def _new_id() -> str:
+    clock = _clock.get()
+    if clock is not None:
+        return clock.new_id()
+    return str(uuid.uuid4())
+
+
 def _safe_items(wbs: Dict[str, Any]) -> List[Any]:
     items = wbs.get("work_items")
     return items if isinstance(items, list) else []
@@ -57,6 +115,28 @@ def _tid(trace_id: Optional[str]) -> str:
     return trace_id if isinstance(trace_id, str) and trace_id else "UNKNOWN"
 
 
+# ------------------------------------------------------------
+# Create
+# ------------------------------------------------------------
+
+_WBS_SCHEMA = "thread-wbs-1.0"
+
+
+def create_empty_wbs(thread_name: str, *, trace_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    !t（task_create）用の空 WBS。task は Discord スレッド名（空なら "(untitled task)"）。
+    """
+    now = _now_iso()
+    wbs: Dict[str, Any] = {
+        "task": str(thread_name or "").strip() or "(untitled task)",
+        "status": "empty",
+        "work_items": [],
+        "focus_point": None,
+        "meta": {"schema": _WBS_SCHEMA, "created_at": now, "updated_at": now},
+    }
+    return _ensure_volatile(wbs)
+
+
 # ------------------------------------------------------------
 # Volatile layer
 # ------------------------------------------------------------
@@ -93,7 +173,7 @@ def volatile_append_draft(
     wbs = _ensure_volatile(wbs)
 
     draft = {
-        "draft_id": str(uuid.uuid4()),
+        "draft_id": _new_id(),
         "kind": kind,
         "text": str(text or "").strip(),
         "confidence": confidence,
@@ -128,6 +208,116 @@ def volatile_discard_draft(
     return wbs
 
 
+def volatile_set_intent(
+    wbs: Dict[str, Any],
+    *,
+    state: str = "unconfirmed",
+    summary: str = "",
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    wbs = _ensure_volatile(wbs)
+
+    wbs["volatile"]["intent"] = {
+        "state": state if state in ("unconfirmed", "candidate", "confirmed") else "unconfirmed",
+        "summary": str(summary or "").strip(),
+        "updated_at": _now_iso(),
+    }
+
+    _touch_meta(wbs)
+    return wbs
+
+
+def volatile_append_question(
+    wbs: Dict[str, Any],
+    text: str,
+    *,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    wbs = _ensure_volatile(wbs)
+
+    question = {
+        "q_id": _new_id(),
+        "text": str(text or "").strip(),
+        "status": "open",
+        "created_at": _now_iso(),
+        "updated_at": _now_iso(),
+    }
+
+    if question["text"]:
+        wbs["volatile"]["open_questions"].append(question)
+
+    _touch_meta(wbs)
+    return wbs
+
+
+def volatile_mark_question_answered(
+    wbs: Dict[str, Any],
+    q_id: str,
+    *,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    wbs = _ensure_volatile(wbs)
+
+    for q in wbs["volatile"]["open_questions"]:
+        if q.get("q_id") == q_id:
+            q["status"] = "answered"
+            q["updated_at"] = _now_iso()
+
+    _touch_meta(wbs)
+    return wbs
+
+
+def apply_draft_ops(
+    wbs: Dict[str, Any],
+    ops: List[Dict[str, Any]],
+    *,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Inference が返した DraftOp 列を volatile 層にのみ適用する。
+
+    HARD:
+      - stable（work_items / focus_point / status）は変更しない
+      - volatile 以外の op は ValueError（contracts.assert_ops_are_volatile_only）
+    """
+    assert_ops_are_volatile_only(ops)  # type: ignore[arg-type]
+
+    for op in ops:
+        kind = op.get("op")
+
+        if kind == "append_draft":
+            d = op.get("draft") or {}
+            wbs = volatile_append_draft(
+                wbs,
+                str(d.get("text") or ""),
+                kind=str(d.get("kind") or "work_item_candidate"),
+                confidence=str(d.get("confidence") or "low"),
+                source="inference",
+                trace_id=trace_id,
+            )
+
+        elif kind == "discard_draft":
+            wbs = volatile_discard_draft(wbs, str(op.get("draft_id") or ""), trace_id=trace_id)
+
+        elif kind == "set_intent":
+            it = op.get("intent") or {}
+            wbs = volatile_set_intent(
+                wbs,
+                state=str(it.get("state") or "unconfirmed"),
+                summary=str(it.get("summary") or ""),
+                trace_id=trace_id,
+            )
+
+        elif kind == "append_question":
+            q = op.get("question") or {}
+            wbs = volatile_append_question(wbs, str(q.get("text") or ""), trace_id=trace_id)
+
+        elif kind == "mark_question_answered":
+            wbs = volatile_mark_question_answered(wbs, str(op.get("q_id") or ""), trace_id=trace_id)
+
+    return wbs
+
+
 # ------------------------------------------------------------
 # NEW: Promotion API（核心）
 # ------------------------------------------------------------
@@ -185,6 +375,50 @@ def promote_draft_to_work_item(
     return wbs
 
 
+# ------------------------------------------------------------
+# Accept APIs（ユーザーの明示操作で stable に直接追加）
+# ------------------------------------------------------------
+
+def accept_work_item(
+    wbs: Dict[str, Any],
+    candidate: Dict[str, Any],
+    *,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    !wy: candidate（rationale）を work_item として追加し、focus をそこへ移す。
+    rationale が空なら何もしない。
+    """
+    rationale = str((candidate or {}).get("rationale") or "").strip()
+    if not rationale:
+        return wbs
+
+    items = _safe_items(wbs)
+    items.append({"rationale": rationale, "status": "accepted", "created_at": _now_iso()})
+    wbs["work_items"] = items
+    wbs["focus_point"] = len(items) - 1
+    wbs["status"] = "active"
+
+    _ensure_volatile(wbs)
+    _touch_meta(wbs)
+    return wbs
+
+
+def edit_and_accept_work_item(
+    wbs: Dict[str, Any],
+    candidate: Dict[str, Any],
+    rationale: str,
+    *,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    !we: candidate の rationale をユーザー入力で置き換えてから accept する。
+    """
+    edited = dict(candidate or {})
+    edited["rationale"] = str(rationale or "").strip() or str(edited.get("rationale") or "")
+    return accept_work_item(wbs, edited, trace_id=trace_id)
+
+
 # ------------------------------------------------------------
 # Task state APIs（既存）
 # ------------------------------------------------------------
@@ -235,4 +469,38 @@ def mark_focus_done(
     wbs["focus_point"] = None
     _ensure_volatile(wbs)
     _touch_meta(wbs)
-    return wbs, finalized
\ No newline at end of file
+    return wbs, finalized
+
+
+def mark_focus_dropped(
+    wbs: Dict[str, Any],
+    reason: Optional[str] = None,
+    *,
+    trace_id: Optional[str] = None,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    idx = _safe_focus_index(wbs)
+    if idx is None:
+        return wbs, None
+
+    items = _safe_items(wbs)
+    if idx < 0 or idx >= len(items):
+        return wbs, None
+
+    item = items[idx]
+    item["status"] = "dropped"
+    item["finalized_at"] = _now_iso()
+    if reason:
+        item["drop_reason"] = reason
+
+    finalized = {
+        "index": idx,
+        "rationale": item.get("rationale", ""),
+        "status": "dropped",
+        "reason": reason,
+        "finalized_at": item["finalized_at"],
+    }
+
+    wbs["focus_point"] = None
+    _ensure_volatile(wbs)
+    _touch_meta(wbs)
+    return wbs, finalized
@@ -0,0 +1,173 @@
+# ovv/bis/wbs/thread_wbs_events.py
+# ============================================================
+# MODULE CONTRACT: BIS / ThreadWBS Event Log v1.0
+#
+# ROLE:
+#   - ThreadWBS の変更を「操作イベント」（op 名 + 引数 + 時刻 + 生成 ID）として記録し、
+#     snapshot + 後続イベントの replay で現在の WBS を組み立てる。
+#   - WBS 全体の書き戻しを、1 操作 = 小さな 1 行の追記に置き換える。
+#
+# RESPONSIBILITY TAGS:
+#   [OPS]      WBS_OPS : op 名 → thread_wbs_builder の関数（reducer は builder そのもの）
+#   [RECORD]   record(wbs, op, args) : 適用 + payload {"args", "at", "ids"} を作る
+#   [REPLAY]   apply_event / replay : 記録済みの at / ids で builder を再実行（同じ結果になる）
+#   [APPLY]    apply_op(thread_id, op, ...) : load → record → pg_wbs へ追記
+#              （seq の衝突 = 他の書き手が先に追記 → 読み直して再適用）
+#   [OBSERVE]  ovv_wbs_events_total{op,result}
+#
+# CONSTRAINTS:
+#   - reducer は決定的であること（時刻・ID は builder の event_clock 経由のみ）
+#   - args は JSON にできる値のみ
+#   - 既存イベントを書き換えない（op の意味を変えるときは新しい op 名を足す）
+#   - WBS 未作成のスレッドには create / replace 以外を適用しない
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import os
+
+from ovv.observability import metrics
+
+from . import thread_wbs_builder as builder
+
+
+WBS_APPEND_RETRIES = int(os.getenv("OVV_WBS_APPEND_RETRIES", "3"))
+
+_M_EVENTS = metrics.counter(
+    "ovv_wbs_events_total", "ThreadWBS op events by result", ("op", "result")
+)
+
+
+# ------------------------------------------------------------
+# Ops (reducers)
+# ------------------------------------------------------------
+
+def _create(wbs: Any, *, thread_name: str = "", trace_id: Optional[str] = None) -> Dict[str, Any]:
+    return builder.create_empty_wbs(thread_name, trace_id=trace_id)
+
+
+def _replace(wbs: Any, *, state: Dict[str, Any], trace_id: Optional[str] = None) -> Dict[str, Any]:
+    # pg_wbs.save_thread_wbs（WBS 全体の保存）互換
+    return state
+
+
+# 直前の WBS が無くても適用できる op
+_INITIAL_OPS = frozenset(("create", "replace"))
+
+WBS_OPS: Dict[str, Callable[..., Any]] = {
+    "create": _create,
+    "replace": _replace,
+    "task_pause": builder.on_task_pause,
+    "task_complete": builder.on_task_complete,
+    "accept_work_item": builder.accept_work_item,
+    "edit_and_accept_work_item": builder.edit_and_accept_work_item,
+    "promote_draft_to_work_item": builder.promote_draft_to_work_item,
+    "mark_focus_done": builder.mark_focus_done,
+    "mark_focus_dropped": builder.mark_focus_dropped,
+    "apply_draft_ops": builder.apply_draft_ops,
+}
+
+
+def _split(out: Any) -> Tuple[Optional[Dict[str, Any]], Any]:
+    # mark_focus_* は (wbs, finalized) を返す
+    if isinstance(out, tuple):
+        return out[0], out[1]
+    return out, None
+
+
+# ------------------------------------------------------------
+# Record / Replay (pure)
+# ------------------------------------------------------------
+
+def record(
+    wbs: Optional[Dict[str, Any]],
+    op: str,
+    args: Dict[str, Any],
+    *,
+    trace_id: Optional[str] = None,
+) -> Tuple[Optional[Dict[str, Any]], Any, Dict[str, Any]]:
+    """
+    op を適用し、(新しい WBS, 付随結果, payload) を返す。wbs は書き換えられる。
+    """
+    fn = WBS_OPS[op]
+    with builder.event_clock() as clock:
+        new_wbs, result = _split(fn(wbs, trace_id=trace_id, **args))
+    payload = {"args": args, "at": clock.at}
+    if clock.ids:
+        payload["ids"] = clock.ids
+    return new_wbs, result, payload
+
+
+def apply_event(
+    wbs: Optional[Dict[str, Any]],
+    op: str,
+    payload: Dict[str, Any],
+    trace_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    fn = WBS_OPS.get(op)
+    if fn is None:
+        # 新しい op を知らない旧バージョンが読んだ場合。以降の整合は保証できないので目立たせる
+        print(f"[Persist][thread_wbs] unknown event op skipped: {op}")
+        return wbs
+    try:
+        with builder.event_clock(payload.get("at"), payload.get("ids")):
+            new_wbs, _ = _split(fn(wbs, trace_id=trace_id, **(payload.get("args") or {})))
+    except Exception as e:
+        # 壊れたイベント 1 件で WBS 全体を読めなくしない（Core を失敗させない）
+        print(f"[Persist][thread_wbs] event replay failed (skipped): op={op} {e!r}")
+        return wbs
+    return new_wbs
+
+
+def replay(
+    wbs: Optional[Dict[str, Any]],
+    events: Iterable[Tuple[str, Dict[str, Any], Optional[str]]],
+) -> Optional[Dict[str, Any]]:
+    """
+    snapshot（None 可）に (op, payload, trace_id) 列を順に適用する。
+    """
+    for op, payload, trace_id in events:
+        wbs = apply_event(wbs, op, payload, trace_id)
+    return wbs
+
+
+# ------------------------------------------------------------
+# Apply (persist)
+# ------------------------------------------------------------
+
+def apply_op(
+    thread_id: str,
+    op: str,
+    *,
+    trace_id: Optional[str] = None,
+    **args: Any,
+) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """
+    最新の WBS に op を適用し、イベントとして追記する。
+    Returns: (新しい WBS, 付随結果)。WBS 未作成（create / replace 以外）なら (None, None)。
+    """
+    from database import pg_wbs
+
+    for _ in range(max(1, WBS_APPEND_RETRIES)):
+        wbs, seq = pg_wbs.load_thread_wbs_versioned(thread_id)
+        if wbs is None and op not in _INITIAL_OPS:
+            _M_EVENTS.labels(op, "no_wbs").inc()
+            return None, None
+
+        new_wbs, result, payload = record(wbs, op, args, trace_id=trace_id)
+        if pg_wbs.append_thread_wbs_event(thread_id, seq, op, payload, trace_id, new_wbs):
+            _M_EVENTS.labels(op, "ok").inc()
+            return new_wbs, result
+        _M_EVENTS.labels(op, "conflict").inc()
+
+    raise RuntimeError(f"thread_wbs append conflict: thread_id={thread_id} op={op}")
+
+
+__all__ = [
+    "WBS_OPS",
+    "apply_event",
+    "apply_op",
+    "record",
+    "replay",
+]
@@ -0,0 +1,392 @@
+# ovv/bis/wbs/wbs_model.py
+# ============================================================
+# MODULE CONTRACT: BIS / ThreadWBS Compact Model v1.1
+#
+# ROLE:
+#   - ThreadWBS（JSON 形の入れ子 dict）を __slots__ クラスで持つ省メモリ表現と、
+#     JSON 形 dict との相互変換（codec）、プロセス内用のバイナリ直列化を提供する。
+#
+# RESPONSIBILITY TAGS:
+#   [MODEL]    ThreadWBS / Meta / WorkItem / VolatileLayer / Intent / Draft(Promotion) / Question
+#   [COMPACT]  ISO8601(UTC) 時刻 → epoch マイクロ秒（EpochUS: int 派生）、uuid 文字列 → 16 bytes
+#              （元の文字列に正確に戻せないもの（Z 表記・大文字 uuid 等）は文字列のまま持つ）
+#              復元するのは変換済みの値（EpochUS / bytes）だけ。元から int の時刻値などはそのまま
+#   [CODEC]    ThreadWBS.from_dict(d) / .to_dict() : 既存 JSON 形と往復で一致
+#              （未知のキーは extra に退避して戻す。キーの欠落と None も区別する）
+#   [BINARY]   to_bytes() / ThreadWBS.from_bytes() : marshal による tuple 木
+#
+# CONSTRAINTS:
+#   - 構造の解釈・検証はしない（形が想定と違う値は extra / そのままで運ぶ）
+#   - バイナリ形式はプロセス内キャッシュ用（marshal は Python バージョン間の互換を保証しない。
+#     永続化・プロセス間通信には JSON を使う）
+#   - builder は従来どおり dict を扱う。このモデルは保持・転送用
+#   - from_dict / to_dict は extra や形の違う値（dict / list）を複製しない（入力と共有する）
+# ============================================================
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+import marshal
+
+
+# 欠落キー（dict に無い）。None（キーはあって値が null）と区別する
+_MISSING: Any = type("_Missing", (), {"__repr__": lambda self: "<missing>", "__slots__": ()})()
+
+# バイナリ形式での欠落キー表現（marshal が扱える定数）
+_BIN_MISSING = ...
+
+_BINARY_VERSION = 2
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+# 時刻は 1 op 内で同じ値が何度も出る（event_clock）ため、変換結果を memo する
+_TS_MEMO_SIZE = 8192
+
+R = TypeVar("R", bound="_Record")
+
+
+# ------------------------------------------------------------
+# Scalar codecs
+# ------------------------------------------------------------
+
+class EpochUS(int):
+    """
+    時刻フィールドで変換済みの epoch マイクロ秒。元から int だった値（JSON の数値）と区別する。
+    """
+
+    __slots__ = ()
+
+
+@lru_cache(maxsize=_TS_MEMO_SIZE)
+def _ts_parse(value: str) -> Any:
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if dt.utcoffset() != timedelta(0) or dt.isoformat() != value:
+        return value
+    return EpochUS((dt - _EPOCH) // _US)
+
+
+@lru_cache(maxsize=_TS_MEMO_SIZE)
+def _ts_format(value: int) -> str:
+    return (_EPOCH + value * _US).isoformat()
+
+
+def _ts_encode(value: Any) -> Any:
+    """
+    datetime.isoformat() 形（UTC）の文字列なら epoch マイクロ秒 int。戻せない値はそのまま。
+    """
+    return _ts_parse(value) if type(value) is str else value
+
+
+def _ts_decode(value: Any) -> Any:
+    return _ts_format(value) if type(value) is EpochUS else value
+
+
+# tree（marshal）は int 派生を扱えないため、時刻フィールドは
+#   EpochUS → 素の int / 元から int・tuple の値 → ("v", 値) / それ以外 → そのまま
+# とする（JSON 由来の値は tuple にならない）
+
+def _ts_to_tree(value: Any) -> Any:
+    if type(value) is EpochUS:
+        return int(value)
+    if type(value) is int or type(value) is tuple:
+        return ("v", value)
+    return value
+
+
+def _ts_from_tree(value: Any) -> Any:
+    if type(value) is int:
+        return EpochUS(value)
+    if type(value) is tuple:
+        return value[1]
+    return value
+
+
+def _uuid_encode(value: Any) -> Any:
+    """
+    小文字ハイフン区切り（str(uuid.UUID) 形）なら 16 bytes。戻せない値はそのまま。
+    """
+    if type(value) is not str or len(value) != 36:
+        return value
+    if value[8] != "-" or value[13] != "-" or value[18] != "-" or value[23] != "-":
+        return value
+    hexs = value.replace("-", "")
+    try:
+        raw = bytes.fromhex(hexs)
+    except ValueError:
+        return value
+    return raw if len(raw) == 16 and raw.hex() == hexs else value
+
+
+def _uuid_decode(value: Any) -> Any:
+    if type(value) is bytes and len(value) == 16:
+        h = value.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return value
+
+
+# ------------------------------------------------------------
+# Record base
+# ------------------------------------------------------------
+
+class _Record:
+    """
+    _FIELDS の順に slot を持つ。_TS は時刻、_UUID は uuid、_CHILD は入れ子レコード
+    （(クラス, is_list)）として変換する。_FIELDS 以外のキーは extra（dict / None）に残す。
+    変換手順（_IN / _OUT）はクラス定義時に 1 度だけ組み立てる。
+    """
+
+    __slots__ = ("extra",)
+
+    _FIELDS: Tuple[str, ...] = ()
+    _TS: frozenset = frozenset()
+    _UUID: frozenset = frozenset()
+    _CHILD: Dict[str, Tuple[Type["_Record"], bool]] = {}
+
+    _KNOWN: frozenset = frozenset()
+    _IN: Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...] = ()
+    _OUT: Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        ins, outs = [], []
+        for name in cls._FIELDS:
+            child = cls._CHILD.get(name)
+            if child is not None:
+                ins.append((name, _child_codec(child, "from_dict")))
+                outs.append((name, _child_codec(child, "to_dict")))
+            elif name in cls._TS:
+                ins.append((name, _ts_encode))
+                outs.append((name, _ts_decode))
+            elif name in cls._UUID:
+                ins.append((name, _uuid_encode))
+                outs.append((name, _uuid_decode))
+            else:
+                ins.append((name, None))
+                outs.append((name, None))
+        cls._KNOWN = frozenset(cls._FIELDS)
+        cls._IN = tuple(ins)
+        cls._OUT = tuple(outs)
+
+    def __init__(self, **values: Any) -> None:
+        for name in self._FIELDS:
+            setattr(self, name, values.pop(name, _MISSING))
+        self.extra: Optional[Dict[str, Any]] = values or None
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        # EpochUS と素の int は同値でも別物として扱う
+        return all(
+            type(a) is type(b) and a == b
+            for a, b in ((getattr(self, n), getattr(other, n)) for n in self._FIELDS + ("extra",))
+        )
+
+    def __repr__(self) -> str:
+        shown = ", ".join(f"{n}={getattr(self, n)!r}" for n in self._FIELDS if getattr(self, n) is not _MISSING)
+        return f"{type(self).__name__}({shown})"
+
+    # ---- dict (JSON 形) ----
+
+    @classmethod
+    def from_dict(cls: Type[R], d: Dict[str, Any]) -> R:
+        obj = cls.__new__(cls)
+        found = 0
+        for name, conv in cls._IN:
+            value = d.get(name, _MISSING)
+            if value is not _MISSING:
+                found += 1
+                if conv is not None:
+                    value = conv(value)
+            setattr(obj, name, value)
+        if found == len(d):
+            obj.extra = None
+        else:
+            known = cls._KNOWN
+            obj.extra = {k: v for k, v in d.items() if k not in known}
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for name, conv in self._OUT:
+            value = getattr(self, name)
+            if value is _MISSING:
+                continue
+            out[name] = value if conv is None else conv(value)
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    # ---- tuple 木（バイナリ用） ----
+
+    def _to_tree(self) -> tuple:
+        values = []
+        child_of = self._CHILD
+        ts = self._TS
+        for name in self._FIELDS:
+            value = getattr(self, name)
+            if value is _MISSING:
+                value = _BIN_MISSING
+            elif name in child_of:
+                value = _child_to_tree(child_of[name], value)
+            elif name in ts:
+                value = _ts_to_tree(value)
+            values.append(value)
+        values.append(self.extra)
+        return tuple(values)
+
+    @classmethod
+    def _from_tree(cls: Type[R], tree: tuple) -> R:
+        obj = cls.__new__(cls)
+        child_of = cls._CHILD
+        ts = cls._TS
+        for name, value in zip(cls._FIELDS, tree):
+            if value is _BIN_MISSING:
+                value = _MISSING
+            elif name in child_of:
+                value = _child_from_tree(child_of[name], value)
+            elif name in ts:
+                value = _ts_from_tree(value)
+            setattr(obj, name, value)
+        obj.extra = tree[-1]
+        return obj
+
+
+# 入れ子: 形が想定（dict / list[dict]）と違えばそのまま運ぶ
+
+def _child_codec(child: Tuple[Type[_Record], bool], direction: str) -> Callable[[Any], Any]:
+    rec, is_list = child
+    if direction == "from_dict":
+        one = rec.from_dict
+        src: type = dict
+    else:
+        one = rec.to_dict  # type: ignore[assignment]
+        src = rec
+    if is_list:
+        def conv(value: Any) -> Any:
+            if type(value) is not list:
+                return value
+            return [one(v) if isinstance(v, src) else v for v in value]
+    else:
+        def conv(value: Any) -> Any:
+            return one(value) if isinstance(value, src) else value
+    return conv
+
+
+# tree では「レコードかどうか」を 1 要素目の印で区別する（("r", ...) / ("v", 生の値)）
+
+def _child_to_tree(child: Tuple[Type[_Record], bool], value: Any) -> Any:
+    if child[1] and isinstance(value, list):
+        return [("r", v._to_tree()) if isinstance(v, _Record) else ("v", v) for v in value]
+    return ("r", value._to_tree()) if isinstance(value, _Record) else ("v", value)
+
+
+def _child_from_tree(child: Tuple[Type[_Record], bool], value: Any) -> Any:
+    rec, is_list = child
+    if is_list and isinstance(value, list):
+        return [rec._from_tree(v) if tag == "r" else v for tag, v in value]
+    tag, v = value
+    return rec._from_tree(v) if tag == "r" else v
+
+
+# ------------------------------------------------------------
+# Model
+# ------------------------------------------------------------
+
+class Intent(_Record):
+    __slots__ = ("state", "summary", "updated_at")
+    _FIELDS = __slots__
+    _TS = frozenset(("updated_at",))
+
+
+class Promotion(_Record):
+    __slots__ = ("to_index", "by", "reason", "at")
+    _FIELDS = __slots__
+    _TS = frozenset(("at",))
+
+
+class Draft(_Record):
+    __slots__ = (
+        "draft_id", "kind", "text", "confidence", "status", "source",
+        "created_at", "updated_at", "promotion",
+    )
+    _FIELDS = __slots__
+    _TS = frozenset(("created_at", "updated_at"))
+    _UUID = frozenset(("draft_id",))
+    _CHILD = {"promotion": (Promotion, False)}
+
+
+class Question(_Record):
+    __slots__ = ("q_id", "text", "status", "created_at", "updated_at")
+    _FIELDS = __slots__
+    _TS = frozenset(("created_at", "updated_at"))
+    _UUID = frozenset(("q_id",))
+
+
+class VolatileLayer(_Record):
+    __slots__ = ("schema", "intent", "drafts", "open_questions")
+    _FIELDS = __slots__
+    _CHILD = {"intent": (Intent, False), "drafts": (Draft, True), "open_questions": (Question, True)}
+
+
+class WorkItem(_Record):
+    __slots__ = ("rationale", "status", "created_at", "finalized_at", "drop_reason")
+    _FIELDS = __slots__
+    _TS = frozenset(("created_at", "finalized_at"))
+
+
+class Meta(_Record):
+    __slots__ = ("schema", "created_at", "updated_at")
+    _FIELDS = __slots__
+    _TS = frozenset(("created_at", "updated_at"))
+
+
+class ThreadWBS(_Record):
+    __slots__ = ("task", "status", "work_items", "focus_point", "meta", "volatile")
+    _FIELDS = __slots__
+    _CHILD = {
+        "work_items": (WorkItem, True),
+        "meta": (Meta, False),
+        "volatile": (VolatileLayer, False),
+    }
+
+    def to_bytes(self) -> bytes:
+        return bytes((_BINARY_VERSION,)) + marshal.dumps(self._to_tree())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ThreadWBS":
+        if not data or data[0] != _BINARY_VERSION:
+            raise ValueError("unsupported ThreadWBS binary version")
+        return cls._from_tree(marshal.loads(data[1:]))
+
+
+# ------------------------------------------------------------
+# Shortcuts
+# ------------------------------------------------------------
+
+def wbs_to_bytes(wbs: Dict[str, Any]) -> bytes:
+    return ThreadWBS.from_dict(wbs).to_bytes()
+
+
+def wbs_from_bytes(data: bytes) -> Dict[str, Any]:
+    return ThreadWBS.from_bytes(data).to_dict()
+
+
+__all__ = [
+    "Draft",
+    "EpochUS",
+    "Intent",
+    "Meta",
+    "Promotion",
+    "Question",
+    "ThreadWBS",
+    "VolatileLayer",
+    "WorkItem",
+    "wbs_from_bytes",
+    "wbs_to_bytes",
+]
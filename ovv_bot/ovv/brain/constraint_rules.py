@@ -0,0 +1,417 @@
+# ovv/brain/constraint_rules.py
+# ============================================================
+# MODULE CONTRACT: Brain / Constraint Rule Table v1.0
+#
+# ROLE:
+#   - 制約テキストの hard / soft / unknown 分類規則を宣言的な JSON
+#     （constraint_rules.json）から読み込み、判定関数にコンパイルする。
+#
+# RESPONSIBILITY TAGS:
+#   [RULE]      rule = when（OR グループの AND）+ unless（否定）+ category + priority
+#               profiles 指定で特定の利用側だけに効く規則を表す
+#   [COMPILE]   profile ごとに、規則を priority 順に並べた短絡評価の判定関数を生成する
+#                 例: if ('json' in lower or ...) and ('返' in lower or ...): return 0
+#               手書きの if 連鎖と同じく、必要な語だけを部分文字列検査する
+#   [RELOAD]    reload_rules() で差し替え。失敗時は旧規則を維持する
+#               読み込み済みの profile（少なくとも REQUIRED_PROFILES）が欠ける規則は拒否する
+#   [EXPLAIN]   どの rule が効いたかを返す（!dbg_rules 用）
+#   [BATCH]     classify_batch() はテキスト列をまとめて判定し、
+#               category code の array("B")（CATEGORY_NAMES の添字）を返す
+#
+# PROFILES:
+#   - constraint_classifier : ovv/brain/constraint_classifier.py
+#   - tb_adapter            : ovv/brain/threadbrain_adapter.py
+#
+# CONSTRAINTS:
+#   - deterministic / LLM を呼ばない
+#   - 生成コードに埋め込むのは repr() したパターンのみ（規則ファイルから任意コードは作らない）
+#   - 規則の差し替え後は TB プロンプトメモ・分類 memo を破棄する（結果が変わるため）
+# ============================================================
+
+from __future__ import annotations
+
+from array import array
+from itertools import count
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import time
+
+from ovv.bis.utils.classify_cache import clear_classify_cache, memo_classify, memo_classify_many
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "constraint_rules.json")
+RULES_PATH = os.getenv("OVV_CONSTRAINT_RULES_PATH", DEFAULT_RULES_PATH)
+
+# これより短いテキストは memo しない（生成済み判定関数のほうが memo 参照より速い）
+MEMO_MIN_CHARS = int(os.getenv("OVV_CONSTRAINT_MEMO_MIN_CHARS", "64"))
+
+_CATEGORIES = ("hard", "soft", "unknown")
+
+# コードから参照される profile（reload で消えると classify が KeyError になる）
+REQUIRED_PROFILES: Tuple[str, ...] = ("constraint_classifier", "tb_adapter")
+
+# category code（classify_batch の戻り値）
+CODE_UNKNOWN = 0
+CODE_SOFT = 1
+CODE_HARD = 2
+CATEGORY_NAMES: Tuple[str, ...] = ("unknown", "soft", "hard")
+
+
+_generations = count(1)
+
+
+class RuleError(ValueError):
+    """規則ファイルの構文・意味エラー。"""
+
+
+class _Group(NamedTuple):
+    patterns: Tuple[str, ...]
+    ignore_case: bool
+
+
+class _Rule(NamedTuple):
+    rule_id: str
+    category: str
+    priority: int
+    when: Tuple[_Group, ...]    # すべてのグループで 1 語以上ヒットすれば成立
+    unless: Tuple[_Group, ...]  # どれか 1 語でもヒットすれば不成立
+
+
+# ------------------------------------------------------------
+# Compiled rule set
+# ------------------------------------------------------------
+
+class RuleSet:
+    """
+    コンパイル済みの規則表（不変）。差し替えは reload_rules() で行う。
+    """
+
+    def __init__(
+        self,
+        *,
+        version: Any,
+        default: str,
+        rules_by_profile: Mapping[str, Tuple[_Rule, ...]],
+        source: str,
+        rule_count: int,
+    ) -> None:
+        self.version = version
+        self.default = default
+        self.source = source
+        self.rule_count = rule_count
+        self.loaded_at = time.time()
+        # 分類結果 memo のキーに含める世代（差し替え前の結果を引かないため）
+        self.generation = next(_generations)
+        self._rules = dict(rules_by_profile)
+        self._deciders: Dict[str, Callable[[str, str], int]] = {
+            p: _build_decider(rules) for p, rules in self._rules.items()
+        }
+        # rule index → category code（末尾 = index -1 = 該当なし → default）
+        default_code = CATEGORY_NAMES.index(default)
+        self._codes: Dict[str, Tuple[int, ...]] = {
+            p: tuple(CATEGORY_NAMES.index(r.category) for r in rules) + (default_code,)
+            for p, rules in self._rules.items()
+        }
+
+    @property
+    def profiles(self) -> Tuple[str, ...]:
+        return tuple(self._rules)
+
+    def explain(self, text: str, profile: str) -> Tuple[str, Optional[str]]:
+        """
+        (category, 効いた rule id)。どの規則にも当たらなければ (default, None)。
+        """
+        decide = self._deciders.get(profile)
+        if decide is None:
+            raise KeyError(f"unknown constraint rule profile: {profile!r}")
+        if not text:
+            return self.default, None
+        idx = decide(text, text.lower())
+        if idx < 0:
+            return self.default, None
+        rule = self._rules[profile][idx]
+        return rule.category, rule.rule_id
+
+    def classify(self, text: str, profile: str) -> str:
+        return self.explain(text, profile)[0]
+
+    def classify_codes(self, texts: Sequence[str], profile: str) -> array:
+        """
+        texts をまとめて判定し、category code の array("B") を返す。
+        """
+        decide = self._deciders.get(profile)
+        if decide is None:
+            raise KeyError(f"unknown constraint rule profile: {profile!r}")
+        codes = self._codes[profile]
+        default_code = codes[-1]
+        return array("B", [
+            codes[decide(t, t.lower())] if t else default_code
+            for t in texts
+        ])
+
+
+# ------------------------------------------------------------
+# Compile: rules → 判定関数
+# ------------------------------------------------------------
+
+def _group_expr(group: _Group) -> str:
+    if group.ignore_case:
+        tests = [f"{p.lower()!r} in lower" for p in group.patterns]
+    else:
+        tests = [f"{p!r} in t" for p in group.patterns]
+    return "(" + " or ".join(tests) + ")"
+
+
+def _build_decider(rules: Tuple[_Rule, ...]) -> Callable[[str, str], int]:
+    """
+    rules（priority 順）を 1 つの関数 decide(t, lower) -> rule index（該当なしは -1）にする。
+    when のグループは記載順に短絡評価されるため、絞り込みの強いグループを先に書くと速い。
+    """
+    lines = ["def decide(t, lower):"]
+    for idx, rule in enumerate(rules):
+        cond = " and ".join(_group_expr(g) for g in rule.when)
+        if rule.unless:
+            cond += " and not (" + " or ".join(_group_expr(g) for g in rule.unless) + ")"
+        lines.append(f"    if {cond}:")
+        lines.append(f"        return {idx}")
+    lines.append("    return -1")
+
+    namespace: Dict[str, Any] = {}
+    exec(compile("\n".join(lines), "<constraint_rules>", "exec"), namespace)
+    return namespace["decide"]
+
+
+def _parse_group(raw: Any, sets: Mapping[str, Any], where: str) -> _Group:
+    """
+    グループ表記 → _Group
+      - ["a", "b"]                       : case-sensitive
+      - {"any": [...], "ignore_case": b} : ignore_case 指定
+      - "@name"                          : sets の参照
+    """
+    if isinstance(raw, str):
+        if not raw.startswith("@") or raw[1:] not in sets:
+            raise RuleError(f"{where}: unknown set reference {raw!r}")
+        return _parse_group(sets[raw[1:]], {}, f"{where}{raw}")
+    if isinstance(raw, list):
+        raw = {"any": raw}
+    if not isinstance(raw, dict) or not isinstance(raw.get("any"), list) or not raw["any"]:
+        raise RuleError(f"{where}: group must be a non-empty list, {{'any': [...]}} or '@set'")
+    patterns = raw["any"]
+    if not all(isinstance(p, str) and p for p in patterns):
+        raise RuleError(f"{where}: patterns must be non-empty strings")
+    return _Group(tuple(patterns), bool(raw.get("ignore_case", False)))
+
+
+def compile_rules(doc: Mapping[str, Any], *, source: str = "<memory>") -> RuleSet:
+    """
+    規則ドキュメント（JSON を読んだ dict）を RuleSet にコンパイルする。
+    不正な規則は RuleError。
+    """
+    if not isinstance(doc, Mapping):
+        raise RuleError("rule document must be an object")
+
+    default = doc.get("default", "unknown")
+    if default not in _CATEGORIES:
+        raise RuleError(f"default must be one of {_CATEGORIES}")
+
+    profiles = doc.get("profiles")
+    if not isinstance(profiles, list) or not profiles:
+        raise RuleError("profiles must be a non-empty list")
+
+    sets = doc.get("sets") or {}
+    raw_rules = doc.get("rules")
+    if not isinstance(raw_rules, list):
+        raise RuleError("rules must be a list")
+
+    seen_ids = set()
+    compiled: List[Tuple[int, int, _Rule, Tuple[str, ...]]] = []
+    for order, raw in enumerate(raw_rules):
+        where = f"rules[{order}]"
+        if not isinstance(raw, dict):
+            raise RuleError(f"{where}: rule must be an object")
+        rule_id = raw.get("id")
+        if not isinstance(rule_id, str) or not rule_id or rule_id in seen_ids:
+            raise RuleError(f"{where}: id must be a unique non-empty string")
+        seen_ids.add(rule_id)
+        where = f"rule {rule_id}"
+
+        category = raw.get("category")
+        if category not in ("hard", "soft"):
+            raise RuleError(f"{where}: category must be 'hard' or 'soft'")
+        priority = raw.get("priority", 0)
+        if not isinstance(priority, int):
+            raise RuleError(f"{where}: priority must be an integer")
+
+        when = raw.get("when")
+        if not isinstance(when, list) or not when:
+            raise RuleError(f"{where}: when must be a non-empty list of groups")
+        when_groups = tuple(
+            _parse_group(g, sets, f"{where}.when[{i}]") for i, g in enumerate(when)
+        )
+        unless_groups = tuple(
+            _parse_group(g, sets, f"{where}.unless[{i}]")
+            for i, g in enumerate(raw.get("unless") or [])
+        )
+
+        targets = raw.get("profiles", profiles)
+        if not isinstance(targets, list):
+            raise RuleError(f"{where}: profiles must be a list")
+        unknown = [p for p in targets if p not in profiles]
+        if unknown:
+            raise RuleError(f"{where}: unknown profiles {unknown}")
+
+        rule = _Rule(rule_id, category, priority, when_groups, unless_groups)
+        compiled.append((-priority, order, rule, tuple(targets)))
+
+    # priority 降順、同順位はファイル記載順
+    compiled.sort(key=lambda x: (x[0], x[1]))
+    rules_by_profile = {
+        p: tuple(rule for _, _, rule, targets in compiled if p in targets)
+        for p in profiles
+    }
+
+    return RuleSet(
+        version=doc.get("version"),
+        default=default,
+        rules_by_profile=rules_by_profile,
+        source=source,
+        rule_count=len(compiled),
+    )
+
+
+def load_rules(path: str) -> RuleSet:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuleError(f"cannot read rule file {path}: {e}") from e
+    return compile_rules(doc, source=path)
+
+
+# ------------------------------------------------------------
+# Active rule set
+# ------------------------------------------------------------
+
+_lock = threading.Lock()
+_active: RuleSet = load_rules(RULES_PATH)
+_reloads = 0
+_last_error: Optional[str] = None
+
+
+def active_rules() -> RuleSet:
+    return _active
+
+
+def classify(text: str, profile: str) -> str:
+    """
+    MEMO_MIN_CHARS 以上のテキストの分類結果は、正規化済みテキストのハッシュで
+    memo される（classify_cache）。memo には category code を保存する（classify_batch と共有）。
+    """
+    rs = _active
+    if len(text) < MEMO_MIN_CHARS:
+        return rs.classify(text, profile)
+    code = memo_classify(
+        _memo_namespace(profile),
+        text,
+        lambda t: CATEGORY_NAMES.index(rs.classify(t, profile)),
+        version=rs.generation,
+    )
+    return CATEGORY_NAMES[code]
+
+
+def classify_batch(texts: Sequence[str], profile: str) -> array:
+    """
+    texts をまとめて分類する。MEMO_MIN_CHARS 以上のものだけ memo を引く。
+    """
+    rs = _active
+    long_idx = [i for i, t in enumerate(texts) if len(t) >= MEMO_MIN_CHARS]
+    if not long_idx:
+        return rs.classify_codes(texts, profile)
+
+    codes = array("B", bytes(len(texts)))
+    short_idx = [i for i, t in enumerate(texts) if len(t) < MEMO_MIN_CHARS]
+    if short_idx:
+        short_codes = rs.classify_codes([texts[i] for i in short_idx], profile)
+        for i, code in zip(short_idx, short_codes):
+            codes[i] = code
+
+    memoized = memo_classify_many(
+        _memo_namespace(profile),
+        [texts[i] for i in long_idx],
+        lambda miss: rs.classify_codes(miss, profile),
+        version=rs.generation,
+    )
+    for i, code in zip(long_idx, memoized):
+        codes[i] = code
+    return codes
+
+
+def _memo_namespace(profile: str) -> str:
+    return "constraint:" + profile
+
+
+def reload_rules(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    規則ファイルを読み直して差し替える。失敗時は旧規則のまま ok=False を返す。
+    現在の profile / REQUIRED_PROFILES のいずれかを定義しない規則も失敗として扱う。
+    """
+    global _active, _reloads, _last_error
+
+    target = path or _active.source
+    with _lock:
+        try:
+            fresh = load_rules(target)
+            missing = sorted((set(REQUIRED_PROFILES) | set(_active.profiles)) - set(fresh.profiles))
+            if missing:
+                raise RuleError(f"{target}: profiles missing from reloaded rules: {missing}")
+        except RuleError as e:
+            _last_error = str(e)
+            return {"ok": False, "error": _last_error, **rules_status()}
+
+        _active = fresh
+        _reloads += 1
+        _last_error = None
+
+    # 正規化済み TB / TB プロンプト / 分類 memo は旧規則で作られているため破棄する
+    from ovv.brain.tb_prompt_cache import clear_prompt_cache
+    clear_prompt_cache()
+    clear_classify_cache()
+
+    return {"ok": True, **rules_status()}
+
+
+def rules_status() -> Dict[str, Any]:
+    rs = _active
+    return {
+        "source": rs.source,
+        "version": rs.version,
+        "rules": rs.rule_count,
+        "profiles": list(rs.profiles),
+        "loaded_at": rs.loaded_at,
+        "reloads": _reloads,
+        "last_error": _last_error,
+    }
+
+
+__all__ = [
+    "CATEGORY_NAMES",
+    "CODE_HARD",
+    "CODE_SOFT",
+    "CODE_UNKNOWN",
+    "REQUIRED_PROFILES",
+    "RuleError",
+    "RuleSet",
+    "active_rules",
+    "classify",
+    "classify_batch",
+    "compile_rules",
+    "load_rules",
+    "reload_rules",
+    "rules_status",
+]
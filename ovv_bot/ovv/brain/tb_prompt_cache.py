@@ -0,0 +1,113 @@
+# ovv/brain/tb_prompt_cache.py
+# ============================================================
+# MODULE CONTRACT: Brain / TB Prompt Memo v1.2
+#
+# ROLE:
+#   - TB（Thread Brain）由来のプロンプト組み立て結果を
+#     「TB fingerprint」で再利用する。
+#
+# RESPONSIBILITY TAGS:
+#   [FINGERPRINT] (meta.context_key, meta.revision)。revision は generator が TB 生成のたびに刻印する
+#   [PROMPT]      (kind, fingerprint) → 組み立て済みプロンプト
+#   [NORMALIZE]   fingerprint → 正規化済み TB（読み取り専用で共有）
+#   [OBSERVE]     hit / miss / eviction
+#
+# CONSTRAINTS:
+#   - fingerprint は O(1)（内容のハッシュは組み立てより高くつくため使わない）
+#   - meta.revision を持たない TB（旧データ・手組みの TB）はキャッシュしない（毎回組み立てる）
+#   - revision 刻印後の TB を書き換えないこと。変更する側は新しい revision を刻印する
+#   - 外部 I/O を行わない
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Tuple
+import os
+
+from ovv.bis.utils.lru import BoundedLRU
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+PROMPT_CACHE_MAX_ITEMS = int(os.getenv("OVV_TB_PROMPT_CACHE_MAX_ITEMS", "256"))
+
+
+_prompts = BoundedLRU(PROMPT_CACHE_MAX_ITEMS)
+_normalized = BoundedLRU(PROMPT_CACHE_MAX_ITEMS)
+
+_MISSING = object()
+
+
+# ------------------------------------------------------------
+# Fingerprint
+# ------------------------------------------------------------
+
+def tb_fingerprint(summary: Any) -> Optional[Tuple[Any, ...]]:
+    """
+    TB の fingerprint。キャッシュ不可なら None。
+      (context_key, meta.revision)
+    """
+    if not isinstance(summary, dict):
+        return None
+    meta = summary.get("meta")
+    if not isinstance(meta, dict):
+        return None
+    revision = meta.get("revision")
+    if not isinstance(revision, str) or not revision:
+        return None
+    context_key = meta.get("context_key")
+    if not isinstance(context_key, (str, int)):
+        context_key = None
+    return (context_key, revision)
+
+
+# ------------------------------------------------------------
+# Memo
+# ------------------------------------------------------------
+
+def memo_prompt(kind: str, fingerprint: Optional[Tuple[Any, ...]], build: Callable[[], str]) -> str:
+    """
+    (kind, fingerprint) で組み立て済みプロンプトを引く。miss 時のみ build() する。
+    fingerprint が None なら常に build() する。
+    """
+    if fingerprint is None:
+        return build()
+    key = (kind, fingerprint)
+    cached = _prompts.get(key)
+    if cached is not None:
+        return cached
+    text = build()
+    _prompts.put(key, text)
+    return text
+
+
+def memo_normalized(fingerprint: Optional[Tuple[Any, ...]], build: Callable[[], Any]) -> Any:
+    """
+    正規化済み TB を fingerprint で共有する（戻り値は読み取り専用として扱うこと）。
+    """
+    if fingerprint is None:
+        return build()
+    cached = _normalized.get(fingerprint, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    value = build()
+    _normalized.put(fingerprint, value)
+    return value
+
+
+# ------------------------------------------------------------
+# Observe
+# ------------------------------------------------------------
+
+def prompt_cache_stats() -> Dict[str, Any]:
+    return {
+        "prompts": _prompts.stats(),
+        "normalized": _normalized.stats(),
+    }
+
+
+def clear_prompt_cache() -> None:
+    _prompts.clear()
+    _normalized.clear()
@@ -8,9 +8,16 @@
 # 責務:
 # - 既存の decisions / unresolved / constraints / next_actions を並べ替えるだけ。
 # - 新しい制約や方針を勝手に捏造しない。
+# - TB fingerprint が同じなら前回の結果を再利用する（tb_prompt_cache）。
 
 from typing import Optional, Dict, List, Any
 
+from ovv.brain.tb_prompt_cache import memo_prompt, tb_fingerprint
+from ovv.observability.stage_metrics import stage_timer
+
+
+STAGE_TB_SCORING_PROMPT_BUILD = "tb.scoring_prompt_build"
+
 
 def build_scoring_prompt(summary: Optional[Dict[str, Any]]) -> str:
     """
@@ -20,6 +27,15 @@ def build_scoring_prompt(summary: Optional[Dict[str, Any]]) -> str:
     if not summary:
         return "[TB-Scoring]\nNo summary available. Prioritize clarity and ask user to restate intent."
 
+    with stage_timer(STAGE_TB_SCORING_PROMPT_BUILD):
+        return memo_prompt(
+            "scoring",
+            tb_fingerprint(summary),
+            lambda: _build_scoring_prompt(summary),
+        )
+
+
+def _build_scoring_prompt(summary: Dict[str, Any]) -> str:
     status = summary.get("status", {}) or {}
     decisions: List[Any] = summary.get("decisions", []) or []
     unresolved: List[Any] = summary.get("unresolved", []) or []
@@ -21,14 +21,36 @@
 #   - store_constraints_hard
 #   - alter_core_meaning
 #   - control_output_format
+#
+# MEMO:
+#   - build_tb_prompt / v1・v2 の正規化結果は TB fingerprint
+#     （meta.context_key + meta.revision）で再利用する（tb_prompt_cache）。
+#   - normalize_thread_brain の戻り値は最上位 dict のみ新しい。入れ子の list / dict は
+#     キャッシュと共有するので変更しないこと（v3 入力はそもそも入力そのものを返す）。
+
+from typing import Optional, Dict, Any, List, Tuple
+import copy
+
+from ovv.brain.constraint_rules import (
+    CODE_HARD,
+    classify as classify_constraint,
+    classify_batch as classify_constraint_batch,
+)
+from ovv.brain.tb_prompt_cache import memo_normalized, memo_prompt, tb_fingerprint
+from ovv.observability.stage_metrics import stage_timer
 
-from typing import Optional, Dict, Any, List
+
+STAGE_TB_PROMPT_BUILD = "tb.prompt_build"
 
 
 # ============================================================
 # 内部ヘルパ: 制約分類（soft / hard / unknown）
 # ============================================================
 
+# 規則本体は ovv/brain/constraint_rules.json（profile: tb_adapter）
+CONSTRAINT_RULE_PROFILE = "tb_adapter"
+
+
 def _extract_constraint_text(item: Any) -> str:
     """
     v1 互換用:
@@ -54,80 +76,8 @@ def _classify_constraint_text(text: str) -> str:
         return "unknown"
 
     t = text.strip()
-    lower = t.lower()
-
-    # 否定系フレーズ（〜を含めてはならない / 〜を含めちゃダメ 等）
-    forbid_phrases = [
-        "含めない",
-        "含めるな",
-        "含めず",
-        "含めてはならない",
-        "含めてはいけない",
-        "含めてはいけません",
-        "含めちゃダメ",
-        "含んではいけない",
-        "含んではならない",
-    ]
-
-    def _has_forbid_phrase(s: str) -> bool:
-        return any(p in s for p in forbid_phrases) or "禁止" in s
-
-    # -------------------------
-    # 1) 明確な "hard" パターン
-    # -------------------------
-
-    # JSON / YAML / XML などフォーマット強制
-    if "json" in lower or "yaml" in lower or "xml" in lower:
-        # 「jsonで返す」「json形式」「jsonオブジェクト」など
-        if ("返" in t or "形式" in t or "オブジェクト" in t or "only" in lower
-                or "のみ" in t):
-            return "hard"
-
-    # マークダウン・説明文などを「含めるな/禁止」のパターン
-    if "マークダウン" in t and _has_forbid_phrase(t):
-        return "hard"
-    if "説明文" in t and _has_forbid_phrase(t):
-        return "hard"
-
-    # 構造化データ・オブジェクト系を「〜のみ」「〜だけ」「〜で返せ」と強制
-    if ("構造化データ" in t or "オブジェクト" in t):
-        if "のみ" in t or "だけ" in t or "だけを返す" in t or "のみを返す" in t or "で返せ" in t:
-            return "hard"
-
-    # システム・プロンプト越境系（英語簡易）
-    if "ignore the system prompt" in lower or "override the system prompt" in lower:
-        return "hard"
-    if "jailbreak" in lower:
-        return "hard"
-
-    # -------------------------
-    # 2) 明確な "soft" パターン
-    # -------------------------
-
-    # 敬語/タメ口など会話スタイル
-    if "敬語" in t:
-        return "soft"
-    if "タメ口" in t or "ため口" in t:
-        return "soft"
-
-    # 長さ・簡潔さ
-    if "短く" in t or "簡潔" in t:
-        return "soft"
-
-    # 言語指定（日本語/英語で話す等）※形式ではなく会話ルールとみなす
-    if "日本語" in t and ("話す" in t or "答える" in t):
-        return "soft"
-    if "英語" in t and ("話す" in t or "答える" in t):
-        return "soft"
-
-    # スレッド用途
-    if "このスレ" in t or "このスレッド" in t:
-        return "soft"
-
-    # -------------------------
-    # 3) 判定不能 → unknown（上位ロジックで soft 側に寄せる）
-    # -------------------------
-    return "unknown"
+
+    return classify_constraint(t, CONSTRAINT_RULE_PROFILE)
 
 
 def _split_constraints_v1(constraints: List[Any]) -> Dict[str, List[str]]:
@@ -136,16 +86,13 @@ def _split_constraints_v1(constraints: List[Any]) -> Dict[str, List[str]]:
     - hard は破棄対象（TB v3 では保持しない）
     - unknown は安全側で soft に寄せる
     """
+    texts = [t for t in (_extract_constraint_text(item) for item in constraints) if t]
+    codes = classify_constraint_batch([t.strip() for t in texts], CONSTRAINT_RULE_PROFILE)
+
     soft: List[str] = []
     hard: List[str] = []
-
-    for item in constraints:
-        text = _extract_constraint_text(item)
-        if not text:
-            continue
-
-        cls = _classify_constraint_text(text)
-        if cls == "hard":
+    for text, code in zip(texts, codes):
+        if code == CODE_HARD:
             # hard は TB v3 では保持しない（後続で破棄）
             hard.append(text)
         else:
@@ -225,13 +172,7 @@ def _upgrade_to_v3(summary: Dict[str, Any]) -> Dict[str, Any]:
     return v3
 
 
-def normalize_thread_brain(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    """
-    Public API:
-      - v1/v2/v3 いずれの TB でも受け取り、
-        v3 形式（constraints_soft のみ）に正規化して返す。
-      - None の場合は None を返す。
-    """
+def _normalize_uncached(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     if summary is None:
         return None
 
@@ -253,6 +194,52 @@ def normalize_thread_brain(summary: Optional[Dict[str, Any]]) -> Optional[Dict[s
     return _upgrade_to_v3(summary)
 
 
+def _needs_upgrade(summary: Any) -> bool:
+    if not isinstance(summary, dict):
+        return False
+    meta = summary.get("meta") or {}
+    return not str(meta.get("version", "")).strip().startswith("3")
+
+
+def _normalized_shared(
+    summary: Optional[Dict[str, Any]],
+    fingerprint: Optional[Tuple[Any, ...]],
+) -> Optional[Dict[str, Any]]:
+    """
+    読み取り専用の正規化 TB。
+    v1/v2 のアップグレード結果のみ fingerprint で共有する（v3 はそのまま素通し）。
+    """
+    if not _needs_upgrade(summary):
+        return _normalize_uncached(summary)
+    # 入力とリストを共有しないよう、キャッシュに入れる時点で切り離す
+    return memo_normalized(fingerprint, lambda: copy.deepcopy(_normalize_uncached(summary)))
+
+
+def _detach(tb: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    共有中の正規化 TB の浅いコピー（最上位のキーの差し替えは可。入れ子は読み取り専用）。
+    """
+    return dict(tb)
+
+
+def normalize_thread_brain(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Public API:
+      - v1/v2/v3 いずれの TB でも受け取り、
+        v3 形式（constraints_soft のみ）に正規化して返す。
+      - None の場合は None を返す。
+      - v1/v2 のアップグレード結果は fingerprint で再利用し、浅いコピーを返す
+        （入れ子の list / dict は読み取り専用）。
+    """
+    if not _needs_upgrade(summary):
+        return _normalize_uncached(summary)
+
+    fingerprint = tb_fingerprint(summary)
+    if fingerprint is None:
+        return _normalize_uncached(summary)
+    return _detach(_normalized_shared(summary, fingerprint))  # type: ignore[arg-type]
+
+
 # ============================================================
 # TB Prompt Builder
 # ============================================================
@@ -262,9 +249,22 @@ def build_tb_prompt(thread_brain: Optional[Dict[str, Any]]) -> str:
     TB v3 を前提に、LLM へ渡す [TB] プロンプトを構築する。
     - None の場合は最小限のプレースホルダを返す。
     - v1/v2 の場合も normalize_thread_brain で v3 に揃える。
+    - 同一 fingerprint の TB では前回の結果を返す（所要時間は tb.prompt_build）。
     """
-
-    tb_v3 = normalize_thread_brain(thread_brain)
+    with stage_timer(STAGE_TB_PROMPT_BUILD):
+        fingerprint = tb_fingerprint(thread_brain)
+        return memo_prompt(
+            "tb",
+            fingerprint,
+            lambda: _build_tb_prompt(thread_brain, fingerprint),
+        )
+
+
+def _build_tb_prompt(
+    thread_brain: Optional[Dict[str, Any]],
+    fingerprint: Optional[Tuple[Any, ...]],
+) -> str:
+    tb_v3 = _normalized_shared(thread_brain, fingerprint)
     if tb_v3 is None:
         return "[TB]\nNo thread brain available."
 
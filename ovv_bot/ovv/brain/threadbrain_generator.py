@@ -15,6 +15,7 @@ MUST:
   - Ovv スレッドの「目的・経緯・決定・未解決・次アクション」を中心に要約する。
   - 出力は JSON テキストではなく Python dict として返す。
   - LLM への問い合わせは 1 回以内に抑える。
+  - 返す TB には毎回新しい meta.revision を刻印する（prompt memo のキー。TB は刻印後に書き換えない）。
 
 MUST_NOT:
   - Discord向けの最終回答を生成しない（それは Ovv Core / Stabilizer の責務）。
@@ -26,18 +27,23 @@ from __future__ import annotations
 from typing import List, Dict, Any
 from datetime import datetime, timezone
 import json
+import uuid
 
-from openai import OpenAI
-from config import OPENAI_API_KEY
+from ovv.external_services.llm.llm_client import chat_completion
 
-# OpenAI Client（ovv_call と揃える）
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+TB_MODEL = "gpt-4.1-mini"
+TB_TEMPERATURE = 0.1
 
 
 def _now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _new_revision() -> str:
+    # TB の版（tb_prompt_cache のキー）。生成のたびに一意
+    return uuid.uuid4().hex
+
+
 def _build_conversation_digest(runtime_memory: List[Dict[str, Any]], limit: int = 30) -> str:
     """
     Runtime Memory を LLM 向けのプレーンテキストにまとめる。
@@ -102,11 +108,25 @@ def _build_tb_system_prompt() -> str:
     )
 
 
-def generate_tb_summary(context_key: int, runtime_memory: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _is_json_object(text: str) -> bool:
+    try:
+        return isinstance(json.loads(text), dict)
+    except Exception:
+        return False
+
+
+def generate_tb_summary(
+    context_key: int,
+    runtime_memory: List[Dict[str, Any]],
+    *,
+    bypass_cache: bool = False,
+) -> Dict[str, Any]:
     """
     Runtime Memory から Thread Brain JSON(dict) を生成する。
 
     database.pg.generate_thread_brain から呼ばれる前提。
+    runtime_memory が変わっていなければ LLM 応答キャッシュから返る
+    （強制再生成は bypass_cache=True）。
     """
     # メモリが空なら、最小限の TB を返す
     if not runtime_memory:
@@ -114,6 +134,7 @@ def generate_tb_summary(context_key: int, runtime_memory: List[Dict[str, Any]])
             "meta": {
                 "version": "3.0",
                 "updated_at": _now_utc_iso(),
+                "revision": _new_revision(),
                 "context_key": context_key,
                 "total_tokens_estimate": 0,
             },
@@ -143,19 +164,16 @@ def generate_tb_summary(context_key: int, runtime_memory: List[Dict[str, Any]])
     )
 
     try:
-        resp = openai_client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.1,
+        # 同一 runtime_memory からの同時生成は llm_client 側で 1 回に集約される
+        raw_content = chat_completion(
+            model=TB_MODEL,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=TB_TEMPERATURE,
+            bypass_cache=bypass_cache,
+            cache_if=_is_json_object,
         )
 
-        # 新 SDK 形式：ChatCompletionMessage から content を取り出す
-        raw_msg = resp.choices[0].message
-        raw_content = raw_msg.content or ""
-
         # JSON パースを試みる
         tb_json = json.loads(raw_content)
 
@@ -164,7 +182,9 @@ def generate_tb_summary(context_key: int, runtime_memory: List[Dict[str, Any]])
             tb_json["meta"] = {}
         tb_meta = tb_json["meta"]
         tb_meta.setdefault("version", "3.0")
-        tb_meta.setdefault("updated_at", _now_utc_iso())
+        # updated_at / revision は LLM の値を信用せず毎回刻印する（revision は prompt memo のキー）
+        tb_meta["updated_at"] = _now_utc_iso()
+        tb_meta["revision"] = _new_revision()
         tb_meta.setdefault("context_key", context_key)
         tb_meta.setdefault("total_tokens_estimate", len(conv_text.split()))
 
@@ -193,6 +213,7 @@ def generate_tb_summary(context_key: int, runtime_memory: List[Dict[str, Any]])
             "meta": {
                 "version": "3.0",
                 "updated_at": _now_utc_iso(),
+                "revision": _new_revision(),
                 "context_key": context_key,
                 "total_tokens_estimate": len(conv_text.split()),
             },
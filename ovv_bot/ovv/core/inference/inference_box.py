@@ -1,5 +1,130 @@
-from typing import Tuple, Dict, Any
+# ============================================================
+# MODULE CONTRACT: CORE / Inference / Inference Box v0.2
+#
+# ROLE:
+#   - free_chat の推論段。
+#     Snapshot → Prompt → LLM → InferenceOutput(advice + draft_ops) → volatile 反映
+#
+# RESPONSIBILITY TAGS:
+#   [SNAPSHOT]    snapshot_builder.build_snapshot の出力を入力とする
+#   [INFER]       llm_client.chat_completion（provider 差し替え可）を非同期で呼ぶ
+#   [CONTRACT]    出力は bis/wbs/contracts.py の InferenceOutput / DraftOp
+#   [DEADLINE]    全段を OVV_INFERENCE_TIMEOUT_SEC 以内に収め、超過時はフォールバック
+#                 worker thread 側も追記直前に期限を確認し、期限後は書き込まない
+#                 （期限直前に始まった追記 1 回分だけは、タイムアウト後に完了しうる）
+#   [LATENCY]     snapshot / prompt_build / model_call / apply_ops の段階別計測
+#   [PERSIST]     draft_ops は 1 回の応答につき 1 イベント（thread_wbs_events.apply_op）として追記
+#
+# CONSTRAINTS:
+#   - stable（work_items / focus_point / status）を変更しない（volatile のみ）
+#   - 例外・タイムアウトで free_chat を落とさない（handle_free_chat へフォールバック）
+#   - Discord / Notion を触らない
+# ============================================================
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import time
+
 from ovv.bis.types import InputPacket
+from ovv.bis.wbs.contracts import (
+    Advice,
+    DraftOp,
+    InferenceInput,
+    InferenceOutput,
+    assert_ops_are_volatile_only,
+)
+from ovv.bis.wbs import thread_wbs_events as wbs_events
+from ovv.external_services.llm.llm_client import chat_completion
+from ovv.observability.checkpoint_log import log_event
+from ovv.observability.stage_metrics import stage_timer
+from database import pg_wbs
+
+from .snapshot_builder import build_snapshot
+from .snapshot_types import InferenceSnapshot
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+INFERENCE_TIMEOUT_SEC = float(os.getenv("OVV_INFERENCE_TIMEOUT_SEC", "20"))
+INFERENCE_MODEL = os.getenv("OVV_INFERENCE_MODEL", "gpt-4.1-mini")
+INFERENCE_TEMPERATURE = float(os.getenv("OVV_INFERENCE_TEMPERATURE", "0.3"))
+
+STAGE_SNAPSHOT = "inference.snapshot"
+STAGE_PROMPT_BUILD = "inference.prompt_build"
+STAGE_MODEL_CALL = "inference.model_call"
+STAGE_APPLY_OPS = "inference.apply_ops"
+
+_ADVICE_KINDS = ("summary", "options", "question")
+_DRAFT_OP_KINDS = (
+    "append_draft",
+    "discard_draft",
+    "set_intent",
+    "append_question",
+    "mark_question_answered",
+)
+
+
+# ------------------------------------------------------------
+# Debugging Subsystem v1.0 — Checkpoints
+# ------------------------------------------------------------
+
+LAYER_CORE = "CORE"
+
+CP_CORE_INFERENCE_DONE = "CORE_INFERENCE_DONE"
+CP_CORE_INFERENCE_FALLBACK = "CORE_INFERENCE_FALLBACK"
+
+
+def _log_event(
+    *,
+    trace_id: str,
+    checkpoint: str,
+    level: str,
+    summary: str,
+    extra: Optional[Dict[str, Any]] = None,
+) -> None:
+    log_event(
+        trace_id=trace_id,
+        checkpoint=checkpoint,
+        layer=LAYER_CORE,
+        level=level,
+        summary=summary,
+        extra=extra,
+    )
+
+
+# ------------------------------------------------------------
+# Result
+# ------------------------------------------------------------
+
+@dataclass
+class InferenceResult:
+    """
+    Core(free_chat) に返す推論段の結果。
+    - reply: Discord 向け本文（advice 整形済み / フォールバック文）
+    - wbs: draft_ops 適用後の WBS（apply_ops=False / WBS 未作成時は None）
+    - stage_ms: 段階別所要時間(ms)
+    - fallback: フォールバック理由（正常時 None）
+    - apply_error: volatile 反映の失敗理由（reply は advice のまま返す）
+    """
+    output: InferenceOutput
+    reply: str
+    snapshot: InferenceSnapshot = field(default_factory=dict)  # type: ignore[assignment]
+    wbs: Optional[Dict[str, Any]] = None
+    stage_ms: Dict[str, float] = field(default_factory=dict)
+    fallback: Optional[str] = None
+    apply_error: Optional[str] = None
+
+
+# ------------------------------------------------------------
+# Rule-based fallback（推論しない）
+# ------------------------------------------------------------
 
 def handle_free_chat(packet: InputPacket) -> Tuple[str, Dict[str, Any]]:
     """
@@ -24,4 +149,253 @@ def handle_free_chat(packet: InputPacket) -> Tuple[str, Dict[str, Any]]:
         "確定するなら !wy / !we を使ってくれ。"
     )
 
-    return reply, volatile_patch
\ No newline at end of file
+    return reply, volatile_patch
+
+
+# ------------------------------------------------------------
+# Prompt
+# ------------------------------------------------------------
+
+def _build_input(packet: InputPacket, snapshot: InferenceSnapshot) -> InferenceInput:
+    wbs = snapshot.get("wbs") or {}
+    user_meta = getattr(packet, "user_meta", None)
+    user_id = str(user_meta.get("user_id") or "") if isinstance(user_meta, dict) else ""
+
+    return InferenceInput(
+        context_key=str(snapshot.get("context_key") or getattr(packet, "context_key", "") or ""),
+        task_id=str(getattr(packet, "task_id", "") or ""),
+        user_id=user_id,
+        message_text=str(getattr(packet, "content", "") or "").strip(),
+        wbs=dict(wbs),  # type: ignore[arg-type]
+        volatile=dict(wbs.get("volatile") or {}),  # type: ignore[arg-type]
+        trace_id=packet.get_trace_id() if isinstance(packet, InputPacket) else "UNKNOWN",
+    )
+
+
+def _build_system_prompt() -> str:
+    return (
+        "You are Ovv's inference box for a Discord work thread.\n"
+        "Read the thread's WBS snapshot and the user's message, then return a JSON object:\n"
+        "  {\n"
+        '    "advice": [{"kind": "summary" | "options" | "question", "text": string}],\n'
+        '    "draft_ops": [\n'
+        '      {"op": "append_draft", "draft": {"kind": "work_item_candidate" | "note" | "decision_candidate" | "question", "text": string, "confidence": "low" | "mid" | "high"}},\n'
+        '      {"op": "set_intent", "intent": {"state": "unconfirmed" | "candidate", "summary": string}},\n'
+        '      {"op": "append_question", "question": {"text": string}},\n'
+        '      {"op": "discard_draft", "draft_id": string},\n'
+        '      {"op": "mark_question_answered", "q_id": string}\n'
+        "    ]\n"
+        "  }\n\n"
+        "IMPORTANT:\n"
+        "- Never confirm or edit work_items. Only propose drafts; the user confirms with !wy / !we.\n"
+        "- Reply in the user's language. Keep advice short.\n"
+        "- Return ONLY the JSON text. No explanation, no markdown, no backticks.\n"
+    )
+
+
+def _build_user_prompt(inp: InferenceInput) -> str:
+    wbs = inp.wbs or {}
+    vol = inp.volatile or {}
+
+    lines: List[str] = ["[WBS]"]
+    if wbs:
+        lines.append(f"task: {wbs.get('task') or ''}")
+        lines.append(f"status: {wbs.get('status') or ''}")
+        lines.append(f"focus_point: {wbs.get('focus_point')}")
+        for i, it in enumerate(wbs.get("work_items") or []):
+            if isinstance(it, dict):
+                lines.append(f"- {i}: {it.get('rationale', '')} [{it.get('status', '') or 'open'}]")
+    else:
+        lines.append("(no task yet)")
+
+    drafts = [d for d in vol.get("drafts") or [] if isinstance(d, dict) and d.get("status") == "open"]
+    questions = [q for q in vol.get("open_questions") or [] if isinstance(q, dict) and q.get("status") == "open"]
+    if drafts or questions:
+        lines.append("\n[VOLATILE]")
+        for d in drafts[-10:]:
+            lines.append(f"- draft {d.get('draft_id')}: {d.get('text', '')}")
+        for q in questions[-10:]:
+            lines.append(f"- question {q.get('q_id')}: {q.get('text', '')}")
+
+    lines.append("\n[USER_MESSAGE]")
+    lines.append(inp.message_text)
+    return "\n".join(lines)
+
+
+# ------------------------------------------------------------
+# Output parsing (contract guard)
+# ------------------------------------------------------------
+
+def _is_json_object(text: str) -> bool:
+    try:
+        return isinstance(json.loads(text), dict)
+    except Exception:
+        return False
+
+
+def _parse_output(raw: str, inp: InferenceInput) -> InferenceOutput:
+    """
+    LLM 応答(JSON) → InferenceOutput。
+    契約外の advice / op は捨てる（stable 変更 op は通さない）。
+    """
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("inference output is not a JSON object")
+
+    advice: List[Advice] = []
+    for a in data.get("advice") or []:
+        if not isinstance(a, dict):
+            continue
+        kind = a.get("kind")
+        text = str(a.get("text") or "").strip()
+        if kind in _ADVICE_KINDS and text:
+            advice.append(Advice(kind=kind, text=text))
+
+    ops: List[DraftOp] = []
+    for op in data.get("draft_ops") or []:
+        if isinstance(op, dict) and op.get("op") in _DRAFT_OP_KINDS:
+            op = dict(op)
+            op["task_id"] = inp.task_id
+            ops.append(op)  # type: ignore[arg-type]
+
+    assert_ops_are_volatile_only(ops)
+    return InferenceOutput(advice=advice, draft_ops=ops, trace_id=inp.trace_id)
+
+
+def _format_reply(output: InferenceOutput) -> str:
+    parts: List[str] = []
+    for a in output.advice:
+        if a.kind == "options":
+            parts.append("[Options]\n" + a.text)
+        elif a.kind == "question":
+            parts.append("[Question]\n" + a.text)
+        else:
+            parts.append(a.text)
+    return "\n\n".join(parts).strip()
+
+
+# ------------------------------------------------------------
+# Apply (volatile only)
+# ------------------------------------------------------------
+
+def _apply_ops(
+    context_key: str,
+    ops: List[DraftOp],
+    trace_id: str,
+    deadline_at: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    最新 WBS に draft_ops を適用し、1 イベントとして追記する。WBS 未作成なら何もしない。
+    deadline_at（time.monotonic 基準）を過ぎていたら追記しない
+    （wait_for が打ち切っても worker thread は止まらないため、ここで確認する）。
+    """
+    if not ops:
+        return pg_wbs.load_thread_wbs(context_key)
+    if deadline_at is not None and time.monotonic() >= deadline_at:
+        raise TimeoutError("inference deadline passed before apply_ops")
+    wbs, _ = wbs_events.apply_op(context_key, "apply_draft_ops", trace_id=trace_id, ops=list(ops))
+    return wbs
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+async def _run(
+    packet: InputPacket,
+    result: InferenceResult,
+    *,
+    snapshot: Optional[InferenceSnapshot],
+    apply_ops: bool,
+    deadline_at: Optional[float] = None,
+) -> None:
+    stage_ms = result.stage_ms
+    context_key = str(getattr(packet, "context_key", "") or "")
+
+    with stage_timer(STAGE_SNAPSHOT, stage_ms):
+        if snapshot is None:
+            snapshot = await asyncio.to_thread(build_snapshot, context_key=context_key)
+    result.snapshot = snapshot
+
+    with stage_timer(STAGE_PROMPT_BUILD, stage_ms):
+        inp = _build_input(packet, snapshot)
+        system_prompt = _build_system_prompt()
+        user_prompt = _build_user_prompt(inp)
+
+    with stage_timer(STAGE_MODEL_CALL, stage_ms):
+        raw = await asyncio.to_thread(
+            chat_completion,
+            model=INFERENCE_MODEL,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=INFERENCE_TEMPERATURE,
+            cache_if=_is_json_object,
+        )
+
+    with stage_timer(STAGE_APPLY_OPS, stage_ms):
+        output = _parse_output(raw, inp)
+        result.output = output
+        result.reply = _format_reply(output)
+        if apply_ops and context_key:
+            try:
+                result.wbs = await asyncio.to_thread(
+                    _apply_ops, context_key, list(output.draft_ops), inp.trace_id, deadline_at
+                )
+            except Exception as e:
+                # 反映失敗でも advice 自体は返す（volatile は次回以降に再提案される）
+                result.apply_error = f"{type(e).__name__}: {e}"
+
+
+async def run_free_chat_inference(
+    packet: InputPacket,
+    *,
+    timeout_sec: Optional[float] = None,
+    snapshot: Optional[InferenceSnapshot] = None,
+    apply_ops: bool = True,
+) -> InferenceResult:
+    """
+    free_chat 推論の唯一の入口（async）。
+
+    - snapshot 未指定時は build_snapshot(context_key) で構築する
+    - 全段を timeout_sec（既定 OVV_INFERENCE_TIMEOUT_SEC）以内に収める
+    - タイムアウト / 例外 / 空応答時は handle_free_chat の固定文にフォールバックする
+      （タイムアウト時は volatile へ書き込まない。ただし期限直前に始まった追記は完了しうる）
+    """
+    trace_id = packet.get_trace_id() if isinstance(packet, InputPacket) else "UNKNOWN"
+    deadline = INFERENCE_TIMEOUT_SEC if timeout_sec is None else timeout_sec
+
+    result = InferenceResult(output=InferenceOutput(trace_id=trace_id), reply="")
+    deadline_at = time.monotonic() + deadline
+
+    try:
+        await asyncio.wait_for(
+            _run(packet, result, snapshot=snapshot, apply_ops=apply_ops, deadline_at=deadline_at),
+            timeout=deadline,
+        )
+    except asyncio.TimeoutError:
+        result.fallback = f"timeout({deadline}s)"
+    except Exception as e:
+        result.fallback = f"{type(e).__name__}: {e}"
+
+    if not result.fallback and not result.reply:
+        result.fallback = "empty_advice"
+
+    if result.fallback:
+        result.reply, _ = handle_free_chat(packet)
+        _log_event(
+            trace_id=trace_id,
+            checkpoint=CP_CORE_INFERENCE_FALLBACK,
+            level="WARN",
+            summary=f"inference fallback: {result.fallback}",
+            extra={"stage_ms": result.stage_ms},
+        )
+    else:
+        _log_event(
+            trace_id=trace_id,
+            checkpoint=CP_CORE_INFERENCE_DONE,
+            level="DEBUG",
+            summary=f"inference done (advice={len(result.output.advice)}, ops={len(result.output.draft_ops)})",
+            extra={"stage_ms": result.stage_ms, "apply_error": result.apply_error},
+        )
+
+    return result
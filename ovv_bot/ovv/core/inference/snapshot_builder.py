@@ -99,6 +99,7 @@ def build_snapshot(*, context_key: str) -> InferenceSnapshot:
             status=wbs_raw.get("status"),
             focus_point=wbs_raw.get("focus_point"),
             work_items=wbs_raw.get("work_items", []),
+            volatile=wbs_raw.get("volatile") if isinstance(wbs_raw.get("volatile"), dict) else {},
         )
 
     return snapshot
\ No newline at end of file
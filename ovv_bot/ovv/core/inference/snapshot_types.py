@@ -32,6 +32,7 @@ class SnapshotWBS(TypedDict, total=False):
     status: str
     focus_point: Optional[int]
     work_items: List[SnapshotWorkItem]
+    volatile: Dict[str, Any]  # read-only（Inference の文脈用）
 
 
 class InferenceSnapshot(TypedDict, total=False):
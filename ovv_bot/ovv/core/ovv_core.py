@@ -1,8 +1,14 @@
 # ovv/core/ovv_core.py
 # ============================================================
-# MODULE CONTRACT: CORE / OvvCore v1.4.1 (STABLE + free_chat + wbs_show_full)
+# MODULE CONTRACT: CORE / OvvCore v1.6 (STABLE + free_chat + wbs_show_full)
 #
 # CHANGELOG:
+#   - v1.6:
+#       - WBS の更新を「load → builder → 全体 save」から操作イベントの追記に変更
+#         （thread_wbs_events.apply_op。builder 関数はそのまま reducer として使う）
+#   - v1.5:
+#       - handle_packet_async を追加（free_chat は推論箱を await、他は同期 dispatch）
+#       - 同期 free_chat は rule-based handle_free_chat に統一（壊れた import を除去）
 #   - v1.4.1:
 #       - Boundary_Gate v3.8.2 対応
 #       - "wbs_show_full" を追加（stable + volatile の可視化）
@@ -12,10 +18,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, List, Callable
+from typing import Any, Dict, Optional, List, Callable, Tuple
 
 from ovv.bis.types import InputPacket
-from ovv.bis.wbs import thread_wbs_builder as wbs_builder
+from ovv.bis.wbs import thread_wbs_events as wbs_events
+from ovv.core.inference.inference_box import handle_free_chat, run_free_chat_inference
 
 # Persist adapter（正規APIのみ使用）
 from database import pg_wbs
@@ -63,8 +70,8 @@ def _load_wbs(thread_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def _save_wbs(thread_id: str, wbs: Dict[str, Any]) -> None:
-    pg_wbs.save_thread_wbs(thread_id, wbs)
+def _apply_wbs_op(packet: InputPacket, op: str, **args: Any) -> Tuple[Optional[Dict[str, Any]], Any]:
+    return wbs_events.apply_op(_thread_id(packet), op, trace_id=getattr(packet, "trace_id", None), **args)
 
 
 def _mk_core_output(
@@ -135,6 +142,17 @@ def handle_packet(packet: InputPacket) -> CoreResult:
     return fn(packet)
 
 
+async def handle_packet_async(packet: InputPacket) -> CoreResult:
+    """
+    Interface_Box からの非同期入口。
+    - free_chat: 推論箱（snapshot → LLM → volatile 反映）を await する
+    - その他: 同期 handle_packet と同一（決定的 dispatch）
+    """
+    if getattr(packet, "command", None) == "free_chat":
+        return await _cmd_free_chat_async(packet)
+    return handle_packet(packet)
+
+
 # ============================================================
 # Commands
 # ============================================================
@@ -142,7 +160,6 @@ def handle_packet(packet: InputPacket) -> CoreResult:
 def _cmd_task_create(packet: InputPacket) -> CoreResult:
     thread_id = _thread_id(packet)
     raw_thread_name = _safe_meta_thread_name(packet)
-    trace_id = getattr(packet, "trace_id", None)
 
     existing = _load_wbs(thread_id)
     if isinstance(existing, dict) and existing.get("task"):
@@ -154,11 +171,9 @@ def _cmd_task_create(packet: InputPacket) -> CoreResult:
             core_output=_mk_core_output(mode="task_create", task_title=title),
         )
 
-    wbs = wbs_builder.create_empty_wbs(raw_thread_name, trace_id=trace_id)
+    wbs, _ = _apply_wbs_op(packet, "create", thread_name=raw_thread_name)
     title = _title_from_wbs(wbs)
 
-    _save_wbs(thread_id, wbs)
-
     core_output = _mk_core_output(mode="task_create", task_title=title)
     notion_ops = build_notion_ops(core_output, packet)
 
@@ -222,8 +237,7 @@ def _cmd_task_pause(packet: InputPacket) -> CoreResult:
     if not wbs:
         return CoreResult("WBS not found. Run !t first.", _empty_ops())
 
-    wbs = wbs_builder.on_task_pause(wbs, trace_id=getattr(packet, "trace_id", None))
-    _save_wbs(_thread_id(packet), wbs)
+    wbs = _apply_wbs_op(packet, "task_pause")[0] or wbs
 
     title = _title_from_wbs(wbs)
     core_output = _mk_core_output(mode="task_paused", task_title=title)
@@ -237,8 +251,7 @@ def _cmd_task_complete(packet: InputPacket) -> CoreResult:
     if not wbs:
         return CoreResult("WBS not found. Run !t first.", _empty_ops())
 
-    wbs = wbs_builder.on_task_complete(wbs, trace_id=getattr(packet, "trace_id", None))
-    _save_wbs(_thread_id(packet), wbs)
+    wbs = _apply_wbs_op(packet, "task_complete")[0] or wbs
 
     title = _title_from_wbs(wbs)
     core_output = _mk_core_output(mode="task_end", task_title=title)
@@ -253,8 +266,7 @@ def _cmd_wbs_accept(packet: InputPacket) -> CoreResult:
         return CoreResult("WBS not found. Run !t first.", _empty_ops())
 
     candidate = {"rationale": str(getattr(packet, "content", "") or "")}
-    wbs = wbs_builder.accept_work_item(wbs, candidate, trace_id=getattr(packet, "trace_id", None))
-    _save_wbs(_thread_id(packet), wbs)
+    wbs = _apply_wbs_op(packet, "accept_work_item", candidate=candidate)[0] or wbs
 
     return CoreResult("Work item accepted.", _empty_ops(), wbs, _mk_core_output(mode="free_chat"))
 
@@ -265,10 +277,7 @@ def _cmd_wbs_edit_accept(packet: InputPacket) -> CoreResult:
         return CoreResult("WBS not found. Run !t first.", _empty_ops())
 
     rationale = str(getattr(packet, "content", "") or "").strip()
-    wbs = wbs_builder.edit_and_accept_work_item(
-        wbs, {}, rationale, trace_id=getattr(packet, "trace_id", None)
-    )
-    _save_wbs(_thread_id(packet), wbs)
+    wbs = _apply_wbs_op(packet, "edit_and_accept_work_item", candidate={}, rationale=rationale)[0] or wbs
 
     return CoreResult("Work item edited+accepted.", _empty_ops(), wbs, _mk_core_output(mode="free_chat"))
 
@@ -278,8 +287,8 @@ def _cmd_wbs_done(packet: InputPacket) -> CoreResult:
     if not wbs:
         return CoreResult("WBS not found. Run !t first.", _empty_ops())
 
-    wbs, finalized = wbs_builder.mark_focus_done(wbs, trace_id=getattr(packet, "trace_id", None))
-    _save_wbs(_thread_id(packet), wbs)
+    new_wbs, finalized = _apply_wbs_op(packet, "mark_focus_done")
+    wbs = new_wbs or wbs
 
     if not finalized:
         return CoreResult("No focus item to finalize.", _empty_ops(), wbs, _mk_core_output(mode="free_chat"))
@@ -298,10 +307,8 @@ def _cmd_wbs_drop(packet: InputPacket) -> CoreResult:
         return CoreResult("WBS not found. Run !t first.", _empty_ops())
 
     reason = str(getattr(packet, "content", "") or "").strip() or None
-    wbs, finalized = wbs_builder.mark_focus_dropped(
-        wbs, reason, trace_id=getattr(packet, "trace_id", None)
-    )
-    _save_wbs(_thread_id(packet), wbs)
+    new_wbs, finalized = _apply_wbs_op(packet, "mark_focus_dropped", reason=reason)
+    wbs = new_wbs or wbs
 
     if not finalized:
         return CoreResult("No focus item to finalize.", _empty_ops(), wbs, _mk_core_output(mode="free_chat"))
@@ -315,24 +322,15 @@ def _cmd_wbs_drop(packet: InputPacket) -> CoreResult:
 
 
 def _cmd_free_chat(packet: InputPacket) -> CoreResult:
+    """
+    同期経路の free_chat（推論しない）。
+    - rule-based の handle_free_chat で応答のみ返す
+    """
     thread_id = _thread_id(packet)
     wbs = _load_wbs(thread_id) if thread_id else None
 
     user_text = str(getattr(packet, "raw", "") or "").strip()
-
-    reply = ""
-    try:
-        from ovv.inference.inference_box import ask  # type: ignore
-        reply = str(ask(packet=packet, wbs=wbs) or "").strip()
-    except Exception:
-        reply = ""
-
-    if not reply:
-        reply = (
-            "free_chat received.\n"
-            "- 現段階は推論箱が未接続、または無応答です。\n"
-            "（次: inference_box 実装で UI版Ovv に近づけます）"
-        )
+    reply, _ = handle_free_chat(packet)
 
     core_output = _mk_core_output(
         mode="free_chat",
@@ -348,6 +346,40 @@ def _cmd_free_chat(packet: InputPacket) -> CoreResult:
     )
 
 
+async def _cmd_free_chat_async(packet: InputPacket) -> CoreResult:
+    """
+    非同期経路の free_chat。
+    - 推論箱は volatile のみ更新する（stable / Notion は触らない）
+    - タイムアウト・例外時の応答は推論箱側でフォールバック済み
+    """
+    user_text = str(getattr(packet, "raw", "") or "").strip()
+    result = await run_free_chat_inference(packet)
+
+    wbs = result.wbs
+    if not isinstance(wbs, dict):
+        snap_wbs = result.snapshot.get("wbs") if isinstance(result.snapshot, dict) else None
+        wbs = dict(snap_wbs) if isinstance(snap_wbs, dict) else None
+
+    core_output = _mk_core_output(
+        mode="free_chat",
+        task_title=_title_from_wbs(wbs) if isinstance(wbs, dict) else None,
+        extra={
+            "user_text": user_text,
+            "inference": {
+                "stage_ms": result.stage_ms,
+                "fallback": result.fallback,
+            },
+        },
+    )
+
+    return CoreResult(
+        discord_output=result.reply,
+        notion_ops=_empty_ops(),
+        wbs=wbs,
+        core_output=core_output,
+    )
+
+
 # ============================================================
 # Formatting
 # ============================================================
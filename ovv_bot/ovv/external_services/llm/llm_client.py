@@ -0,0 +1,119 @@
+# ovv/external_services/llm/llm_client.py
+# ============================================================
+# MODULE CONTRACT: External / LLM Client v1.3
+#
+# ROLE:
+#   - LLM 呼び出しの唯一の窓口（ThreadBrain / free_chat 推論 共通）。
+#   - 同一内容の応答は response_cache（memory LRU + PG）から返す。
+#   - 同一リクエストの同時発行を Single-Flight で 1 回にまとめる。
+#
+# RESPONSIBILITY TAGS:
+#   [PROVIDER]   providers.get_provider() への委譲（OpenAI / Stub 差し替え可）
+#   [CACHE]      response_cache 経由の content-addressed キャッシュ
+#   [COALESCE]   single_flight 経由の重複排除
+#   [TEXT_ONLY]  応答本文(str)のみを返す
+#   [METRICS]    provider 呼び出しの所要時間・結果（rate_limited 等）を metrics に記録
+#
+# CONSTRAINTS:
+#   - 応答の JSON パース・補完は呼び出し側の責務（ここでは解釈しない）
+#   - 例外は握りつぶさず呼び出し側へ送出する（フォールバックは呼び出し側）
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Callable, Optional
+import time
+
+from ovv.observability import metrics
+from . import response_cache
+from .providers import get_provider
+from .single_flight import llm_single_flight, make_request_key
+
+
+# ------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------
+
+_M_CALLS = metrics.counter(
+    "ovv_llm_provider_calls_total", "LLM provider calls (cache / single-flight misses)", ("provider", "result")
+)
+_M_CALL_SECONDS = metrics.histogram(
+    "ovv_llm_provider_call_duration_seconds", "LLM provider call latency", ("provider", "model")
+)
+
+
+def _error_kind(e: Exception) -> str:
+    status = getattr(e, "status_code", None) or getattr(e, "status", None)
+    if status == 429:
+        return "rate_limited"
+    if isinstance(status, int):
+        return f"http_{status // 100}xx"
+    return type(e).__name__
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def chat_completion(
+    *,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    bypass_cache: bool = False,
+    cache_if: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    system / user の 2 メッセージで現在の provider を呼び、応答本文を返す。
+
+    - 同一 (provider, model, system_prompt, user_prompt, temperature) の応答が
+      response_cache にあれば API を呼ばずに返す（bypass_cache=True で無効化）
+    - cache_if を渡した場合、cache_if(text) が True の応答だけを保存する
+      （壊れた JSON 等を固定化しないため）
+    - 同時呼び出しは 1 回の API 呼び出しに集約され、全員が同じ応答を受け取る
+    - single_flight の短期キャッシュも response_cache と同じ条件で使う
+      （bypass / cacheable=False の provider / cache_if が False の応答は残さない）
+    """
+    provider = get_provider()
+    key = make_request_key(
+        provider=provider.name,
+        model=model,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        temperature=temperature,
+    )
+
+    use_cache = provider.cacheable and not response_cache.is_bypassed(bypass_cache)
+
+    cached = response_cache.get(key, bypass=not use_cache)
+    if cached is not None:
+        return cached
+
+    # leader が cache_if を評価した結果（single_flight の保存判定にも使う）
+    keep = False
+
+    def _call() -> str:
+        nonlocal keep
+        provider_name = type(provider).__name__
+        t0 = time.perf_counter()
+        try:
+            text = provider.complete(
+                model=model,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=temperature,
+            )
+        except Exception as e:
+            _M_CALLS.labels(provider_name, _error_kind(e)).inc()
+            raise
+        finally:
+            _M_CALL_SECONDS.labels(provider_name, model).observe(time.perf_counter() - t0)
+        _M_CALLS.labels(provider_name, "ok").inc()
+        # leader のみが書き込む（follower は同じ結果を共有するだけ）
+        keep = use_cache and (cache_if is None or cache_if(text))
+        if keep:
+            response_cache.put(key, model=model, response_text=text)
+        return text
+
+    return llm_single_flight.do(key, _call, use_recent=use_cache, store_if=lambda _text: keep)
@@ -0,0 +1,257 @@
+# ovv/external_services/llm/providers.py
+# ============================================================
+# MODULE CONTRACT: External / LLM Providers v1.0
+#
+# ROLE:
+#   - LLM バックエンドを差し替え可能にする最小インターフェース。
+#   - 本番用 OpenAIProvider と、ネットワーク不要の決定的 StubProvider を提供する。
+#
+# RESPONSIBILITY TAGS:
+#   [INTERFACE]  complete(model, system_prompt, user_prompt, temperature) -> str
+#   [OPENAI]     OpenAI client は初回呼び出し時に生成（import 時に作らない）
+#   [STUB]       レイテンシ / トークン throughput / canned JSON を設定可能な偽 LLM
+#   [SELECT]     OVV_LLM_PROVIDER（openai | stub）または set_provider() で選択
+#
+# CONSTRAINTS:
+#   - 応答本文を解釈しない（JSON パースは呼び出し側）
+#   - StubProvider は同じ入力に対して常に同じ出力を返す（deterministic）
+#   - StubProvider の応答は response_cache に保存しない（cacheable=False）
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# ------------------------------------------------------------
+# Interface
+# ------------------------------------------------------------
+
+class LLMProvider:
+    """
+    LLM バックエンドの共通インターフェース。
+
+    - name: 観測・ログ用の識別子
+    - cacheable: 応答を永続キャッシュしてよいか
+    """
+
+    name = "base"
+    cacheable = True
+
+    def complete(
+        self,
+        *,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+    ) -> str:
+        raise NotImplementedError
+
+
+# ------------------------------------------------------------
+# OpenAI
+# ------------------------------------------------------------
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI Chat Completions バックエンド。
+    client は初回 complete() 時に生成する（import / 起動時にネットワーク依存を作らない）。
+    """
+
+    name = "openai"
+    cacheable = True
+
+    def __init__(self, api_key: Optional[str] = None) -> None:
+        self._api_key = api_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    api_key = self._api_key or os.getenv("OPENAI_API_KEY")
+                    if not api_key:
+                        raise RuntimeError("OPENAI_API_KEY missing")
+                    self._client = OpenAI(api_key=api_key)
+        return self._client
+
+    def complete(
+        self,
+        *,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+    ) -> str:
+        resp = self._get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=temperature,
+        )
+        # 新 SDK 形式：ChatCompletionMessage から content を取り出す
+        return resp.choices[0].message.content or ""
+
+
+# ------------------------------------------------------------
+# Stub (offline / load test)
+# ------------------------------------------------------------
+
+# system prompt に含まれるマーカー → 返す JSON
+_DEFAULT_CANNED: Dict[str, Any] = {
+    "Thread Brain generator": {
+        "meta": {"version": "3.0", "total_tokens_estimate": 0},
+        "status": {"risk": [], "phase": "active", "last_major_event": "stub"},
+        "decisions": [],
+        "unresolved": [],
+        "next_actions": [],
+        "history_digest": "stub thread brain",
+        "high_level_goal": "",
+        "recent_messages": [],
+        "constraints_soft": [],
+        "current_position": "stub",
+    },
+}
+
+_DEFAULT_FALLBACK: Dict[str, Any] = {"stub": True}
+
+
+class StubProvider(LLMProvider):
+    """
+    ネットワーク不要の決定的 LLM。
+
+    - latency_ms: 1 呼び出しあたりの固定待ち時間（TTFT 相当）
+    - tokens_per_sec: 出力トークン生成速度（0 以下なら生成時間なし）
+    - canned: {system prompt 内マーカー文字列: 応答(JSON 化可能な値 or str)}
+      最初に一致したマーカーの応答を返し、無ければ fallback を返す。
+
+    応答は同じ入力に対して常に同一。
+    """
+
+    name = "stub"
+    cacheable = False
+
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 0.0,
+        tokens_per_sec: float = 0.0,
+        canned: Optional[Dict[str, Any]] = None,
+        fallback: Any = None,
+    ) -> None:
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.tokens_per_sec = float(tokens_per_sec)
+        self.canned: Dict[str, Any] = dict(_DEFAULT_CANNED if canned is None else canned)
+        self.fallback = _DEFAULT_FALLBACK if fallback is None else fallback
+
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def _render(value: Any) -> str:
+        if isinstance(value, str):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        # 粗い近似（英語 ~4 chars/token）。負荷試験用途なので十分。
+        return max(1, len(text) // 4)
+
+    def _pick(self, system_prompt: str, user_prompt: str) -> str:
+        for marker, value in self.canned.items():
+            if marker in system_prompt:
+                return self._render(value)
+        if isinstance(self.fallback, dict):
+            # 入力ごとに区別できるよう digest を付与（決定的）
+            digest = hashlib.sha256(
+                (system_prompt + "\0" + user_prompt).encode("utf-8")
+            ).hexdigest()[:16]
+            return self._render(dict(self.fallback, digest=digest))
+        return self._render(self.fallback)
+
+    def complete(
+        self,
+        *,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+    ) -> str:
+        with self._lock:
+            self.calls += 1
+
+        text = self._pick(system_prompt, user_prompt)
+
+        delay = self.latency_ms / 1000.0
+        if self.tokens_per_sec > 0:
+            delay += self._estimate_tokens(text) / self.tokens_per_sec
+        if delay > 0:
+            time.sleep(delay)
+
+        return text
+
+
+def stub_provider_from_env() -> StubProvider:
+    """
+    ENV から StubProvider を組み立てる。
+      - OVV_LLM_STUB_LATENCY_MS
+      - OVV_LLM_STUB_TOKENS_PER_SEC
+      - OVV_LLM_STUB_CANNED_PATH : {marker: response} の JSON ファイル
+    """
+    canned = None
+    path = os.getenv("OVV_LLM_STUB_CANNED_PATH")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            canned = json.load(f)
+
+    return StubProvider(
+        latency_ms=float(os.getenv("OVV_LLM_STUB_LATENCY_MS", "0")),
+        tokens_per_sec=float(os.getenv("OVV_LLM_STUB_TOKENS_PER_SEC", "0")),
+        canned=canned,
+    )
+
+
+# ------------------------------------------------------------
+# Selection
+# ------------------------------------------------------------
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def _provider_from_env() -> LLMProvider:
+    kind = os.getenv("OVV_LLM_PROVIDER", "openai").strip().lower()
+    if kind == "stub":
+        return stub_provider_from_env()
+    return OpenAIProvider()
+
+
+def get_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _provider_from_env()
+    return _provider
+
+
+def set_provider(provider: Optional[LLMProvider]) -> None:
+    """
+    provider を差し替える（None で ENV 既定に戻す）。
+    ベンチマーク / オフライン実行用。
+    """
+    global _provider
+    with _provider_lock:
+        _provider = provider
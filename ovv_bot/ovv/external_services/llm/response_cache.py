@@ -0,0 +1,246 @@
+# ovv/external_services/llm/response_cache.py
+# ============================================================
+# MODULE CONTRACT: External / LLM Response Cache v1.1
+#   (Content-Addressed / Memory LRU + PG)
+#
+# ROLE:
+#   - LLM 応答本文を「model + プロンプト内容ハッシュ」で引けるように保存し、
+#     同一内容の再生成（TB 再生成・free_chat の同一質問）を無料にする。
+#
+# RESPONSIBILITY TAGS:
+#   [L1_MEMORY]  プロセス内 LRU（BoundedLRU / TTL 付き）
+#   [L2_PG]      llm_response_cache テーブル（再起動を跨いで有効）
+#   [EVICT]      TTL 超過行の削除 + 最大行数での切り詰め
+#   [BYPASS]     ENV / 呼び出し単位でキャッシュを無効化できる
+#   [OBSERVE]    memory / pg hit・miss・hit rate
+#
+# CONSTRAINTS:
+#   - 応答本文を解釈・加工しない
+#   - PG 障害でも LLM 呼び出しを止めない（キャッシュは best-effort）
+#     PG 操作が失敗したら _PG_RETRY_SEC の間 L2 を使わない（障害中に毎回接続しない）
+#   - llm_response_cache テーブルは database.migrations（step 0003）が作る。ここでは作らない
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+import os
+import threading
+import time
+
+from database.pg import _execute
+from ovv.bis.utils.lru import BoundedLRU
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+CACHE_BYPASS = _env_flag("OVV_LLM_CACHE_BYPASS", "0")      # 全体バイパス
+CACHE_PG_ENABLED = _env_flag("OVV_LLM_CACHE_PG", "1")      # L2(PG) を使うか
+CACHE_TTL_SEC = float(os.getenv("OVV_LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+CACHE_MAX_ITEMS = int(os.getenv("OVV_LLM_CACHE_MAX_ITEMS", "512"))
+CACHE_PG_MAX_ROWS = int(os.getenv("OVV_LLM_CACHE_PG_MAX_ROWS", "5000"))
+CACHE_PG_EVICT_EVERY = int(os.getenv("OVV_LLM_CACHE_PG_EVICT_EVERY", "50"))  # put N 回ごとに掃除
+
+
+# ------------------------------------------------------------
+# Internal State
+# ------------------------------------------------------------
+
+_memory = BoundedLRU(CACHE_MAX_ITEMS, ttl_sec=CACHE_TTL_SEC)
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "memory_hits": 0,
+    "pg_hits": 0,
+    "misses": 0,
+    "bypassed": 0,
+    "puts": 0,
+    "pg_errors": 0,
+}
+
+_PG_RETRY_SEC = 60.0
+
+_pg_retry_at = 0.0
+_puts_since_evict = 0
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] = _stats.get(name, 0) + n
+
+
+def _log_pg_error(where: str, e: Exception) -> None:
+    global _pg_retry_at
+    _count("pg_errors")
+    _pg_retry_at = time.monotonic() + _PG_RETRY_SEC
+    print(f"[LLMCache] pg {where} failed (ignored, L2 off for {_PG_RETRY_SEC:.0f}s):", repr(e))
+
+
+def _pg_usable() -> bool:
+    return CACHE_PG_ENABLED and time.monotonic() >= _pg_retry_at
+
+
+# ------------------------------------------------------------
+# L2 (PG)
+# ------------------------------------------------------------
+
+def _pg_get(cache_key: str) -> Optional[str]:
+    rows = _execute(
+        """
+        UPDATE llm_response_cache
+        SET hit_count = hit_count + 1,
+            last_hit_at = NOW()
+        WHERE cache_key = %s
+          AND created_at > NOW() - (%s * INTERVAL '1 second')
+        RETURNING response_text;
+        """,
+        (cache_key, CACHE_TTL_SEC),
+    )
+    if not rows:
+        return None
+    return rows[0].get("response_text")
+
+
+def _pg_put(cache_key: str, model: str, response_text: str) -> None:
+    _execute(
+        """
+        INSERT INTO llm_response_cache (cache_key, model, response_text, created_at)
+        VALUES (%s, %s, %s, NOW())
+        ON CONFLICT (cache_key)
+        DO UPDATE SET
+            response_text = EXCLUDED.response_text,
+            created_at = EXCLUDED.created_at;
+        """,
+        (cache_key, model, response_text),
+    )
+
+
+def _pg_evict() -> None:
+    """
+    - TTL を超えた行を削除
+    - CACHE_PG_MAX_ROWS を超えた分を古い順に削除
+    """
+    _execute(
+        "DELETE FROM llm_response_cache WHERE created_at <= NOW() - (%s * INTERVAL '1 second');",
+        (CACHE_TTL_SEC,),
+    )
+    _execute(
+        """
+        DELETE FROM llm_response_cache
+        WHERE cache_key IN (
+            SELECT cache_key
+            FROM llm_response_cache
+            ORDER BY COALESCE(last_hit_at, created_at) DESC
+            OFFSET %s
+        );
+        """,
+        (CACHE_PG_MAX_ROWS,),
+    )
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def is_bypassed(bypass: bool = False) -> bool:
+    return CACHE_BYPASS or bool(bypass)
+
+
+def get(cache_key: str, *, bypass: bool = False) -> Optional[str]:
+    """
+    L1(memory) → L2(PG) の順に参照する。見つからなければ None。
+    """
+    if is_bypassed(bypass):
+        _count("bypassed")
+        return None
+
+    value = _memory.get(cache_key)
+    if value is not None:
+        _count("memory_hits")
+        return value
+
+    if _pg_usable():
+        try:
+            value = _pg_get(cache_key)
+        except Exception as e:
+            _log_pg_error("get", e)
+            value = None
+        if value is not None:
+            _memory.put(cache_key, value)
+            _count("pg_hits")
+            return value
+
+    _count("misses")
+    return None
+
+
+def put(cache_key: str, *, model: str, response_text: str, bypass: bool = False) -> None:
+    """
+    応答本文を L1 / L2 に書き込む。空応答は保存しない。
+    """
+    global _puts_since_evict
+
+    if is_bypassed(bypass) or not response_text:
+        return
+
+    _memory.put(cache_key, response_text)
+    _count("puts")
+
+    if not _pg_usable():
+        return
+
+    try:
+        _pg_put(cache_key, model, response_text)
+    except Exception as e:
+        _log_pg_error("put", e)
+        return
+
+    with _stats_lock:
+        _puts_since_evict += 1
+        run_evict = _puts_since_evict >= CACHE_PG_EVICT_EVERY
+        if run_evict:
+            _puts_since_evict = 0
+
+    if run_evict:
+        try:
+            _pg_evict()
+        except Exception as e:
+            _log_pg_error("evict", e)
+
+
+def invalidate(cache_key: Optional[str] = None) -> None:
+    """
+    キャッシュを破棄する（key 未指定時は L1 全体 + L2 全行）。
+    """
+    if cache_key is None:
+        _memory.clear()
+    else:
+        _memory.pop(cache_key)
+
+    if not _pg_usable():
+        return
+    try:
+        if cache_key is None:
+            _execute("DELETE FROM llm_response_cache;")
+        else:
+            _execute("DELETE FROM llm_response_cache WHERE cache_key = %s;", (cache_key,))
+    except Exception as e:
+        _log_pg_error("invalidate", e)
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        s: Dict[str, Any] = dict(_stats)
+    hits = s["memory_hits"] + s["pg_hits"]
+    lookups = hits + s["misses"]
+    s["hit_rate"] = (hits / lookups) if lookups else 0.0
+    s["memory"] = _memory.stats()
+    s["bypass"] = CACHE_BYPASS
+    s["pg_enabled"] = CACHE_PG_ENABLED
+    return s
@@ -0,0 +1,202 @@
+# ovv/external_services/llm/single_flight.py
+# ============================================================
+# MODULE CONTRACT: External / LLM Single-Flight v1.1
+#
+# ROLE:
+#   - 同一内容の LLM リクエストが同時に飛んだ場合、
+#     実際の API 呼び出しを 1 回にまとめ、結果を全呼び出し元で共有する。
+#
+# RESPONSIBILITY TAGS:
+#   [COALESCE]   in-flight 中の同一キー呼び出しを 1 つの Future に集約
+#   [SHORT_TTL]  直近結果の短期キャッシュ（連打・リトライ吸収）
+#                use_recent=False の呼び出しは参照も保存もしない（集約だけ行う）
+#                store_if(value) が False の結果は保存しない
+#   [OBSERVE]    集約率の観測用カウンタ
+#
+# CONSTRAINTS:
+#   - LLM の入出力を解釈・加工しない（結果はそのまま返す）
+#   - 例外は leader / follower 全員に同じ例外として伝播させる
+#   - 失敗結果はキャッシュしない
+#   - thread-safe（asyncio.to_thread / worker thread からの同時呼び出しを想定）
+# ============================================================
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+RESULT_TTL_SEC = float(os.getenv("OVV_LLM_SINGLE_FLIGHT_TTL_SEC", "5"))
+MAX_RESULTS = int(os.getenv("OVV_LLM_SINGLE_FLIGHT_MAX_RESULTS", "256"))
+
+
+# ------------------------------------------------------------
+# Key
+# ------------------------------------------------------------
+
+def make_request_key(
+    *,
+    provider: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+) -> str:
+    """
+    (provider, model, system prompt, user prompt, temperature) からリクエストキーを作る。
+    - provider が違えば同じ prompt でも別キー（stub の応答を openai の結果として返さない）
+    - 区切り衝突を避けるため JSON 配列としてハッシュする
+    """
+    material = json.dumps(
+        [str(provider), str(model), str(system_prompt), str(user_prompt), float(temperature)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------
+# Single-Flight
+# ------------------------------------------------------------
+
+class SingleFlight:
+    """
+    同一キーの同時呼び出しを 1 回の実行に集約する。
+
+    - 最初の呼び出し（leader）だけが fn を実行する
+    - 実行中に来た同一キー呼び出し（follower）は leader の Future を待つ
+    - 成功結果は result_ttl_sec の間だけ保持し、直後の再送も吸収する
+    """
+
+    def __init__(self, *, result_ttl_sec: float = RESULT_TTL_SEC, max_results: int = MAX_RESULTS) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._results: Dict[str, Tuple[float, Any]] = {}
+        self._result_ttl_sec = max(0.0, float(result_ttl_sec))
+        self._max_results = max(0, int(max_results))
+
+        self._calls = 0
+        self._executions = 0
+        self._shared = 0
+        self._recent_hits = 0
+
+    # --------------------------------------------------------
+    # internal
+    # --------------------------------------------------------
+
+    def _lookup_recent(self, key: str, now: float) -> Tuple[bool, Any]:
+        hit = self._results.get(key)
+        if hit is None:
+            return False, None
+        stored_at, value = hit
+        if now - stored_at > self._result_ttl_sec:
+            self._results.pop(key, None)
+            return False, None
+        return True, value
+
+    def _store_recent(self, key: str, value: Any, now: float) -> None:
+        if self._result_ttl_sec <= 0 or self._max_results <= 0:
+            return
+        if len(self._results) >= self._max_results:
+            # 期限切れを掃除し、それでも溢れるなら最古を落とす
+            expired = [k for k, (ts, _) in self._results.items() if now - ts > self._result_ttl_sec]
+            for k in expired:
+                self._results.pop(k, None)
+            while len(self._results) >= self._max_results:
+                self._results.pop(next(iter(self._results)), None)
+        self._results[key] = (now, value)
+
+    # --------------------------------------------------------
+    # public
+    # --------------------------------------------------------
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        *,
+        use_recent: bool = True,
+        store_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        key 単位で fn() の実行を集約して結果を返す。
+        fn が例外を投げた場合、同じ例外を leader / follower 全員に送出する。
+        - use_recent=False なら短期キャッシュを引かず、結果も保存しない
+          （in-flight 中の同一キーへの相乗りは行う）
+        - store_if を渡した場合、store_if(value) が True の結果だけを短期キャッシュに保存する
+        """
+        with self._lock:
+            self._calls += 1
+            if use_recent:
+                found, value = self._lookup_recent(key, time.monotonic())
+                if found:
+                    self._recent_hits += 1
+                    return value
+
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self._shared += 1
+                leader = False
+            else:
+                fut = Future()
+                self._inflight[key] = fut
+                self._executions += 1
+                leader = True
+
+        if not leader:
+            return fut.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+
+        try:
+            keep = use_recent and (store_if is None or bool(store_if(value)))
+        except Exception:
+            keep = False
+        with self._lock:
+            self._inflight.pop(key, None)
+            if keep:
+                self._store_recent(key, value, time.monotonic())
+        fut.set_result(value)
+        return value
+
+    def forget(self, key: Optional[str] = None) -> None:
+        """
+        短期キャッシュを破棄する（key 指定時はそのキーのみ）。
+        in-flight 中の呼び出しには影響しない。
+        """
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._calls
+            saved = self._shared + self._recent_hits
+            return {
+                "calls": calls,
+                "executions": self._executions,
+                "shared_inflight": self._shared,
+                "recent_hits": self._recent_hits,
+                "inflight": len(self._inflight),
+                "saved_ratio": (saved / calls) if calls else 0.0,
+            }
+
+
+# ---- Singleton（LLM クライアント共通）----
+llm_single_flight = SingleFlight()
@@ -1,15 +1,16 @@
-from notion_client import Client
+import threading
+
 from .config_notion import NOTION_API_KEY
 
 # ------------------------------------------------------------
 # Notion API Client（単一インスタンス）
+#   notion_client（httpx 一式）の import と Client 生成は初回の
+#   get_notion_client() まで遅延する（起動を速くするため）
 # ------------------------------------------------------------
 
-if NOTION_API_KEY:
-    notion = Client(auth=NOTION_API_KEY)
-else:
-    notion = None
-    print("[WARN] NOTION_API_KEY is not set → Notion ops disabled.")
+notion = None
+_lock = threading.Lock()
+_initialized = False
 
 
 def get_notion_client():
@@ -17,4 +18,16 @@ def get_notion_client():
     外部からはこの関数を通して client を取得させる。
     （None の場合、executor 側で gracefully degrade）
     """
+    global notion, _initialized
+    if _initialized:
+        return notion
+    with _lock:
+        if not _initialized:
+            if NOTION_API_KEY:
+                from notion_client import Client
+
+                notion = Client(auth=NOTION_API_KEY)
+            else:
+                print("[WARN] NOTION_API_KEY is not set → Notion ops disabled.")
+            _initialized = True
     return notion
@@ -1,7 +1,7 @@
 # ovv/external_services/notion/ops/executor.py
 # ============================================================
-# MODULE CONTRACT: External / NotionOps Executor v2.5
-#   (Duration + Summary + Status + SummaryAppend + Trace Observe)
+# MODULE CONTRACT: External / NotionOps Executor v2.6
+#   (Duration + Summary + Status + SummaryAppend + Trace Observe + PageId Cache)
 #
 # ROLE:
 #   - BIS / Stabilizer が構築した NotionOps(list[dict]) を
@@ -11,6 +11,8 @@
 #   [EXEC_OPS]     ops を順序通り Notion API に適用
 #   [TASK_DB]      Task DB（title / status / duration / summary）更新
 #   [SUMMARY_APP]  TaskSummary 追記（append_task_summary）
+#   [PAGE_CACHE]   task_id → page_id の LRU（create で登録 / 失敗した op の task_id は破棄）
+#   [PREFETCH]     prefetch_page_ids() : 複数 task_id を 1 回の databases.query で解決（warm-up 用）
 #   [GUARD]        設定不備・Notion無効時の安全ガード
 #   [DEBUG]        trace_id 観測ログ（非制御）
 #
@@ -25,11 +27,14 @@ from __future__ import annotations
 
 from typing import Dict, Any, List, Sequence, Union, Optional
 from datetime import datetime, timezone
-import json
 import os
+import time
 
 from ..notion_client import get_notion_client
 from ..config_notion import NOTION_TASK_DB_ID
+from ovv.bis.utils.lru import BoundedLRU
+from ovv.observability import metrics
+from ovv.observability.checkpoint_log import log_payload
 
 
 # ------------------------------------------------------------
@@ -59,7 +64,30 @@ def _extract_trace_id(op: Dict[str, Any], context_key: str) -> str:
 
 
 def _log(msg: Dict[str, Any]) -> None:
-    print(json.dumps(msg, ensure_ascii=False))
+    log_payload(msg)
+
+
+# ------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------
+
+_M_OPS = metrics.counter("ovv_notion_ops_total", "Notion ops by result", ("op", "result"))
+_M_OP_SECONDS = metrics.histogram("ovv_notion_op_duration_seconds", "Notion op latency", ("op",))
+_M_API_ERRORS = metrics.counter(
+    "ovv_notion_api_errors_total", "Notion API errors (including swallowed lookups)", ("call", "kind")
+)
+
+
+def _error_kind(e: Exception) -> str:
+    """
+    notion_client の APIResponseError は status / code を持つ（429 = rate_limited）。
+    """
+    if getattr(e, "status", None) == 429 or getattr(e, "code", None) == "rate_limited":
+        return "rate_limited"
+    status = getattr(e, "status", None)
+    if isinstance(status, int):
+        return f"http_{status // 100}xx"
+    return type(e).__name__
 
 
 # ------------------------------------------------------------
@@ -85,6 +113,20 @@ STATUS_PAUSED      = os.getenv("OVV_NOTION_STATUS_PAUSED", "paused")
 STATUS_COMPLETED   = os.getenv("OVV_NOTION_STATUS_COMPLETED", "completed")
 
 
+# ------------------------------------------------------------
+# Page Id Cache
+#   page_id は task の生存中変わらないため TTL なし。
+#   ページが消された等で op が失敗したら、その task_id を破棄して次回引き直す。
+# ------------------------------------------------------------
+
+PAGE_CACHE_MAX_ITEMS = int(os.getenv("OVV_NOTION_PAGE_CACHE_MAX_ITEMS", "1024"))
+
+# Notion の compound filter（or）に入れられる条件数の上限
+PREFETCH_MAX_BATCH = 100
+
+_page_ids = BoundedLRU(PAGE_CACHE_MAX_ITEMS)
+
+
 # ============================================================
 # Public entry (唯一の外部 API)
 # ============================================================
@@ -130,6 +172,8 @@ async def execute_notion_ops(
 
         trace_id = _extract_trace_id(op_dict, str(context_key))
         task_id = op_dict.get("task_id")
+        t0 = time.perf_counter()
+        result = "ok"
 
         try:
             if op_name == "task_create":
@@ -154,6 +198,7 @@ async def execute_notion_ops(
                 _append_task_summary(notion, op_dict)
 
             else:
+                result = "ignored"
                 _log({
                     "layer": "NOTION_EXECUTOR",
                     "level": "WARN",
@@ -164,6 +209,10 @@ async def execute_notion_ops(
                 })
 
         except Exception as e:
+            result = _error_kind(e)
+            _M_API_ERRORS.labels(op_name, result).inc()
+            if task_id:
+                _page_ids.pop(str(task_id).strip())
             _log({
                 "layer": "NOTION_EXECUTOR",
                 "level": "ERROR",
@@ -178,6 +227,10 @@ async def execute_notion_ops(
                 },
             })
 
+        if result != "ignored":
+            _M_OP_SECONDS.labels(op_name).observe(time.perf_counter() - t0)
+        _M_OPS.labels(op_name, result).inc()
+
 
 # ============================================================
 # Normalization
@@ -213,7 +266,7 @@ def _create_task_item(notion, ops: Dict[str, Any]) -> None:
     if not task_name:
         task_name = "(untitled task)"
 
-    notion.pages.create(
+    page = notion.pages.create(
         parent={"database_id": NOTION_TASK_DB_ID},
         properties={
             PROP_TITLE: {"title": [{"text": {"content": task_name}}]},
@@ -223,6 +276,8 @@ def _create_task_item(notion, ops: Dict[str, Any]) -> None:
             PROP_DURATION: {"number": 0},
         },
     )
+    if isinstance(page, dict) and page.get("id"):
+        _page_ids.put(task_id, page["id"])
 
 
 # ============================================================
@@ -234,8 +289,8 @@ def _update_task_status(notion, ops: Dict[str, Any], status: str) -> None:
     if not task_id:
         raise ValueError("status update missing task_id")
 
-    page = _find_page_by_task_id(notion, task_id)
-    if page is None:
+    page_id = _find_page_id(notion, task_id)
+    if page_id is None:
         return
 
     props: Dict[str, Any] = {PROP_STATUS: {"select": {"name": status}}}
@@ -244,7 +299,7 @@ def _update_task_status(notion, ops: Dict[str, Any], status: str) -> None:
     elif status == STATUS_COMPLETED:
         props[PROP_ENDED_AT] = {"date": {"start": _now_iso()}}
 
-    notion.pages.update(page_id=page["id"], properties=props)
+    notion.pages.update(page_id=page_id, properties=props)
 
 
 # ============================================================
@@ -256,8 +311,8 @@ def _update_task_duration(notion, ops: Dict[str, Any]) -> None:
     if not task_id:
         raise ValueError("duration update missing task_id")
 
-    page = _find_page_by_task_id(notion, task_id)
-    if page is None:
+    page_id = _find_page_id(notion, task_id)
+    if page_id is None:
         return
 
     duration_seconds = ops.get("duration_seconds")
@@ -265,7 +320,7 @@ def _update_task_duration(notion, ops: Dict[str, Any]) -> None:
         return
 
     notion.pages.update(
-        page_id=page["id"],
+        page_id=page_id,
         properties={PROP_DURATION: {"number": duration_seconds}},
     )
 
@@ -279,8 +334,8 @@ def _update_task_summary(notion, ops: Dict[str, Any]) -> None:
     if not task_id:
         raise ValueError("summary update missing task_id")
 
-    page = _find_page_by_task_id(notion, task_id)
-    if page is None:
+    page_id = _find_page_id(notion, task_id)
+    if page_id is None:
         return
 
     summary_text = str(ops.get("summary_text") or "").strip()
@@ -288,7 +343,7 @@ def _update_task_summary(notion, ops: Dict[str, Any]) -> None:
         return
 
     notion.pages.update(
-        page_id=page["id"],
+        page_id=page_id,
         properties={
             PROP_SUMMARY: {"rich_text": [{"text": {"content": summary_text}}]}
         },
@@ -304,7 +359,7 @@ def _append_task_summary(notion, ops: Dict[str, Any]) -> None:
     if not task_id:
         raise ValueError("summary append missing task_id")
 
-    page = _find_page_by_task_id(notion, task_id)
+    page = _find_page(notion, task_id)
     if page is None:
         return
 
@@ -335,6 +390,29 @@ def _get_rich_text_plain(page: Dict[str, Any], prop_name: str) -> str:
         return ""
 
 
+def _find_page_id(notion, task_id: str) -> Optional[str]:
+    page_id = _page_ids.get(task_id)
+    if page_id is not None:
+        return page_id
+    page = _find_page_by_task_id(notion, task_id)
+    return page["id"] if page is not None else None
+
+
+def _find_page(notion, task_id: str):
+    """
+    現在の properties が必要な op 用。page_id が分かっていれば pages.retrieve で引く。
+    """
+    page_id = _page_ids.get(task_id)
+    if page_id is None:
+        return _find_page_by_task_id(notion, task_id)
+    try:
+        return notion.pages.retrieve(page_id=page_id)
+    except Exception as e:
+        _M_API_ERRORS.labels("pages.retrieve", _error_kind(e)).inc()
+        _page_ids.pop(task_id)
+        return _find_page_by_task_id(notion, task_id)
+
+
 def _find_page_by_task_id(notion, task_id: str):
     try:
         res = notion.databases.query(
@@ -345,6 +423,50 @@ def _find_page_by_task_id(notion, task_id: str):
             },
         )
         items = res.get("results", [])
-        return items[0] if items else None
-    except Exception:
-        return None
\ No newline at end of file
+        if not items:
+            return None
+        _page_ids.put(task_id, items[0]["id"])
+        return items[0]
+    except Exception as e:
+        _M_API_ERRORS.labels("databases.query", _error_kind(e)).inc()
+        return None
+
+
+# ============================================================
+# Warm-up / Observe
+# ============================================================
+
+def prefetch_page_ids(notion, task_ids: Sequence[str]) -> int:
+    """
+    未キャッシュの task_id をまとめて 1 回の databases.query（or filter）で解決し、キャッシュへ入れる。
+    最大 PREFETCH_MAX_BATCH 件（超える分は呼び出し側で分割する）。同期 API（to_thread で呼ぶ）。
+    Returns: 新たにキャッシュした件数
+    """
+    if notion is None or NOTION_TASK_DB_ID is None:
+        return 0
+    wanted = [t for t in dict.fromkeys(task_ids) if t and _page_ids.get(t) is None][:PREFETCH_MAX_BATCH]
+    if not wanted:
+        return 0
+
+    try:
+        res = notion.databases.query(
+            database_id=NOTION_TASK_DB_ID,
+            filter={"or": [{"property": PROP_TASK_ID, "rich_text": {"equals": t}} for t in wanted]},
+            page_size=PREFETCH_MAX_BATCH,
+        )
+    except Exception as e:
+        _M_API_ERRORS.labels("databases.query", _error_kind(e)).inc()
+        return 0
+
+    # 同じ task_id のページが複数あれば、_find_page_by_task_id と同じく先頭を採る
+    pending = set(wanted)
+    for page in res.get("results", []):
+        task_id = _get_rich_text_plain(page, PROP_TASK_ID).strip()
+        if task_id in pending:
+            pending.discard(task_id)
+            _page_ids.put(task_id, page["id"])
+    return len(wanted) - len(pending)
+
+
+def page_cache_stats() -> Dict[str, Any]:
+    return _page_ids.stats()
\ No newline at end of file
@@ -0,0 +1,123 @@
+# ovv/observability/boot_timing.py
+# ============================================================
+# MODULE CONTRACT: Observability / Boot Timing v1.0
+#
+# ROLE:
+#   - 起動の各段階（主要 import / コマンド登録 / bot.run / on_ready / migration）の
+#     所要時間を記録し、time-to-on_ready の内訳（import-time budget）を出す。
+#
+# RESPONSIBILITY TAGS:
+#   [MARK]     mark(name) : BOOT_T0 からの経過を記録
+#   [PHASE]    with phase(name): ... : 区間の所要時間を記録
+#   [REPORT]   boot_report() / boot_report_lines()（!dbg_boot）
+#
+# CONSTRAINTS:
+#   - 標準ライブラリのみ（bot.py の最初に import されるため）
+#   - BOOT_T0 はこのモジュールの import 時点。それ以前（インタプリタ起動）は
+#     /proc/self/stat が読めれば interpreter_ms として別に出す
+# ============================================================
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import os
+import time
+
+
+BOOT_T0 = time.perf_counter()
+_BOOT_WALL = time.time()
+
+# (name, start_ms, duration_ms)。mark() は duration 0
+_events: List[Tuple[str, float, float]] = []
+_marks: Dict[str, float] = {}
+
+
+def _now_ms() -> float:
+    return (time.perf_counter() - BOOT_T0) * 1000.0
+
+
+def _interpreter_ms() -> Optional[float]:
+    # プロセス開始 → このモジュール import までの時間（Linux のみ）
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        hz = os.sysconf("SC_CLK_TCK")
+        started_ago = uptime - start_ticks / hz
+        return max(0.0, (started_ago - (time.time() - _BOOT_WALL)) * 1000.0)
+    except Exception:
+        return None
+
+
+_INTERPRETER_MS = _interpreter_ms()
+
+
+def mark(name: str) -> float:
+    """
+    BOOT_T0 からの経過 ms を記録して返す。同名は最初の 1 回だけ記録する。
+    """
+    at = _now_ms()
+    if name not in _marks:
+        _marks[name] = at
+        _events.append((name, at, 0.0))
+    return at
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    start = _now_ms()
+    try:
+        yield
+    finally:
+        _events.append((name, start, _now_ms() - start))
+
+
+def mark_at(name: str) -> Optional[float]:
+    return _marks.get(name)
+
+
+def boot_report() -> Dict[str, Any]:
+    return {
+        "interpreter_ms": _INTERPRETER_MS,
+        "events": [
+            {"name": n, "at_ms": round(at, 1), "duration_ms": round(d, 1)} for n, at, d in list(_events)
+        ],
+        "on_ready_ms": _marks.get("on_ready"),
+    }
+
+
+def boot_report_lines() -> List[str]:
+    rep = boot_report()
+    lines = []
+    if rep["interpreter_ms"] is not None:
+        lines.append(f"interpreter (before bot.py) : {rep['interpreter_ms']:>9.1f} ms")
+    for ev in rep["events"]:
+        if ev["duration_ms"]:
+            lines.append(f"{ev['name']:<28}: {ev['duration_ms']:>9.1f} ms  (@{ev['at_ms']:.1f})")
+        else:
+            lines.append(f"{ev['name']:<28}: @{ev['at_ms']:>8.1f} ms")
+    return lines
+
+
+def boot_summary() -> str:
+    """
+    on_ready で 1 行だけ出す用。
+    """
+    parts = [f"{n}={d:.0f}ms" for n, _, d in _events if d]
+    ready = _marks.get("on_ready")
+    head = f"on_ready @{ready:.0f}ms" if ready is not None else "not ready"
+    return f"[boot] {head} ({', '.join(parts)})"
+
+
+__all__ = [
+    "BOOT_T0",
+    "boot_report",
+    "boot_report_lines",
+    "boot_summary",
+    "mark",
+    "mark_at",
+    "phase",
+]
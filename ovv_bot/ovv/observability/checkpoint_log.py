@@ -0,0 +1,524 @@
+# ovv/observability/checkpoint_log.py
+# ============================================================
+# MODULE CONTRACT: Observability / Checkpoint Log v1.2
+#
+# ROLE:
+#   - 各レイヤ（BG / IF / CORE / ST / PERSIST ...）の構造化 checkpoint ログを
+#     1 つのキュー + バックグラウンド writer に集約する。
+#   - 呼び出し側（event loop 上）はレコードをキューに積むだけ。
+#     json.dumps・時刻整形・stdout への write は writer thread がまとめて行う。
+#
+# RESPONSIBILITY TAGS:
+#   [EMIT]      log_event(...) / log_payload(dict) : 非ブロッキングでキューに積む
+#               extra / error / payload の dict は積む時点で浅くコピーする
+#               （呼び出し後に呼び出し側が dict を変更しても、出力内容は変わらない）
+#   [BIND]      checkpoint_logger(layer).bind(trace_id) : layer / trace_id を束縛した logger
+#   [BATCH]     writer は最大 LOG_BATCH_MAX 件を 1 回の write + flush で出力
+#   [BOUNDED]   キュー上限 LOG_QUEUE_MAX（超過分は捨てて dropped を数える）
+#   [FLUSH]     flush_logs() / プロセス終了時（atexit）に残りを書き出す
+#   [LEVEL]     layer（BG / IF / CORE / ST ...）ごとの出力レベル。実行中に変更可
+#   [SAMPLE]    trace 単位の head sampling（trace_id のハッシュで決める）。
+#               ERROR 以上は sampling・レベルに関係なく常に出す
+#   [OBSERVE]   log_stats() : enqueued / written / dropped / suppressed / batches / queue_max
+#               （カウンタは lock なしで更新するため、複数 thread から同時に積むと概数になる）
+#               checkpoint_counts() : (layer, checkpoint, level) ごとの到達数（出力しないものも数える）
+#               metrics ovv_checkpoints_total は scrape 時に metrics_collectors が変換する
+#   [RECORD]    flight_recorder / trace_store にも全 checkpoint を渡す（レベル・sampling と無関係）
+#
+# OUTPUT FORMAT（従来の _log_event と同じ 1 行 JSON）:
+#   {"trace_id", "checkpoint", "layer", "level", "summary", "timestamp"[, "error"][, extra...]}
+#   timestamp はキューに積んだ時点の UTC（ISO 8601）
+#
+# CONSTRAINTS:
+#   - 観測専用（挙動を変えない・例外を出さない）
+#   - OVV_LOG_ASYNC=0 なら従来どおり呼び出し元で同期 print する
+#   - レベル・sampling の判定はキューに積む前（呼び出し側）で行う
+#   - log_payload()（レベルを持たない生 payload）は判定の対象外
+#   - 浅いコピーなので、dict の中の list / dict を後から変更しないこと
+# ============================================================
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+from . import flight_recorder, trace_store
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+LOG_ASYNC = os.getenv("OVV_LOG_ASYNC", "1") != "0"
+LOG_QUEUE_MAX = int(os.getenv("OVV_LOG_QUEUE_MAX", "10000"))
+LOG_BATCH_MAX = int(os.getenv("OVV_LOG_BATCH_MAX", "256"))
+LOG_FLUSH_INTERVAL_MS = float(os.getenv("OVV_LOG_FLUSH_INTERVAL_MS", "50"))
+
+LEVELS: Dict[str, int] = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "WARN": 30, "ERROR": 40}
+LAYERS: Tuple[str, ...] = ("BG", "IF", "CORE", "ST")
+
+# 既定レベル（OVV_LOG_LEVEL）と layer 別の上書き（OVV_LOG_LEVEL_<LAYER>）
+LOG_LEVEL = os.getenv("OVV_LOG_LEVEL", "DEBUG").upper()
+
+# trace を丸ごと出す割合（0.0〜1.0）。外れた trace は ERROR 以上のみ
+LOG_SAMPLE_RATE = float(os.getenv("OVV_LOG_SAMPLE_RATE", "1.0"))
+
+_SAMPLE_BUCKETS = 10000
+
+# (layer, checkpoint, level) -> 到達数。レベル・sampling で出力しないものも含めて数える
+# （_stats と同じく lock なしの int。metrics へは scrape 時に変換する）
+_checkpoint_counts: Dict[Tuple[str, str, str], int] = {}
+
+
+# ------------------------------------------------------------
+# Record
+#   (epoch, trace_id, checkpoint, layer, level, summary, error, extra)
+#   payload をそのまま出す場合は (epoch, None, None, None, None, None, None, payload)
+# ------------------------------------------------------------
+
+Record = Tuple[float, Any, Any, Any, Any, Any, Any, Any]
+
+_queue: Deque[Record] = deque()
+_wake = threading.Event()
+_state_lock = threading.Lock()
+_writer: Optional[threading.Thread] = None
+
+_stats: Dict[str, int] = {
+    "enqueued": 0,
+    "written": 0,
+    "dropped": 0,
+    "suppressed": 0,
+    "batches": 0,
+    "queue_max": 0,
+    "write_errors": 0,
+}
+
+
+# 文字列の JSON エンコード（json.dumps(ensure_ascii=False) と同じ C 実装）
+_encode_str = json.encoder.encode_basestring
+
+# checkpoint / layer / level は種類が少ないのでエンコード結果を使い回す
+_ENC_CACHE_MAX = 4096
+_enc_cache: Dict[Any, str] = {}
+
+_BASE_KEYS = frozenset(("trace_id", "checkpoint", "layer", "level", "summary", "timestamp"))
+
+_ts_sec = -1
+_ts_prefix = ""
+
+
+def _enc(value: Any) -> str:
+    if not isinstance(value, str):
+        return _enc_value(value)
+    cached = _enc_cache.get(value)
+    if cached is not None:
+        return cached
+    out = _encode_str(value)
+    if len(_enc_cache) < _ENC_CACHE_MAX:
+        _enc_cache[value] = out
+    return out
+
+
+def _enc_value(value: Any) -> str:
+    if isinstance(value, str):
+        return _encode_str(value)
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _timestamp(epoch: float) -> str:
+    # datetime.isoformat() と同じ表記（秒単位の部分はキャッシュ）
+    global _ts_sec, _ts_prefix
+    sec = int(epoch)
+    if sec != _ts_sec:
+        _ts_prefix = datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _ts_sec = sec
+    micro = int(round((epoch - sec) * 1e6))
+    if micro >= 1000000:
+        return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+    if micro:
+        return f"{_ts_prefix}.{micro:06d}+00:00"
+    return f"{_ts_prefix}+00:00"
+
+
+def _format(rec: Record) -> str:
+    epoch, trace_id, checkpoint, layer, level, summary, error, extra = rec
+
+    if checkpoint is None and isinstance(extra, dict):
+        return json.dumps(extra, ensure_ascii=False, default=str)
+
+    if extra and not _BASE_KEYS.isdisjoint(extra):
+        # extra が基本キーを上書きする場合は dict 経由（従来の payload.update と同じ結果）
+        payload: Dict[str, Any] = {
+            "trace_id": trace_id or "UNKNOWN",
+            "checkpoint": checkpoint,
+            "layer": layer,
+            "level": level,
+            "summary": summary,
+            "timestamp": _timestamp(epoch),
+        }
+        if error is not None:
+            payload["error"] = error
+        payload.update(extra)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+    parts = [
+        '{"trace_id": ', _enc_value(trace_id or "UNKNOWN"),
+        ', "checkpoint": ', _enc(checkpoint),
+        ', "layer": ', _enc(layer),
+        ', "level": ', _enc(level),
+        ', "summary": ', _enc_value(summary),
+        ', "timestamp": "', _timestamp(epoch), '"',
+    ]
+    if error is not None:
+        parts += (', "error": ', json.dumps(error, ensure_ascii=False, default=str))
+    if extra:
+        for k, v in extra.items():
+            parts += (", ", _enc_value(str(k)), ": ", json.dumps(v, ensure_ascii=False, default=str))
+    parts.append("}")
+    return "".join(parts)
+
+
+# ------------------------------------------------------------
+# Writer
+# ------------------------------------------------------------
+
+def _drain_once(limit: int) -> int:
+    lines: List[str] = []
+    popleft = _queue.popleft
+    for _ in range(limit):
+        try:
+            rec = popleft()
+        except IndexError:
+            break
+        try:
+            lines.append(_format(rec))
+        except Exception as e:
+            lines.append(json.dumps({"log_format_error": repr(e)}))
+
+    if not lines:
+        return 0
+
+    try:
+        out = sys.stdout
+        out.write("\n".join(lines) + "\n")
+        out.flush()
+    except Exception:
+        _stats["write_errors"] += 1
+
+    _stats["written"] += len(lines)
+    _stats["batches"] += 1
+    return len(lines)
+
+
+def _writer_loop() -> None:
+    interval = max(0.001, LOG_FLUSH_INTERVAL_MS / 1000.0)
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+        while _drain_once(LOG_BATCH_MAX) == LOG_BATCH_MAX:
+            pass
+
+
+def _ensure_writer() -> bool:
+    global _writer
+    if _writer is not None:
+        return True
+    with _state_lock:
+        if _writer is None:
+            try:
+                t = threading.Thread(target=_writer_loop, name="ovv-checkpoint-log", daemon=True)
+                t.start()
+            except Exception as e:
+                print(f"[checkpoint_log] writer start failed, fallback to sync: {e!r}")
+                return False
+            _writer = t
+    return True
+
+
+def _detach(rec: Record) -> Record:
+    # writer thread が後で json 化するため、呼び出し側の dict から切り離す（1 段のみ）
+    error, extra = rec[6], rec[7]
+    if not isinstance(error, dict) and not isinstance(extra, dict):
+        return rec
+    return rec[:6] + (
+        dict(error) if isinstance(error, dict) else error,
+        dict(extra) if isinstance(extra, dict) else extra,
+    )
+
+
+def _enqueue(rec: Record) -> None:
+    if not LOG_ASYNC or not _ensure_writer():
+        try:
+            print(_format(rec))
+        except Exception:
+            pass
+        return
+
+    n = len(_queue)
+    if n >= LOG_QUEUE_MAX:
+        _stats["dropped"] += 1
+        return
+
+    try:
+        rec = _detach(rec)
+    except Exception:
+        # コピーできない（変更中など）場合は積まない（観測で呼び出し側を落とさない）
+        _stats["dropped"] += 1
+        return
+    _queue.append(rec)
+    _stats["enqueued"] += 1
+    if n >= _stats["queue_max"]:
+        _stats["queue_max"] = n + 1
+    # ちょうど 1 バッチ分たまった時点で 1 回だけ起こす（writer は満杯バッチが続く限り
+    # 読み切るまで回るので、それ以上積まれても set し直す必要はない）
+    if n + 1 == LOG_BATCH_MAX:
+        _wake.set()
+
+
+# ------------------------------------------------------------
+# Level / sampling
+# ------------------------------------------------------------
+
+def _level_no(level: str) -> int:
+    lv = LEVELS.get(str(level).upper())
+    if lv is None:
+        raise ValueError(f"unknown log level: {level!r} (expected one of {sorted(LEVELS)})")
+    return lv
+
+
+def _env_layer_levels() -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for layer in LAYERS:
+        raw = os.getenv(f"OVV_LOG_LEVEL_{layer}")
+        if raw:
+            try:
+                out[layer] = _level_no(raw)
+            except ValueError as e:
+                print(f"[checkpoint_log] ignore OVV_LOG_LEVEL_{layer}: {e}")
+    return out
+
+
+def _env_default_level() -> int:
+    try:
+        return _level_no(LOG_LEVEL)
+    except ValueError as e:
+        print(f"[checkpoint_log] ignore OVV_LOG_LEVEL: {e}")
+        return LEVELS["DEBUG"]
+
+
+def _sample_threshold(rate: float) -> int:
+    return int(round(min(1.0, max(0.0, rate)) * _SAMPLE_BUCKETS))
+
+
+_default_level = _env_default_level()
+_layer_levels: Dict[str, int] = _env_layer_levels()
+_sample_threshold_now = _sample_threshold(LOG_SAMPLE_RATE)
+
+
+def _trace_sampled(trace_id: Optional[str]) -> bool:
+    threshold = _sample_threshold_now
+    if threshold >= _SAMPLE_BUCKETS or not trace_id or trace_id == "UNKNOWN":
+        return True
+    if threshold <= 0:
+        return False
+    # プロセス間・再起動後も同じ trace は同じ判定になるよう crc32 を使う
+    return zlib.crc32(trace_id.encode("utf-8", "replace")) % _SAMPLE_BUCKETS < threshold
+
+
+def log_enabled(layer: str, level: str, trace_id: Optional[str] = None) -> bool:
+    """
+    (layer, level, trace_id) のログが出力対象かを返す。
+    ERROR 以上は常に True。それ未満は layer のレベルを満たし、かつ trace が sampling 対象のとき。
+    """
+    lv = LEVELS.get(level, 20)
+    if lv >= 40:
+        return True
+    if lv < _layer_levels.get(layer, _default_level):
+        return False
+    return _trace_sampled(trace_id)
+
+
+def set_log_level(layer: str, level: str) -> None:
+    """
+    layer の出力レベルを変更する。layer="*" は既定レベル（上書きの無い layer に適用）。
+    """
+    global _default_level
+    lv = _level_no(level)
+    if layer == "*":
+        _default_level = lv
+    else:
+        _layer_levels[layer.upper()] = lv
+
+
+def set_sample_rate(rate: float) -> None:
+    global _sample_threshold_now
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"sample rate must be within 0.0..1.0: {rate}")
+    _sample_threshold_now = _sample_threshold(rate)
+
+
+def reset_log_config() -> None:
+    """
+    レベル・sampling を環境変数の値に戻す。
+    """
+    global _default_level, _layer_levels, _sample_threshold_now
+    _default_level = _env_default_level()
+    _layer_levels = _env_layer_levels()
+    _sample_threshold_now = _sample_threshold(LOG_SAMPLE_RATE)
+
+
+def log_config() -> Dict[str, Any]:
+    names = {v: k for k, v in LEVELS.items() if k != "WARN"}
+    layers = {layer: names[_layer_levels.get(layer, _default_level)] for layer in LAYERS}
+    for layer, lv in _layer_levels.items():
+        layers.setdefault(layer, names[lv])
+    return {
+        "default": names[_default_level],
+        "layers": layers,
+        "sample_rate": _sample_threshold_now / _SAMPLE_BUCKETS,
+    }
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def _emit(
+    trace_id: Optional[str],
+    checkpoint: str,
+    layer: str,
+    level: str,
+    summary: str,
+    error: Optional[Dict[str, Any]],
+    extra: Optional[Dict[str, Any]],
+) -> None:
+    # log_event / CheckpointLogger.event 共通。到達数・flight_recorder・trace_store は
+    # レベル・sampling と無関係に全件、出力はその後の判定を通ったものだけ
+    key = (layer, checkpoint, level)
+    _checkpoint_counts[key] = _checkpoint_counts.get(key, 0) + 1
+    flight_recorder.note_checkpoint(trace_id, layer, checkpoint, level, summary, error)
+    if trace_store.TRACE_PERSIST:
+        trace_store.note_checkpoint(trace_id, layer, checkpoint, level, summary, error)
+    if not log_enabled(layer, level, trace_id):
+        _stats["suppressed"] += 1
+        return
+    _enqueue((time.time(), trace_id, checkpoint, layer, level, summary, error, extra))
+
+
+def log_event(
+    *,
+    trace_id: Optional[str],
+    checkpoint: str,
+    layer: str,
+    level: str,
+    summary: str,
+    error: Optional[Dict[str, Any]] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    checkpoint ログを 1 件キューに積む（従来の _log_event と同じ出力）。
+    レベル・sampling の対象外なら何もしない。
+    """
+    _emit(trace_id, checkpoint, layer, level, summary, error, extra)
+
+
+def log_payload(payload: Dict[str, Any]) -> None:
+    """
+    任意の dict をそのまま 1 行 JSON として出す（従来の print(json.dumps(payload)) 相当）。
+    """
+    _enqueue((time.time(), None, None, None, None, None, None, payload))
+
+
+class CheckpointLogger:
+    """
+    layer（と任意で trace_id）を束縛した logger。
+      log = checkpoint_logger("BG").bind(trace_id)
+      log.debug(CP_BG_ENTRY, "...")
+    """
+
+    __slots__ = ("layer", "trace_id")
+
+    def __init__(self, layer: str, trace_id: Optional[str] = None) -> None:
+        self.layer = layer
+        self.trace_id = trace_id
+
+    def bind(self, trace_id: Optional[str]) -> "CheckpointLogger":
+        return CheckpointLogger(self.layer, trace_id)
+
+    def event(
+        self,
+        checkpoint: str,
+        level: str,
+        summary: str,
+        *,
+        trace_id: Optional[str] = None,
+        error: Optional[Dict[str, Any]] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        _emit(trace_id or self.trace_id, checkpoint, self.layer, level, summary, error, extra)
+
+    def debug(self, checkpoint: str, summary: str, **kw: Any) -> None:
+        self.event(checkpoint, "DEBUG", summary, **kw)
+
+    def info(self, checkpoint: str, summary: str, **kw: Any) -> None:
+        self.event(checkpoint, "INFO", summary, **kw)
+
+    def error(self, checkpoint: str, summary: str, **kw: Any) -> None:
+        self.event(checkpoint, "ERROR", summary, **kw)
+
+
+def checkpoint_logger(layer: str) -> CheckpointLogger:
+    return CheckpointLogger(layer)
+
+
+def flush_logs(timeout: float = 2.0) -> None:
+    """
+    キューに残っているログを書き出す（shutdown / テスト用）。
+    """
+    deadline = time.monotonic() + timeout
+    while _queue and time.monotonic() < deadline:
+        _drain_once(LOG_BATCH_MAX)
+
+
+def log_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = dict(_stats)
+    out["queued"] = len(_queue)
+    out["async"] = LOG_ASYNC
+    out["writer_alive"] = bool(_writer is not None and _writer.is_alive())
+    return out
+
+
+def checkpoint_counts() -> Dict[Tuple[str, str, str], int]:
+    """
+    (layer, checkpoint, level) ごとの到達数のコピー（metrics 公開用）。
+    """
+    return dict(_checkpoint_counts)
+
+
+atexit.register(flush_logs)
+
+
+__all__ = [
+    "LAYERS",
+    "LEVELS",
+    "CheckpointLogger",
+    "checkpoint_counts",
+    "checkpoint_logger",
+    "flush_logs",
+    "log_config",
+    "log_enabled",
+    "log_event",
+    "log_payload",
+    "log_stats",
+    "reset_log_config",
+    "set_log_level",
+    "set_sample_rate",
+]
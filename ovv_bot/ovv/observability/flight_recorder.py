@@ -0,0 +1,257 @@
+# ovv/observability/flight_recorder.py
+# ============================================================
+# MODULE CONTRACT: Observability / Trace Flight Recorder v1.0
+#
+# ROLE:
+#   - 直近 TRACE_RING_SIZE 件の trace について
+#       - InputPacket（参照のみ保持。読み出し時に JSON-safe 化）
+#       - checkpoint 列（trace 開始からの経過 ms 付き）
+#       - CoreResult の要約
+#       - ERROR checkpoint の error
+#     を固定長リングバッファに保持し、trace_id で引けるようにする。
+#
+# RESPONSIBILITY TAGS:
+#   [RECORD]   note_checkpoint()（checkpoint_log から呼ばれる）/ attach_packet() / attach_result()
+#   [RING]     固定長。溢れたら最も古い trace を捨てる（索引からも消す）
+#   [LAZY]     packet のコピー・シリアライズは読み出し時（dbg_trace / dbg_packet）のみ
+#   [READ]     get_trace(trace_id or 先頭一致) / recent_traces() / last_packet_record()
+#
+# CONSTRAINTS:
+#   - 観測専用（例外を出さない・記録対象を変更しない）
+#   - 1 trace あたりの checkpoint は TRACE_MAX_EVENTS 件まで
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+
+TRACE_RING_SIZE = max(1, int(os.getenv("OVV_TRACE_RING_SIZE", "256")))
+TRACE_MAX_EVENTS = int(os.getenv("OVV_TRACE_MAX_EVENTS", "64"))
+
+# (経過 ms, layer, checkpoint, level, summary)
+Event = Tuple[float, str, str, str, str]
+
+
+class TraceRecord:
+    __slots__ = (
+        "trace_id",
+        "started_at",
+        "t0",
+        "packet",
+        "events",
+        "dropped_events",
+        "errors",
+        "result",
+    )
+
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.packet: Any = None
+        self.events: List[Event] = []
+        self.dropped_events = 0
+        self.errors: List[Tuple[str, Dict[str, Any]]] = []
+        self.result: Optional[Dict[str, Any]] = None
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.events[-1][0] if self.events else 0.0
+
+    @property
+    def command_type(self) -> str:
+        return str(getattr(self.packet, "command", "") or "-")
+
+
+_lock = threading.Lock()
+_ring: List[Optional[TraceRecord]] = [None] * TRACE_RING_SIZE
+_pos = 0
+_index: Dict[str, TraceRecord] = {}
+
+
+def _record_for(trace_id: str) -> TraceRecord:
+    # _lock 保持中に呼ぶこと。無ければ新しいスロットに作る
+    global _pos
+    rec = _index.get(trace_id)
+    if rec is not None:
+        return rec
+    old = _ring[_pos]
+    if old is not None:
+        _index.pop(old.trace_id, None)
+    rec = TraceRecord(trace_id)
+    _ring[_pos] = rec
+    _index[trace_id] = rec
+    _pos = (_pos + 1) % TRACE_RING_SIZE
+    return rec
+
+
+def _valid(trace_id: Optional[str]) -> bool:
+    return bool(trace_id) and trace_id != "UNKNOWN"
+
+
+# ------------------------------------------------------------
+# Record API
+# ------------------------------------------------------------
+
+def note_checkpoint(
+    trace_id: Optional[str],
+    layer: str,
+    checkpoint: str,
+    level: str,
+    summary: str,
+    error: Optional[Dict[str, Any]] = None,
+) -> None:
+    now = time.perf_counter()
+    # 既存 trace への追記は lock を取らない（list.append は GIL 下で原子的。
+    # リングから外れた直後の追記は読まれないだけで害はない）
+    rec = _index.get(trace_id) if trace_id else None
+    if rec is None:
+        if not _valid(trace_id):
+            return
+        with _lock:
+            rec = _record_for(trace_id)
+    events = rec.events
+    if len(events) < TRACE_MAX_EVENTS:
+        events.append(((now - rec.t0) * 1000.0, layer, checkpoint, level, summary))
+    else:
+        rec.dropped_events += 1
+    if error is not None:
+        rec.errors.append((checkpoint, error))
+
+
+def attach_packet(trace_id: Optional[str], packet: Any) -> None:
+    """
+    InputPacket を参照のまま保持する（コピーしない）。
+    """
+    if not _valid(trace_id):
+        return
+    with _lock:
+        _record_for(trace_id).packet = packet
+
+
+def attach_result(trace_id: Optional[str], summary: Dict[str, Any]) -> None:
+    if not _valid(trace_id):
+        return
+    with _lock:
+        _record_for(trace_id).result = summary
+
+
+# ------------------------------------------------------------
+# Read API
+# ------------------------------------------------------------
+
+def _json_safe(value: Any, depth: int = 0) -> Any:
+    if depth > 8:
+        return f"<depth limit {type(value).__name__}>"
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v, depth + 1) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "__dict__"):
+        return _json_safe(vars(value), depth + 1)
+    return f"<unserializable {type(value).__name__}: {value!r}>"
+
+
+def to_dict(rec: TraceRecord) -> Dict[str, Any]:
+    """
+    TraceRecord を JSON-safe な dict にする（読み出し時のみ）。
+    """
+    with _lock:
+        events = list(rec.events)
+        errors = list(rec.errors)
+        packet = rec.packet
+        result = rec.result
+        dropped = rec.dropped_events
+    return {
+        "trace_id": rec.trace_id,
+        "started_at": rec.started_at,
+        "command_type": rec.command_type,
+        "elapsed_ms": round(events[-1][0], 3) if events else 0.0,
+        "checkpoints": [
+            {"at_ms": round(at, 3), "layer": layer, "checkpoint": cp, "level": level, "summary": summary}
+            for at, layer, cp, level, summary in events
+        ],
+        "dropped_checkpoints": dropped,
+        "errors": [{"checkpoint": cp, **_json_safe(err)} for cp, err in errors],
+        "result": _json_safe(result),
+        "packet": _json_safe(packet),
+    }
+
+
+def get_trace(trace_id_or_prefix: str) -> Optional[TraceRecord]:
+    """
+    trace_id で引く。完全一致が無ければ先頭一致（一意な場合のみ）。
+    """
+    key = (trace_id_or_prefix or "").strip()
+    if not key:
+        return None
+    with _lock:
+        rec = _index.get(key)
+        if rec is not None:
+            return rec
+        matches = [r for tid, r in _index.items() if tid.startswith(key)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def recent_traces(limit: int = 10) -> List[TraceRecord]:
+    """
+    新しい順に最大 limit 件。
+    """
+    out: List[TraceRecord] = []
+    with _lock:
+        for i in range(1, TRACE_RING_SIZE + 1):
+            rec = _ring[(_pos - i) % TRACE_RING_SIZE]
+            if rec is None:
+                break
+            out.append(rec)
+            if len(out) >= limit:
+                break
+    return out
+
+
+def last_packet_record() -> Optional[TraceRecord]:
+    """
+    packet を持つ最新の trace。
+    """
+    with _lock:
+        for i in range(1, TRACE_RING_SIZE + 1):
+            rec = _ring[(_pos - i) % TRACE_RING_SIZE]
+            if rec is None:
+                return None
+            if rec.packet is not None:
+                return rec
+    return None
+
+
+def recorder_stats() -> Dict[str, Any]:
+    with _lock:
+        return {"size": len(_index), "capacity": TRACE_RING_SIZE, "max_events": TRACE_MAX_EVENTS}
+
+
+def clear_traces() -> None:
+    global _pos
+    with _lock:
+        for i in range(TRACE_RING_SIZE):
+            _ring[i] = None
+        _index.clear()
+        _pos = 0
+
+
+__all__ = [
+    "TraceRecord",
+    "attach_packet",
+    "attach_result",
+    "clear_traces",
+    "get_trace",
+    "last_packet_record",
+    "note_checkpoint",
+    "recent_traces",
+    "recorder_stats",
+    "to_dict",
+]
@@ -0,0 +1,101 @@
+# ovv/observability/histogram.py
+# ============================================================
+# MODULE CONTRACT: Observability / Log-Linear Histogram v1.0
+#
+# ROLE:
+#   - レイテンシ分布を固定相対誤差で保持する HDR 風ヒストグラム。
+#     値（マイクロ秒の整数）を「2 のべき乗ごとに SUB_BUCKETS 等分」したバケットに数える。
+#
+# RESPONSIBILITY TAGS:
+#   [RECORD]   record(value_us) : O(1)
+#   [MERGE]    merge(other)     : 時間窓の合成用
+#   [QUERY]    percentile(q) / count / max / mean
+#
+# PRECISION:
+#   - SUB_BUCKETS=32 → 相対誤差 ≒ 1/64（約 1.6%）。値域の上限なし（疎な dict で保持）
+#
+# CONSTRAINTS:
+#   - スレッド安全ではない（呼び出し側でロックする）
+# ============================================================
+
+from __future__ import annotations
+
+from typing import Dict, Iterable
+
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket_index(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return max(0, value)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + ((value >> shift) - SUB_BUCKETS)
+
+
+def bucket_value(index: int) -> float:
+    """
+    バケットの代表値（区間の中点）。
+    """
+    if index < SUB_BUCKETS:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    low = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+    return low + ((1 << shift) - 1) / 2.0
+
+
+class LogLinearHistogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_us: int) -> None:
+        if value_us < 0:
+            value_us = 0
+        idx = bucket_index(value_us)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.count += 1
+        self.total += value_us
+        if value_us > self.max:
+            self.max = value_us
+
+    def merge(self, other: "LogLinearHistogram") -> None:
+        counts = self.counts
+        for idx, n in other.counts.items():
+            counts[idx] = counts.get(idx, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    @classmethod
+    def merged(cls, parts: Iterable["LogLinearHistogram"]) -> "LogLinearHistogram":
+        out = cls()
+        for p in parts:
+            out.merge(p)
+        return out
+
+    def percentile(self, q: float) -> float:
+        """
+        q（0.0〜1.0）分位の値（マイクロ秒）。空なら 0。
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.999999))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(bucket_value(idx), float(self.max))
+        return float(self.max)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+__all__ = ["LogLinearHistogram", "bucket_index", "bucket_value"]
@@ -0,0 +1,287 @@
+# ovv/observability/loop_monitor.py
+# ============================================================
+# MODULE CONTRACT: Observability / Event Loop Monitor v1.0
+#
+# ROLE:
+#   - event loop の遅延（lag）を常時計測し、閾値を超えて止まっている間に
+#     loop スレッドのスタックを別スレッドから採取する。
+#   - 停止を trace_id / command_type / 実行中 stage に帰属させる。
+#
+# RESPONSIBILITY TAGS:
+#   [TICK]      loop 上の ticker task : LOOP_TICK_MS ごとに sleep し、予定との差を lag として記録
+#   [WATCHDOG]  daemon thread : ticker の heartbeat が LOOP_STALL_MS 以上途絶えたら
+#               sys._current_frames() で loop スレッドのスタックを採取（停止中に 1 回）
+#   [ATTRIBUTE] asyncio.current_task(loop) → stage_metrics.task_span_info() で
+#               trace_id / command_type / stage を特定
+#   [OBSERVE]   metrics ovv_event_loop_lag_seconds / ovv_event_loop_stalls_total{stage}
+#               停止ごとに LOOP_STALL checkpoint（WARNING）を該当 trace に記録
+#   [READ]      loop_snapshot() / recent_stalls()（!dbg_loop）
+#
+# CONSTRAINTS:
+#   - 観測専用（例外を出さない・挙動を変えない）
+#   - start_loop_monitor() は何度呼んでも 1 組しか起動しない（on_ready は再接続でも呼ばれる）
+#   - OVV_LOOP_MONITOR=0 なら起動しない
+# ============================================================
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+from . import metrics
+from .checkpoint_log import log_event
+from .histogram import LogLinearHistogram
+from .stage_metrics import task_span_info
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+LOOP_MONITOR = os.getenv("OVV_LOOP_MONITOR", "1") != "0"
+LOOP_TICK_MS = float(os.getenv("OVV_LOOP_TICK_MS", "100"))
+LOOP_STALL_MS = float(os.getenv("OVV_LOOP_STALL_MS", "200"))
+LOOP_STALL_KEEP = int(os.getenv("OVV_LOOP_STALL_KEEP", "50"))
+LOOP_STACK_DEPTH = int(os.getenv("OVV_LOOP_STACK_DEPTH", "20"))
+
+# lag の分布を見る時間窓（秒）
+LOOP_WINDOW_SECONDS = 60
+
+LAYER_LOOP = "LOOP"
+CP_LOOP_STALL = "LOOP_STALL"
+
+_M_LAG = metrics.histogram(
+    "ovv_event_loop_lag_seconds",
+    "Event loop scheduling lag measured by the ticker",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+_M_STALLS = metrics.counter(
+    "ovv_event_loop_stalls_total", "Event loop stalls over OVV_LOOP_STALL_MS", ("stage",)
+)
+
+
+# ------------------------------------------------------------
+# State
+# ------------------------------------------------------------
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread_id: Optional[int] = None
+_ticker: Optional["asyncio.Task[None]"] = None
+_watchdog: Optional[threading.Thread] = None
+
+# ticker が最後に起きた時刻（monotonic）
+_last_beat: Optional[float] = None
+
+# watchdog が採取した、まだ終わっていない停止（ticker が再開時に確定させる）
+_pending: Optional[Dict[str, Any]] = None
+
+# (monotonic, lag_ms)。LOOP_WINDOW_SECONDS 分
+_lags: Deque[Tuple[float, float]] = deque()
+_lag_hist = LogLinearHistogram()
+_stalls: Deque[Dict[str, Any]] = deque(maxlen=LOOP_STALL_KEEP)
+_stats: Dict[str, Any] = {"ticks": 0, "stalls": 0, "stacks_captured": 0, "max_lag_ms": 0.0}
+
+
+# ------------------------------------------------------------
+# Watchdog (thread)
+# ------------------------------------------------------------
+
+def _capture(beat: float, now: float) -> Dict[str, Any]:
+    stall: Dict[str, Any] = {
+        "started_at": time.time() - (now - beat),
+        "beat": beat,
+        "duration_ms": None,
+        "trace_id": None,
+        "command_type": None,
+        "stage": None,
+        "task": None,
+        "stack": None,
+    }
+    try:
+        frame = sys._current_frames().get(_loop_thread_id)
+        if frame is not None:
+            stall["stack"] = traceback.format_stack(frame)[-LOOP_STACK_DEPTH:]
+            _stats["stacks_captured"] += 1
+    except Exception:
+        pass
+    try:
+        task = asyncio.current_task(_loop) if _loop is not None else None
+        if task is not None:
+            stall["task"] = task.get_name()
+            info = task_span_info(task)
+            if info is not None:
+                stall["trace_id"] = info["trace_id"]
+                stall["command_type"] = info["command_type"]
+                stall["stage"] = info["stages"][-1] if info["stages"] else None
+    except Exception:
+        pass
+    return stall
+
+
+def _watchdog_loop() -> None:
+    global _pending
+    interval = max(0.01, min(LOOP_TICK_MS, LOOP_STALL_MS) / 2000.0)
+    idle = threading.Event()   # time.sleep ではなく wait（profiler から待機中と判別できる）
+    while True:
+        idle.wait(interval)
+        beat = _last_beat
+        if beat is None:
+            continue
+        now = time.monotonic()
+        overdue_ms = (now - beat) * 1000.0 - LOOP_TICK_MS
+        if overdue_ms < LOOP_STALL_MS:
+            continue
+        with _lock:
+            if _pending is not None and _pending["beat"] == beat:
+                continue
+        stall = _capture(beat, now)
+        with _lock:
+            if _last_beat == beat:
+                _pending = stall
+
+
+# ------------------------------------------------------------
+# Ticker (event loop)
+# ------------------------------------------------------------
+
+def _finish_stall(lag_ms: float, beat: float) -> None:
+    global _pending
+    with _lock:
+        stall = _pending if _pending is not None and _pending["beat"] == beat else None
+        _pending = None
+    if stall is None:
+        # watchdog の確認間隔より短い停止（スタックなし）
+        stall = {
+            "started_at": time.time() - lag_ms / 1000.0,
+            "beat": beat,
+            "trace_id": None,
+            "command_type": None,
+            "stage": None,
+            "task": None,
+            "stack": None,
+        }
+    stall["duration_ms"] = round(lag_ms, 1)
+    _stalls.append(stall)
+    _stats["stalls"] += 1
+    _M_STALLS.labels(stall["stage"] or "-").inc()
+
+    top = stall["stack"][-1].strip().splitlines()[0] if stall["stack"] else "-"
+    log_event(
+        trace_id=stall["trace_id"],
+        checkpoint=CP_LOOP_STALL,
+        layer=LAYER_LOOP,
+        level="WARNING",
+        summary=f"event loop stalled {lag_ms:.0f} ms in {stall['stage'] or '-'}",
+        extra={"stall_ms": round(lag_ms, 1), "stage": stall["stage"], "task": stall["task"], "at": top},
+    )
+
+
+def _record_lag(now: float, lag_ms: float) -> None:
+    _stats["ticks"] += 1
+    if lag_ms > _stats["max_lag_ms"]:
+        _stats["max_lag_ms"] = round(lag_ms, 1)
+    _lags.append((now, lag_ms))
+    horizon = now - LOOP_WINDOW_SECONDS
+    while _lags and _lags[0][0] < horizon:
+        _lags.popleft()
+    _lag_hist.record(int(lag_ms * 1000.0))
+    _M_LAG.observe(lag_ms / 1000.0)
+
+
+async def _tick_forever() -> None:
+    global _last_beat
+    interval = LOOP_TICK_MS / 1000.0
+    _last_beat = time.monotonic()
+    while True:
+        beat = _last_beat
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        lag_ms = max(0.0, (now - beat - interval) * 1000.0)
+        with _lock:
+            _last_beat = now
+        try:
+            _record_lag(now, lag_ms)
+            if lag_ms >= LOOP_STALL_MS:
+                _finish_stall(lag_ms, beat)
+        except Exception as e:
+            print(f"[loop_monitor] tick failed (ignored): {e!r}")
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def start_loop_monitor(loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+    """
+    実行中の event loop 上で ticker を、別スレッドで watchdog を起動する。
+    既に起動済み・無効化されている場合は何もしない。
+    """
+    global _loop, _loop_thread_id, _ticker, _watchdog
+    if not LOOP_MONITOR:
+        return False
+    if _ticker is not None and not _ticker.done():
+        return True
+    try:
+        _loop = loop or asyncio.get_running_loop()
+        _loop_thread_id = threading.get_ident()
+        _ticker = _loop.create_task(_tick_forever(), name="ovv-loop-monitor")
+        if _watchdog is None:
+            _watchdog = threading.Thread(target=_watchdog_loop, name="ovv-loop-watchdog", daemon=True)
+            _watchdog.start()
+    except Exception as e:
+        print(f"[loop_monitor] start failed (ignored): {e!r}")
+        return False
+    print(f"[loop_monitor] started tick={LOOP_TICK_MS:.0f}ms stall>={LOOP_STALL_MS:.0f}ms")
+    return True
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def loop_snapshot() -> Dict[str, Any]:
+    """
+    直近 LOOP_WINDOW_SECONDS の lag 分布と累計。
+    """
+    window = [lag for _, lag in list(_lags)]
+    return {
+        "running": _ticker is not None and not _ticker.done(),
+        "tick_ms": LOOP_TICK_MS,
+        "stall_ms": LOOP_STALL_MS,
+        "window_seconds": LOOP_WINDOW_SECONDS,
+        "window": {
+            "count": len(window),
+            "p50_ms": round(_percentile(window, 0.50), 2),
+            "p99_ms": round(_percentile(window, 0.99), 2),
+            "max_ms": round(max(window), 2) if window else 0.0,
+        },
+        "total": {
+            "p50_ms": round(_lag_hist.percentile(0.50) / 1000.0, 2),
+            "p99_ms": round(_lag_hist.percentile(0.99) / 1000.0, 2),
+        },
+        **_stats,
+    }
+
+
+def recent_stalls(limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    新しい順に最大 limit 件。
+    """
+    return list(reversed(list(_stalls)))[:limit]
+
+
+__all__ = [
+    "loop_snapshot",
+    "recent_stalls",
+    "start_loop_monitor",
+]
@@ -0,0 +1,372 @@
+# ovv/observability/metrics.py
+# ============================================================
+# MODULE CONTRACT: Observability / Metrics Registry v1.0
+#
+# ROLE:
+#   - Counter / Gauge / Histogram の軽量レジストリと、
+#     Prometheus text format（0.0.4）でのローカル公開（/metrics）。
+#
+# RESPONSIBILITY TAGS:
+#   [REGISTER]   counter() / gauge() / histogram() : 同名なら既存を返す（再 import 安全）
+#                counter 名は "_total" で終えること（サンプル名 = メトリクス名）
+#   [RECORD]     metric.labels(...).inc() / .set() / .observe()
+#                ホットパスでは labels(...) の結果（child）を使い回す
+#   [COLLECT]    register_collector(fn) : scrape 時にだけ呼ばれる（既存の stats をそのまま公開）
+#   [EXPOSE]     render() / start_metrics_server()（OVV_METRICS_PORT が設定された場合のみ）
+#
+# CONSTRAINTS:
+#   - 観測専用（記録・収集で例外を出さない / 挙動を変えない）
+#   - HTTP は標準ライブラリのみ・daemon thread（event loop に載せない）
+#   - 既定では 127.0.0.1 のみで listen する
+# ============================================================
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import math
+import os
+import threading
+
+
+METRICS_HOST = os.getenv("OVV_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("OVV_METRICS_PORT", "0") or "0")   # 0 = 公開しない
+
+# 秒単位のレイテンシ用の既定バケット
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Sample(NamedTuple):
+    suffix: str                 # "" / "_bucket" / "_sum" / "_count"
+    labels: Dict[str, str]
+    value: float
+
+
+class MetricFamily(NamedTuple):
+    name: str
+    type: str                   # counter / gauge / histogram
+    help: str
+    samples: List[Sample]
+
+
+# ------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        # 文字列ラベルならそのままキーとして引ける（ホットパス）
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _label_dict(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class _ValueChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        self.labels(*labels).inc(amount)
+
+    def collect(self) -> MetricFamily:
+        samples = [
+            Sample("", self._label_dict(k), c.value) for k, c in list(self._children.items())
+        ]
+        return MetricFamily(self.name, self.type, self.help, samples)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+    def set(self, value: float, *labels: Any) -> None:
+        self.labels(*labels).set(value)
+
+    def collect(self) -> MetricFamily:
+        samples = [
+            Sample("", self._label_dict(k), c.value) for k, c in list(self._children.items())
+        ]
+        return MetricFamily(self.name, self.type, self.help, samples)
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)     # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, *labels: Any) -> None:
+        self.labels(*labels).observe(value)
+
+    def collect(self) -> MetricFamily:
+        samples: List[Sample] = []
+        for key, c in list(self._children.items()):
+            with c._lock:
+                counts, total, count = list(c.counts), c.sum, c.count
+            samples.extend(histogram_samples(self._label_dict(key), self.buckets, counts, total, count))
+        return MetricFamily(self.name, self.type, self.help, samples)
+
+
+def histogram_samples(
+    labels: Dict[str, str],
+    bounds: Sequence[float],
+    counts: Sequence[int],
+    total: float,
+    count: int,
+) -> List[Sample]:
+    """
+    バケットごとの件数（非累積、末尾 +Inf）から _bucket / _sum / _count を作る。
+    collector が自前の分布を公開するときにも使う。
+    """
+    out: List[Sample] = []
+    acc = 0
+    for bound, n in zip(bounds, counts):
+        acc += n
+        out.append(Sample("_bucket", {**labels, "le": _fmt_value(bound)}, acc))
+    out.append(Sample("_bucket", {**labels, "le": "+Inf"}, count))
+    out.append(Sample("_sum", labels, total))
+    out.append(Sample("_count", labels, count))
+    return out
+
+
+# ------------------------------------------------------------
+# Registry
+# ------------------------------------------------------------
+
+_registry_lock = threading.Lock()
+_metrics: Dict[str, _Metric] = {}
+_collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def _get_or_create(cls: type, name: str, help: str, labelnames: Sequence[str], **kw: Any) -> Any:
+    with _registry_lock:
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = cls(name, help, labelnames, **kw)
+        elif not isinstance(m, cls) or m.labelnames != tuple(labelnames):
+            raise ValueError(f"metric {name} already registered with a different type/labels")
+        return m
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _get_or_create(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, help, labelnames)
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+
+def register_collector(fn: Callable[[], Iterable[MetricFamily]]) -> None:
+    """
+    scrape 時に呼ばれる収集関数を登録する（同じ関数の二重登録は無視）。
+    """
+    with _registry_lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+
+
+# ------------------------------------------------------------
+# Exposition
+# ------------------------------------------------------------
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if math.isnan(v):
+        return "NaN"
+    if float(v).is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_family(fam: MetricFamily, out: List[str]) -> None:
+    out.append(f"# HELP {fam.name} {fam.help.replace(chr(10), ' ')}")
+    out.append(f"# TYPE {fam.name} {fam.type}")
+    for s in fam.samples:
+        if s.labels:
+            body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in s.labels.items())
+            out.append(f"{fam.name}{s.suffix}{{{body}}} {_fmt_value(s.value)}")
+        else:
+            out.append(f"{fam.name}{s.suffix} {_fmt_value(s.value)}")
+
+
+def collect_all() -> List[MetricFamily]:
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+
+    families = [m.collect() for m in metrics]
+    for fn in collectors:
+        try:
+            families.extend(fn())
+        except Exception as e:
+            print(f"[metrics] collector {getattr(fn, '__name__', fn)} failed: {e!r}")
+    return families
+
+
+def render() -> str:
+    out: List[str] = []
+    for fam in collect_all():
+        _render_family(fam, out)
+    return "\n".join(out) + "\n"
+
+
+# ------------------------------------------------------------
+# HTTP endpoint
+# ------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        try:
+            body = render().encode("utf-8")
+        except Exception as e:
+            self.send_error(500, repr(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # scrape ごとのアクセスログは出さない
+        return
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[int]:
+    """
+    /metrics を daemon thread で公開する。port 未指定かつ OVV_METRICS_PORT=0 なら何もしない。
+    二回目以降の呼び出しは既存サーバのポートを返す。
+    """
+    global _server
+    if _server is not None:
+        return _server.server_address[1]
+
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+
+    server = ThreadingHTTPServer((host or METRICS_HOST, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="ovv-metrics-http", daemon=True).start()
+    _server = server
+    print(f"[metrics] serving /metrics on {host or METRICS_HOST}:{server.server_address[1]}")
+    return server.server_address[1]
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricFamily",
+    "Sample",
+    "collect_all",
+    "counter",
+    "gauge",
+    "histogram",
+    "histogram_samples",
+    "register_collector",
+    "render",
+    "start_metrics_server",
+]
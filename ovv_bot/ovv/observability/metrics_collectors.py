@@ -0,0 +1,177 @@
+# ovv/observability/metrics_collectors.py
+# ============================================================
+# MODULE CONTRACT: Observability / Default Metrics Collectors v1.0
+#
+# ROLE:
+#   - 各モジュールが既に持っている stats（キュー深さ・キャッシュ hit/miss・
+#     stage ヒストグラム等）を scrape 時に MetricFamily へ変換する。
+#     メッセージ処理側には何も追加しない（読むのは scrape のときだけ）。
+#
+# RESPONSIBILITY TAGS:
+#   [COLLECT]   checkpoint_log（checkpoint 到達数を含む）/ trace_store / stage_metrics / classify_cache /
+#               LLM single-flight・response cache / TB prompt memo
+#   [REGISTER]  register_default_collectors()（start_metrics_server 前に 1 回）
+#
+# CONSTRAINTS:
+#   - 依存モジュールは収集時に遅延 import（未導入なら何も出さない）
+# ============================================================
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List
+
+from .histogram import bucket_value
+from .metrics import (
+    DEFAULT_BUCKETS,
+    MetricFamily,
+    Sample,
+    histogram_samples,
+    register_collector,
+)
+
+
+def _family(name: str, type_: str, help: str, samples: List[Sample]) -> MetricFamily:
+    return MetricFamily(name, type_, help, samples)
+
+
+# ------------------------------------------------------------
+# Collectors
+# ------------------------------------------------------------
+
+def collect_checkpoint_log() -> Iterable[MetricFamily]:
+    from .checkpoint_log import checkpoint_counts, log_stats
+
+    yield _family("ovv_checkpoints_total", "counter", "Pipeline checkpoints reached", [
+        Sample("", {"layer": str(layer), "checkpoint": str(checkpoint), "level": str(level)}, n)
+        for (layer, checkpoint, level), n in sorted(checkpoint_counts().items(), key=lambda kv: tuple(map(str, kv[0])))
+    ])
+    st = log_stats()
+    yield _family("ovv_log_queue_depth", "gauge", "Checkpoint log records waiting for the writer",
+                  [Sample("", {}, st["queued"])])
+    yield _family("ovv_log_records_total", "counter", "Checkpoint log records by outcome", [
+        Sample("", {"result": r}, st[r]) for r in ("enqueued", "written", "dropped", "suppressed")
+    ])
+    yield _family("ovv_log_write_errors_total", "counter", "Checkpoint log batch write failures",
+                  [Sample("", {}, st["write_errors"])])
+
+
+def collect_trace_store() -> Iterable[MetricFamily]:
+    from .trace_store import trace_store_stats
+
+    st = trace_store_stats()
+    if not st["enabled"]:
+        return
+    yield _family("ovv_trace_store_queue_depth", "gauge", "Trace events waiting for the PostgreSQL writer",
+                  [Sample("", {}, st["queued"])])
+    yield _family("ovv_trace_store_events_total", "counter", "Trace events by outcome", [
+        Sample("", {"result": r}, st[r]) for r in ("enqueued", "written", "dropped")
+    ])
+    yield _family("ovv_trace_store_write_errors_total", "counter", "Trace event batch write failures",
+                  [Sample("", {}, st["write_errors"])])
+
+
+def collect_stage_histograms() -> Iterable[MetricFamily]:
+    from .stage_metrics import stage_histograms
+
+    bounds_us = [b * 1e6 for b in DEFAULT_BUCKETS]
+    samples: List[Sample] = []
+    for (stage, command_type), h in sorted(stage_histograms().items()):
+        counts = [0] * (len(bounds_us) + 1)
+        for idx, n in h.counts.items():
+            counts[bisect_left(bounds_us, bucket_value(idx))] += n
+        samples.extend(histogram_samples(
+            {"stage": stage, "command_type": command_type},
+            DEFAULT_BUCKETS,
+            counts,
+            h.total / 1e6,
+            h.count,
+        ))
+    yield _family("ovv_stage_duration_seconds", "histogram",
+                  "Pipeline stage duration (log-linear buckets folded into le)", samples)
+
+
+def collect_classify_memo() -> Iterable[MetricFamily]:
+    from ovv.bis.utils.classify_cache import classify_cache_stats
+
+    st = classify_cache_stats()
+    samples: List[Sample] = []
+    for ns, c in st["namespaces"].items():
+        samples.append(Sample("", {"namespace": ns, "result": "hit"}, c["hits"]))
+        samples.append(Sample("", {"namespace": ns, "result": "miss"}, c["misses"]))
+    yield _family("ovv_classify_memo_lookups_total", "counter", "Classification memo lookups", samples)
+    yield _family("ovv_classify_memo_entries", "gauge", "Classification memo entries",
+                  [Sample("", {}, st["lru"]["size"])])
+    yield _family("ovv_classify_memo_evictions_total", "counter", "Classification memo evictions",
+                  [Sample("", {}, st["lru"]["evictions"])])
+
+
+def _lru_samples(cache: str, st: Dict[str, Any]) -> Dict[str, List[Sample]]:
+    return {
+        "lookups": [
+            Sample("", {"cache": cache, "result": "hit"}, st["hits"]),
+            Sample("", {"cache": cache, "result": "miss"}, st["misses"]),
+        ],
+        "entries": [Sample("", {"cache": cache}, st["size"])],
+    }
+
+
+def collect_llm() -> Iterable[MetricFamily]:
+    from ovv.external_services.llm.response_cache import cache_stats
+    from ovv.external_services.llm.single_flight import llm_single_flight
+
+    sf = llm_single_flight.stats()
+    yield _family("ovv_llm_requests_total", "counter", "LLM requests by single-flight outcome", [
+        Sample("", {"result": "executed"}, sf["executions"]),
+        Sample("", {"result": "shared_inflight"}, sf["shared_inflight"]),
+        Sample("", {"result": "recent_hit"}, sf["recent_hits"]),
+    ])
+    yield _family("ovv_llm_inflight", "gauge", "LLM requests currently in flight",
+                  [Sample("", {}, sf["inflight"])])
+
+    cs = cache_stats()
+    yield _family("ovv_llm_response_cache_total", "counter", "LLM response cache lookups and writes", [
+        Sample("", {"result": "memory_hit"}, cs["memory_hits"]),
+        Sample("", {"result": "pg_hit"}, cs["pg_hits"]),
+        Sample("", {"result": "miss"}, cs["misses"]),
+        Sample("", {"result": "put"}, cs["puts"]),
+        Sample("", {"result": "pg_error"}, cs["pg_errors"]),
+    ])
+
+
+def collect_memo_caches() -> Iterable[MetricFamily]:
+    from database.pg_wbs import wbs_cache_stats
+    from ovv.brain.tb_prompt_cache import prompt_cache_stats
+    from ovv.external_services.llm.response_cache import cache_stats
+    from ovv.external_services.notion.ops.executor import page_cache_stats
+
+    lookups: List[Sample] = []
+    entries: List[Sample] = []
+    parts = {f"tb_{k}": v for k, v in prompt_cache_stats().items()}
+    parts["llm_response_memory"] = cache_stats()["memory"]
+    parts["thread_wbs"] = wbs_cache_stats()
+    parts["notion_page_id"] = page_cache_stats()
+    for cache, st in sorted(parts.items()):
+        s = _lru_samples(cache, st)
+        lookups.extend(s["lookups"])
+        entries.extend(s["entries"])
+    yield _family("ovv_cache_lookups_total", "counter", "In-process LRU cache lookups", lookups)
+    yield _family("ovv_cache_entries", "gauge", "In-process LRU cache entries", entries)
+
+
+DEFAULT_COLLECTORS = (
+    collect_checkpoint_log,
+    collect_trace_store,
+    collect_stage_histograms,
+    collect_classify_memo,
+    collect_llm,
+    collect_memo_caches,
+)
+
+
+def register_default_collectors() -> None:
+    for fn in DEFAULT_COLLECTORS:
+        register_collector(fn)
+
+
+__all__ = ["DEFAULT_COLLECTORS", "register_default_collectors"]
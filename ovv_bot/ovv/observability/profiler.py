@@ -0,0 +1,309 @@
+# ovv/observability/profiler.py
+# ============================================================
+# MODULE CONTRACT: Observability / Sampling Profiler v1.0
+#
+# ROLE:
+#   - 本番プロセス内で、指定秒数だけ全スレッドのスタックを一定間隔でサンプリングし、
+#     pipeline の stage / checkpoint ごとに集計する（外部 profiler を attach できない環境向け）。
+#   - 結果は flamegraph 互換の collapsed stack（"a;b;c count"）で出力する。
+#
+# RESPONSIBILITY TAGS:
+#   [SAMPLE]    daemon thread が PROF_INTERVAL_MS ごとに sys._current_frames() を読む
+#   [ATTRIBUTE] loop スレッド : asyncio.current_task(loop) → stage_metrics.task_span_info()
+#               worker スレッド : stage_metrics.thread_span_info()
+#               stage は "[stage] x" フレームとしてスタックの根元に付ける
+#               checkpoint は flight_recorder の trace の最新 checkpoint
+#   [IDLE]      待機中（select / wait / queue.get 等）のサンプルは数えるだけで集計しない
+#   [SESSION]   start_profile(seconds) / stop_profile() / last_profile()（1 度に 1 セッション）
+#   [EXPORT]    ProfileResult.collapsed() / summary_lines()
+#
+# CONSTRAINTS:
+#   - 観測専用（例外を出さない・挙動を変えない）
+#   - 既定では止まっている（!dbg_prof start で起動したときだけ動く）
+#   - 1 セッションは最大 PROF_MAX_SECONDS
+# ============================================================
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from . import flight_recorder
+from .stage_metrics import task_span_info, thread_span_info
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+PROF_INTERVAL_MS = float(os.getenv("OVV_PROF_INTERVAL_MS", "10"))
+PROF_MAX_SECONDS = float(os.getenv("OVV_PROF_MAX_SECONDS", "300"))
+PROF_MAX_DEPTH = int(os.getenv("OVV_PROF_MAX_DEPTH", "64"))
+
+# スタック先頭（最も内側）がこれなら待機中とみなす: (ファイル名, 関数名)
+_IDLE_TOPS = frozenset((
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socketserver.py", "serve_forever"),
+))
+
+_STAGE_PREFIX = "[stage] "
+_NO_STAGE = "-"
+
+
+# ------------------------------------------------------------
+# Result
+# ------------------------------------------------------------
+
+class ProfileResult:
+    """
+    1 セッション分の集計。
+      stacks       : collapsed stack -> サンプル数
+      by_stage     : 最も内側の stage（無ければ "-"）-> サンプル数
+      by_checkpoint: trace の最新 checkpoint -> サンプル数
+      self_frames  : 最も内側の関数 -> サンプル数
+    """
+
+    __slots__ = (
+        "started_at",
+        "duration_s",
+        "interval_ms",
+        "ticks",
+        "samples",
+        "idle",
+        "stacks",
+        "by_stage",
+        "by_checkpoint",
+        "self_frames",
+        "sample_cost_us",
+    )
+
+    def __init__(self, interval_ms: float) -> None:
+        self.started_at = time.time()
+        self.duration_s = 0.0
+        self.interval_ms = interval_ms
+        self.ticks = 0
+        self.samples = 0
+        self.idle = 0
+        self.stacks: Counter = Counter()
+        self.by_stage: Counter = Counter()
+        self.by_checkpoint: Counter = Counter()
+        self.self_frames: Counter = Counter()
+        self.sample_cost_us = 0.0
+
+    def collapsed(self) -> str:
+        """
+        flamegraph.pl / speedscope / inferno が読める collapsed stack 形式。
+        """
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def summary_lines(self, top: int = 12) -> List[str]:
+        busy = max(1, self.samples)
+        lines = [
+            f"duration={self.duration_s:.1f}s interval={self.interval_ms:.0f}ms ticks={self.ticks} "
+            f"samples={self.samples} idle={self.idle} cost={self.sample_cost_us:.0f}us/tick",
+            "",
+            "[stage]",
+        ]
+        for name, n in self.by_stage.most_common(top):
+            lines.append(f"{n / busy * 100:>6.1f}%  {name}")
+        if self.by_checkpoint:
+            lines.extend(["", "[last checkpoint]"])
+            for name, n in self.by_checkpoint.most_common(top):
+                lines.append(f"{n / busy * 100:>6.1f}%  {name}")
+        lines.extend(["", "[self]"])
+        for name, n in self.self_frames.most_common(top):
+            lines.append(f"{n / busy * 100:>6.1f}%  {name}")
+        return lines
+
+
+# ------------------------------------------------------------
+# Sampling
+# ------------------------------------------------------------
+
+_label_cache: Dict[Any, str] = {}
+
+
+def _label(code: Any) -> str:
+    label = _label_cache.get(code)
+    if label is None:
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{os.path.basename(code.co_filename)}:{name}"
+        _label_cache[code] = label
+    return label
+
+
+def _is_idle(frame: Any) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_TOPS
+
+
+def _frames(frame: Any) -> List[str]:
+    out: List[str] = []
+    while frame is not None and len(out) < PROF_MAX_DEPTH:
+        out.append(_label(frame.f_code))
+        frame = frame.f_back
+    out.reverse()
+    return out
+
+
+def _last_checkpoint(trace_id: Optional[str]) -> Optional[str]:
+    if not trace_id:
+        return None
+    rec = flight_recorder.get_trace(trace_id)
+    if rec is None or not rec.events:
+        return None
+    return rec.events[-1][2]
+
+
+class _Session:
+    def __init__(
+        self,
+        seconds: float,
+        interval_ms: float,
+        loop: Optional[asyncio.AbstractEventLoop],
+        loop_thread_id: Optional[int],
+    ) -> None:
+        self.seconds = seconds
+        self.interval = interval_ms / 1000.0
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.result = ProfileResult(interval_ms)
+        self.stop = threading.Event()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="ovv-profiler", daemon=True)
+        self._cost = 0.0
+
+    def _span_for(self, thread_id: int) -> Optional[Dict[str, Any]]:
+        if thread_id == self.loop_thread_id and self.loop is not None:
+            task = asyncio.current_task(self.loop)
+            return task_span_info(task) if task is not None else None
+        return thread_span_info(thread_id)
+
+    def sample(self) -> None:
+        res = self.result
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            if _is_idle(frame):
+                res.idle += 1
+                continue
+            try:
+                span = self._span_for(thread_id)
+            except Exception:
+                span = None
+            stages = span["stages"] if span else []
+            frames = _frames(frame)
+            root = [f"[thread] {names.get(thread_id, thread_id)}"]
+            root.extend(_STAGE_PREFIX + s for s in stages)
+            res.stacks[";".join(root + frames)] += 1
+            res.by_stage[stages[-1] if stages else _NO_STAGE] += 1
+            cp = _last_checkpoint(span["trace_id"]) if span else None
+            if cp:
+                res.by_checkpoint[cp] += 1
+            res.self_frames[frames[-1] if frames else "?"] += 1
+            res.samples += 1
+
+    def run(self) -> None:
+        t_start = time.monotonic()
+        deadline = t_start + self.seconds
+        try:
+            while not self.stop.is_set() and time.monotonic() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    self.sample()
+                except Exception as e:
+                    print(f"[profiler] sample failed (ignored): {e!r}")
+                self._cost += time.perf_counter() - t0
+                self.result.ticks += 1
+                self.stop.wait(self.interval)
+        finally:
+            res = self.result
+            res.duration_s = time.monotonic() - t_start
+            res.sample_cost_us = self._cost / max(1, res.ticks) * 1e6
+            self.done.set()
+
+
+_lock = threading.Lock()
+_session: Optional[_Session] = None
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def start_profile(seconds: float = 30.0, interval_ms: Optional[float] = None) -> bool:
+    """
+    サンプリングを開始する（seconds 経過で自動停止）。既に実行中なら False。
+    event loop 上から呼ぶと、loop スレッドのサンプルを実行中 task の stage に帰属させる。
+    """
+    global _session
+    seconds = max(1.0, min(float(seconds), PROF_MAX_SECONDS))
+    interval_ms = max(1.0, float(interval_ms or PROF_INTERVAL_MS))
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        loop_thread_id: Optional[int] = threading.get_ident()
+    except RuntimeError:
+        loop, loop_thread_id = None, None
+
+    with _lock:
+        if _session is not None and not _session.done.is_set():
+            return False
+        _session = _Session(seconds, interval_ms, loop, loop_thread_id)
+        _session.thread.start()
+    return True
+
+
+def profile_running() -> bool:
+    s = _session
+    return s is not None and not s.done.is_set()
+
+
+def stop_profile(timeout: float = 2.0) -> Optional[ProfileResult]:
+    """
+    実行中のセッションを止めて結果を返す（実行中でなければ直近の結果）。
+    """
+    s = _session
+    if s is None:
+        return None
+    s.stop.set()
+    s.done.wait(timeout)
+    return s.result
+
+
+def wait_profile(timeout: Optional[float] = None) -> Optional[ProfileResult]:
+    """
+    実行中のセッションの終了を待って結果を返す（同期。event loop からは to_thread で呼ぶ）。
+    """
+    s = _session
+    if s is None:
+        return None
+    s.done.wait(timeout)
+    return s.result
+
+
+def last_profile() -> Optional[ProfileResult]:
+    """
+    終了済みの直近セッションの結果。
+    """
+    s = _session
+    return s.result if s is not None and s.done.is_set() else None
+
+
+__all__ = [
+    "ProfileResult",
+    "last_profile",
+    "profile_running",
+    "start_profile",
+    "stop_profile",
+    "wait_profile",
+]
@@ -0,0 +1,315 @@
+# ovv/observability/stage_metrics.py
+# ============================================================
+# MODULE CONTRACT: Observability / Stage Metrics v1.1
+#
+# ROLE:
+#   - パイプライン内の「段階（stage）」ごとの所要時間を集計する。
+#     例: inference.snapshot / inference.prompt_build / inference.model_call
+#         bg.total / if.core / st.persist / st.notion / bg.discord_send
+#
+# RESPONSIBILITY TAGS:
+#   [RECORD]   stage 名 → ms を記録（count / total / max / last）
+#   [TIMER]    with stage_timer("x"): ... で計測
+#   [HIST]     (stage, command_type) ごとの log-linear ヒストグラムを
+#              PERF_SLOT_SECONDS 単位のスロットで保持（PERF_RETENTION_SECONDS 分）
+#   [SPAN]     set_span_context(trace_id, command_type) 以降に同じ task / context で
+#              記録された stage は、その command_type と trace の内訳にも入る
+#              （trace_store が有効なら span として永続化キューにも積む）
+#              task ごとの実行中 stage は task_span_info(task)、worker スレッドは
+#              thread_span_info(thread_id) で別スレッドから引ける
+#   [READ]     debug / 観測用のスナップショット API（perf_snapshot / trace_breakdown）
+#
+# CONSTRAINTS:
+#   - 観測専用（挙動を変えない・例外を出さない）
+#   - 外部 I/O を行わない（永続化は trace_store の writer thread が行う）
+# ============================================================
+
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+from ovv.bis.utils.lru import BoundedLRU
+from . import trace_store
+from .histogram import LogLinearHistogram
+
+
+PERF_SLOT_SECONDS = max(1, int(os.getenv("OVV_PERF_SLOT_SECONDS", "10")))
+PERF_RETENTION_SECONDS = max(PERF_SLOT_SECONDS, int(os.getenv("OVV_PERF_RETENTION_SECONDS", "900")))
+PERF_TRACE_MAX = int(os.getenv("OVV_PERF_TRACE_MAX", "256"))
+
+# !dbg_perf の既定の時間窓（秒）
+PERF_WINDOWS: Tuple[int, ...] = (60, 300, 900)
+
+# command_type を持たない記録・全 command 合算のキー
+ALL_COMMANDS = "*"
+
+_lock = threading.Lock()
+_stages: Dict[str, Dict[str, float]] = {}
+
+HistKey = Tuple[str, str]   # (stage, command_type)
+
+# (slot 開始時刻, {(stage, command_type): hist})。古い順
+_slots: Deque[Tuple[int, Dict[HistKey, LogLinearHistogram]]] = deque()
+_cumulative: Dict[HistKey, LogLinearHistogram] = {}
+
+# trace_id -> {"command_type": str, "stages": {stage: ms}}
+_traces = BoundedLRU(PERF_TRACE_MAX)
+
+_span_ctx: ContextVar[Optional[Tuple[str, str]]] = ContextVar("ovv_span_ctx", default=None)
+
+# 実行中の stage 名（stage_timer の入れ子）。set_span_context ごとに新しい list
+_stage_stack: ContextVar[Optional[List[str]]] = ContextVar("ovv_stage_stack", default=None)
+
+# asyncio task -> (span ctx, stage stack)。別スレッド（loop_monitor）から引くための索引
+_task_spans: "weakref.WeakKeyDictionary[Any, Tuple[Tuple[str, str], List[str]]]" = weakref.WeakKeyDictionary()
+
+# thread ident -> (span ctx, stage stack)。to_thread の worker で stage_timer に入っている間だけ載る
+# （loop スレッドの値は task 切り替えで意味を持たないので、loop は _task_spans を使うこと）
+_thread_spans: Dict[int, Tuple[Optional[Tuple[str, str]], List[str]]] = {}
+
+
+# ------------------------------------------------------------
+# Span context
+# ------------------------------------------------------------
+
+def set_span_context(trace_id: str, command_type: Optional[str]) -> None:
+    """
+    現在の context（asyncio task 単位）に trace_id / command_type を束縛する。
+    Discord のメッセージ処理は 1 メッセージ 1 task なので、解除は不要。
+    """
+    ctx = (trace_id, command_type or ALL_COMMANDS)
+    stack: List[str] = []
+    _span_ctx.set(ctx)
+    _stage_stack.set(stack)
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        _task_spans[task] = (ctx, stack)
+
+
+def current_span_context() -> Optional[Tuple[str, str]]:
+    return _span_ctx.get()
+
+
+def thread_span_info(thread_id: int) -> Optional[Dict[str, Any]]:
+    """
+    worker スレッドで実行中の stage（外側から順）と trace。profiler 用。
+    """
+    entry = _thread_spans.get(thread_id)
+    if entry is None:
+        return None
+    ctx, stack = entry
+    trace_id, command_type = ctx if ctx is not None else (None, None)
+    return {"trace_id": trace_id, "command_type": command_type, "stages": list(stack)}
+
+
+def task_span_info(task: Any) -> Optional[Dict[str, Any]]:
+    """
+    asyncio task に束縛された trace_id / command_type / 実行中の stage（外側から順）。
+    loop_monitor が別スレッドから停止中の task を特定するのに使う。
+    """
+    try:
+        entry = _task_spans.get(task)
+    except TypeError:
+        return None
+    if entry is None:
+        return None
+    (trace_id, command_type), stack = entry
+    return {"trace_id": trace_id, "command_type": command_type, "stages": list(stack)}
+
+
+def _slot_for(now: float) -> Dict[HistKey, LogLinearHistogram]:
+    # _lock 保持中に呼ぶこと
+    start = int(now) - int(now) % PERF_SLOT_SECONDS
+    if _slots and _slots[-1][0] == start:
+        return _slots[-1][1]
+    horizon = start - PERF_RETENTION_SECONDS
+    while _slots and _slots[0][0] <= horizon:
+        _slots.popleft()
+    slot: Dict[HistKey, LogLinearHistogram] = {}
+    _slots.append((start, slot))
+    return slot
+
+
+def _hist(table: Dict[HistKey, LogLinearHistogram], key: HistKey) -> LogLinearHistogram:
+    h = table.get(key)
+    if h is None:
+        h = table[key] = LogLinearHistogram()
+    return h
+
+
+def _record_hist(stage: str, elapsed_ms: float, ctx: Optional[Tuple[str, str]]) -> None:
+    # _lock 保持中に呼ぶこと
+    value_us = int(elapsed_ms * 1000.0)
+    slot = _slot_for(time.time())
+    keys = [(stage, ALL_COMMANDS)]
+    if ctx is not None and ctx[1] != ALL_COMMANDS:
+        keys.append((stage, ctx[1]))
+    for key in keys:
+        _hist(slot, key).record(value_us)
+        _hist(_cumulative, key).record(value_us)
+
+    if ctx is not None and PERF_TRACE_MAX > 0:
+        trace_id, command_type = ctx
+        entry = _traces.get(trace_id)
+        if entry is None:
+            entry = {"command_type": command_type, "stages": {}}
+            _traces.put(trace_id, entry)
+        stages = entry["stages"]
+        stages[stage] = round(stages.get(stage, 0.0) + elapsed_ms, 3)
+
+
+def record_stage(stage: str, elapsed_ms: float) -> None:
+    """
+    stage の所要時間(ms)を 1 件記録する。
+    """
+    ctx = _span_ctx.get()
+    if ctx is not None:
+        trace_store.note_span(ctx[0], stage, elapsed_ms)
+    with _lock:
+        st = _stages.get(stage)
+        if st is None:
+            st = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            _stages[stage] = st
+        st["count"] += 1
+        st["total_ms"] += elapsed_ms
+        st["last_ms"] = elapsed_ms
+        if elapsed_ms > st["max_ms"]:
+            st["max_ms"] = elapsed_ms
+        _record_hist(stage, elapsed_ms, ctx)
+
+
+@contextmanager
+def stage_timer(stage: str, sink: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    """
+    with ブロックの所要時間を stage として記録する。
+    sink(dict) を渡すと同じ値を sink[stage] にも書く（1 リクエスト分の内訳用）。
+    """
+    stack = _stage_stack.get()
+    if stack is not None:
+        stack.append(stage)
+        tid = threading.get_ident()
+        prev = _thread_spans.get(tid)
+        _thread_spans[tid] = (_span_ctx.get(), stack)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        if stack is not None:
+            if stack:
+                stack.pop()
+            if prev is None:
+                _thread_spans.pop(tid, None)
+            else:
+                _thread_spans[tid] = prev
+        if sink is not None:
+            sink[stage] = round(elapsed_ms, 3)
+        record_stage(stage, elapsed_ms)
+
+
+def stage_snapshot() -> Dict[str, Dict[str, Any]]:
+    """
+    stage ごとの集計値を返す（avg_ms を付与）。
+    """
+    with _lock:
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, st in _stages.items():
+            count = int(st["count"])
+            out[name] = {
+                "count": count,
+                "avg_ms": round(st["total_ms"] / count, 3) if count else 0.0,
+                "max_ms": round(st["max_ms"], 3),
+                "last_ms": round(st["last_ms"], 3),
+            }
+        return out
+
+
+def _summarize(h: LogLinearHistogram, seconds: Optional[float]) -> Dict[str, Any]:
+    return {
+        "count": h.count,
+        "per_sec": round(h.count / seconds, 3) if seconds else None,
+        "p50_ms": round(h.percentile(0.50) / 1000.0, 3),
+        "p95_ms": round(h.percentile(0.95) / 1000.0, 3),
+        "p99_ms": round(h.percentile(0.99) / 1000.0, 3),
+        "max_ms": round(h.max / 1000.0, 3),
+        "mean_ms": round(h.mean() / 1000.0, 3),
+    }
+
+
+def perf_snapshot(
+    window_seconds: Optional[int] = 60,
+    *,
+    command_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    直近 window_seconds 秒（None なら起動以降の累計）の stage 別分布を返す。
+      {"window_seconds", "stages": {stage: {command_type: {count, per_sec, p50_ms, ...}}}}
+    command_type 指定時はその command（と "*"）のみ。
+    per_sec は窓の長さ（データのある期間が短ければその期間）あたりの件数。
+    """
+    now = time.time()
+    with _lock:
+        if window_seconds is None:
+            merged = {k: LogLinearHistogram.merged([h]) for k, h in _cumulative.items()}
+            seconds = None
+        else:
+            horizon = now - window_seconds
+            merged = {}
+            oldest = None
+            for start, slot in _slots:
+                if start + PERF_SLOT_SECONDS <= horizon:
+                    continue
+                oldest = start if oldest is None else oldest
+                for key, h in slot.items():
+                    _hist(merged, key).merge(h)
+            seconds = min(float(window_seconds), max(1.0, now - oldest)) if oldest is not None else None
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for (stage, cmd), h in sorted(merged.items()):
+        if command_type is not None and cmd not in (command_type, ALL_COMMANDS):
+            continue
+        stages.setdefault(stage, {})[cmd] = _summarize(h, seconds)
+    return {"window_seconds": window_seconds, "stages": stages}
+
+
+def stage_histograms() -> Dict[HistKey, LogLinearHistogram]:
+    """
+    起動以降の (stage, command_type) 別ヒストグラムのコピー（metrics 公開用）。
+    """
+    with _lock:
+        return {k: LogLinearHistogram.merged([h]) for k, h in _cumulative.items()}
+
+
+def perf_command_types() -> List[str]:
+    with _lock:
+        return sorted({cmd for (_, cmd) in _cumulative if cmd != ALL_COMMANDS})
+
+
+def trace_breakdown(trace_id: str) -> Optional[Dict[str, Any]]:
+    """
+    直近 PERF_TRACE_MAX 件の trace について stage 別の所要時間(ms)を返す。
+    """
+    with _lock:
+        entry = _traces.get(trace_id)
+        if entry is None:
+            return None
+        return {"command_type": entry["command_type"], "stages": dict(entry["stages"])}
+
+
+def reset_stages() -> None:
+    with _lock:
+        _stages.clear()
+        _slots.clear()
+        _cumulative.clear()
+        _traces.clear()
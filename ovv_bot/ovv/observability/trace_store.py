@@ -0,0 +1,382 @@
+# ovv/observability/trace_store.py
+# ============================================================
+# MODULE CONTRACT: Observability / Trace Store (PostgreSQL) v1.1
+#
+# ROLE:
+#   - checkpoint と stage span を trace_event テーブルへ非同期・バッチで書き込み、
+#     コンテナ再起動後も trace_id から処理の流れを追えるようにする。
+#   - flight_recorder（メモリ上の直近 N trace）の永続版。
+#
+# RESPONSIBILITY TAGS:
+#   [EMIT]       note_checkpoint() / note_span() : キューに積むだけ（呼び出し側は DB を待たない）
+#   [BATCH]      writer thread が最大 TRACE_PERSIST_BATCH_MAX 件を 1 回の INSERT で書く
+#   [BOUNDED]    キュー上限 TRACE_PERSIST_QUEUE_MAX（超過分は捨てて dropped を数える）
+#   [PARTITION]  trace_event は ts による日次 RANGE パーティション。
+#                先の日付を事前作成し、保持期間（TRACE_RETENTION_DAYS）を過ぎた日は DROP
+#   [READ]       load_trace(trace_id) : trace_event + task_log を時刻順で返す（同期。to_thread で呼ぶ）
+#   [OBSERVE]    trace_store_stats()
+#
+# CONSTRAINTS:
+#   - 観測専用（例外を出さない・挙動を変えない）
+#   - POSTGRES_URL 未設定 / OVV_TRACE_PERSIST=0 なら何もしない
+#   - trace_event（パーティション親）と索引は database.migrations（step 0004）が作る。
+#     ここで行うのは日付に依存するパーティションの作成 / DROP だけ
+#   - writer は専用の接続を持つ（event loop 側の共有接続を使わない）
+#   - 書き込み失敗したバッチは 1 回だけ再試行し、だめなら捨てる（ログ経路を詰まらせない）
+# ============================================================
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import atexit
+import json
+import os
+import threading
+import time
+
+
+# ------------------------------------------------------------
+# Config
+# ------------------------------------------------------------
+
+PG_URL = os.getenv("POSTGRES_URL")
+
+TRACE_PERSIST = os.getenv("OVV_TRACE_PERSIST", "1") != "0" and bool(PG_URL)
+TRACE_PERSIST_QUEUE_MAX = int(os.getenv("OVV_TRACE_PERSIST_QUEUE_MAX", "20000"))
+TRACE_PERSIST_BATCH_MAX = int(os.getenv("OVV_TRACE_PERSIST_BATCH_MAX", "500"))
+TRACE_PERSIST_FLUSH_MS = float(os.getenv("OVV_TRACE_PERSIST_FLUSH_MS", "1000"))
+TRACE_RETENTION_DAYS = int(os.getenv("OVV_TRACE_RETENTION_DAYS", "7"))
+
+# 何日先までパーティションを作っておくか / 保守（作成・DROP）の間隔
+TRACE_PARTITION_AHEAD_DAYS = 2
+TRACE_MAINTENANCE_INTERVAL_S = 3600.0
+
+_SUMMARY_MAX = 500
+
+KIND_CHECKPOINT = "checkpoint"
+KIND_SPAN = "span"
+
+TABLE = "trace_event"
+
+
+# ------------------------------------------------------------
+# Schema
+# ------------------------------------------------------------
+
+_LIST_PARTITIONS = f"""
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_class p ON p.oid = i.inhparent
+WHERE p.relname = '{TABLE}';
+"""
+
+_INSERT = f"""
+INSERT INTO {TABLE} (trace_id, ts, kind, layer, name, level, summary, duration_ms, error)
+VALUES %s
+"""
+_INSERT_TEMPLATE = "(%s, to_timestamp(%s), %s, %s, %s, %s, %s, %s, %s::jsonb)"
+
+
+def _partition_name(day: date) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def _partition_ddl(day: date) -> str:
+    nxt = day + timedelta(days=1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(day)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{nxt.isoformat()} 00:00:00+00');"
+    )
+
+
+def _partition_day(relname: str) -> Optional[date]:
+    prefix = f"{TABLE}_p"
+    if not relname.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(relname[len(prefix):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+# ------------------------------------------------------------
+# Queue
+#   (epoch, trace_id, kind, layer, name, level, summary, duration_ms, error_json)
+# ------------------------------------------------------------
+
+Row = Tuple[float, str, str, Optional[str], str, Optional[str], Optional[str], Optional[float], Optional[str]]
+
+_queue: Deque[Row] = deque()
+_wake = threading.Event()
+_state_lock = threading.Lock()
+_writer: Optional[threading.Thread] = None
+_conn: Any = None
+_last_maintenance = 0.0
+
+_stats: Dict[str, int] = {
+    "enqueued": 0,
+    "written": 0,
+    "dropped": 0,
+    "batches": 0,
+    "write_errors": 0,
+    "partitions_created": 0,
+    "partitions_dropped": 0,
+}
+
+
+def _valid(trace_id: Optional[str]) -> bool:
+    return bool(trace_id) and trace_id != "UNKNOWN"
+
+
+def _enqueue(row: Row) -> None:
+    if not _ensure_writer():
+        return
+    n = len(_queue)
+    if n >= TRACE_PERSIST_QUEUE_MAX:
+        _stats["dropped"] += 1
+        return
+    _queue.append(row)
+    _stats["enqueued"] += 1
+    # ちょうど 1 バッチ分たまった時点で 1 回だけ起こす（writer は満杯バッチが続く限り回る）
+    if n + 1 == TRACE_PERSIST_BATCH_MAX:
+        _wake.set()
+
+
+# ------------------------------------------------------------
+# Writer
+# ------------------------------------------------------------
+
+def _connect() -> Any:
+    global _conn
+    if _conn is not None and getattr(_conn, "closed", 1) == 0:
+        return _conn
+    import psycopg2
+
+    _conn = psycopg2.connect(PG_URL)
+    _conn.autocommit = True
+    return _conn
+
+
+def _reset_conn() -> None:
+    global _conn
+    try:
+        if _conn is not None:
+            _conn.close()
+    except Exception:
+        pass
+    _conn = None
+
+
+def maintain_partitions(cur: Any, today: Optional[date] = None) -> Dict[str, List[str]]:
+    """
+    前日〜 TRACE_PARTITION_AHEAD_DAYS 日先のパーティションを作り、
+    保持期間を過ぎたパーティションを DROP する。
+    """
+    today = today or datetime.now(timezone.utc).date()
+    created: List[str] = []
+    dropped: List[str] = []
+
+    cur.execute(_LIST_PARTITIONS)
+    existing = {row[0] for row in cur.fetchall()}
+
+    for offset in range(-1, TRACE_PARTITION_AHEAD_DAYS + 1):
+        day = today + timedelta(days=offset)
+        if _partition_name(day) not in existing:
+            cur.execute(_partition_ddl(day))
+            created.append(_partition_name(day))
+
+    cutoff = today - timedelta(days=TRACE_RETENTION_DAYS)
+    for relname in sorted(existing):
+        day = _partition_day(relname)
+        if day is not None and day < cutoff:
+            cur.execute(f"DROP TABLE IF EXISTS {relname};")
+            dropped.append(relname)
+
+    _stats["partitions_created"] += len(created)
+    _stats["partitions_dropped"] += len(dropped)
+    return {"created": created, "dropped": dropped}
+
+
+def _maintain(force: bool = False) -> None:
+    global _last_maintenance
+    now = time.monotonic()
+    if not force and _last_maintenance and now - _last_maintenance < TRACE_MAINTENANCE_INTERVAL_S:
+        return
+    with _connect().cursor() as cur:
+        res = maintain_partitions(cur)
+    _last_maintenance = now
+    if res["created"] or res["dropped"]:
+        print(f"[trace_store] partitions created={res['created']} dropped={res['dropped']}")
+
+
+def _insert(rows: List[Row]) -> None:
+    from psycopg2.extras import execute_values
+
+    with _connect().cursor() as cur:
+        execute_values(cur, _INSERT, rows, template=_INSERT_TEMPLATE, page_size=len(rows))
+
+
+def _drain_once(limit: int) -> int:
+    rows: List[Row] = []
+    popleft = _queue.popleft
+    for _ in range(limit):
+        try:
+            rows.append(popleft())
+        except IndexError:
+            break
+    if not rows:
+        return 0
+
+    # 日付の変わり目などでパーティションが無い場合に備え、失敗したら保守してから 1 回だけ再試行
+    for attempt in (0, 1):
+        try:
+            if attempt:
+                _reset_conn()
+                _maintain(force=True)
+            _insert(rows)
+            _stats["written"] += len(rows)
+            _stats["batches"] += 1
+            return len(rows)
+        except Exception as e:
+            if attempt:
+                _stats["write_errors"] += 1
+                _stats["dropped"] += len(rows)
+                print(f"[trace_store] batch write failed, {len(rows)} rows dropped: {e!r}")
+    return len(rows)
+
+
+def _writer_loop() -> None:
+    interval = max(0.01, TRACE_PERSIST_FLUSH_MS / 1000.0)
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+        try:
+            _maintain()
+        except Exception as e:
+            _reset_conn()
+            print(f"[trace_store] partition maintenance failed: {e!r}")
+        while _drain_once(TRACE_PERSIST_BATCH_MAX) == TRACE_PERSIST_BATCH_MAX:
+            pass
+
+
+def _ensure_writer() -> bool:
+    global _writer
+    if _writer is not None:
+        return True
+    if not TRACE_PERSIST:
+        return False
+    with _state_lock:
+        if _writer is None:
+            try:
+                t = threading.Thread(target=_writer_loop, name="ovv-trace-store", daemon=True)
+                t.start()
+            except Exception as e:
+                print(f"[trace_store] writer start failed: {e!r}")
+                return False
+            _writer = t
+    return True
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def note_checkpoint(
+    trace_id: Optional[str],
+    layer: str,
+    checkpoint: str,
+    level: str,
+    summary: str,
+    error: Optional[Dict[str, Any]] = None,
+) -> None:
+    if not TRACE_PERSIST or not _valid(trace_id):
+        return
+    try:
+        err = json.dumps(error, ensure_ascii=False, default=str) if error is not None else None
+        _enqueue((
+            time.time(), trace_id, KIND_CHECKPOINT, layer, checkpoint, level,
+            str(summary)[:_SUMMARY_MAX], None, err,
+        ))
+    except Exception:
+        pass
+
+
+def note_span(trace_id: Optional[str], stage: str, elapsed_ms: float) -> None:
+    """
+    stage span を 1 件積む。ts は span の開始時刻。
+    """
+    if not TRACE_PERSIST or not _valid(trace_id):
+        return
+    _enqueue((
+        time.time() - elapsed_ms / 1000.0, trace_id, KIND_SPAN, None, stage, None,
+        None, round(elapsed_ms, 3), None,
+    ))
+
+
+def flush_traces(timeout: float = 5.0) -> None:
+    """
+    キューに残っている行を書き出す（shutdown 用）。
+    """
+    if not TRACE_PERSIST:
+        return
+    deadline = time.monotonic() + timeout
+    while _queue and time.monotonic() < deadline:
+        _drain_once(TRACE_PERSIST_BATCH_MAX)
+
+
+def load_trace(trace_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    trace_event と task_log を時刻順にまとめて返す（同期。event loop からは to_thread で呼ぶ）。
+    trace_id は先頭一致可（8 文字以上）。
+    """
+    from database.pg import _execute
+
+    key = (trace_id or "").strip()
+    if not key:
+        return []
+    if len(key) >= 36:
+        cond, param = "trace_id = %s", key
+    elif len(key) >= 8:
+        cond, param = "trace_id LIKE %s", key + "%"
+    else:
+        return []
+
+    rows = _execute(
+        f"""
+        SELECT trace_id, ts, kind, layer, name, level, summary, duration_ms, error
+        FROM {TABLE} WHERE {cond}
+        UNION ALL
+        SELECT trace_id, created_at AT TIME ZONE 'UTC', 'task_log', 'PERSIST', event_type, NULL,
+               left(content, {_SUMMARY_MAX}), NULL, NULL
+        FROM task_log WHERE {cond}
+        ORDER BY ts
+        LIMIT %s;
+        """,
+        (param, param, limit),
+    )
+    return [dict(r) for r in rows or []]
+
+
+def trace_store_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = dict(_stats)
+    out["queued"] = len(_queue)
+    out["enabled"] = TRACE_PERSIST
+    out["retention_days"] = TRACE_RETENTION_DAYS
+    return out
+
+
+atexit.register(flush_traces)
+
+
+__all__ = [
+    "TRACE_PERSIST",
+    "flush_traces",
+    "load_trace",
+    "maintain_partitions",
+    "note_checkpoint",
+    "note_span",
+    "trace_store_stats",
+]